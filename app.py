@@ -1,10 +1,22 @@
 import os
+import asyncio
 import logging
+import time
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Query, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from typing import Optional
-from datetime import datetime
-from telegram_parser.parser import TelegramParser
+from datetime import datetime, timedelta, timezone
+from telegram_parser.parser import create_parser_from_env
+from telegram_parser.monitor import ChannelMonitor
+from telegram_parser.scheduler import PollingScheduler
+from telegram_parser.backfill import BackfillJob
+from telegram_parser.tracker import EngagementTracker
+from telegram_parser.jobs import JobManager
+from telegram_parser.media_cache import MediaCache
+from telegram_parser.dedupe import dedupe_posts
+from telegram_parser.serialization import dumps
+from telegram_parser import metrics
 from dotenv import load_dotenv  # Add this import
 
 # Load environment variables from .env file
@@ -14,58 +26,186 @@ load_dotenv()  # Add this line
 logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app):
+    """Keep one Telegram connection open for the lifetime of the app"""
+    create_services()
+    try:
+        await parser.start()
+    except Exception as e:
+        # Requests retry the connection (and authorization) lazily
+        logger.error(f"Could not connect to Telegram on startup: {str(e)}")
+    
+    # Optional push-based ingestion for channels listed in MONITOR_CHANNELS
+    if monitor_channels:
+        app.state.monitor = ChannelMonitor(parser, monitor_channels)
+        try:
+            await app.state.monitor.start()
+        except Exception as e:
+            logger.error(f"Could not start channel monitor: {str(e)}")
+    if parser.engagement_tracker is not None:
+        parser.engagement_tracker.start()
+    if scheduler is not None:
+        scheduler.start()
+    await job_manager.start()
+    yield
+    await job_manager.stop()
+    if scheduler is not None:
+        await scheduler.stop()
+    if parser.engagement_tracker is not None:
+        await parser.engagement_tracker.stop()
+    if monitor_channels:
+        await app.state.monitor.stop()
+    for task in backfill_tasks.values():
+        task.cancel()
+    await parser.stop()
+
 # Create FastAPI app
-app = FastAPI(title="Telegram Post Parser API")
+app = FastAPI(title="Telegram Post Parser API", lifespan=lifespan)
 
 # Check if API credentials are loaded
 api_id = os.getenv("API_ID")
 api_hash = os.getenv("API_HASH")
 phone = os.getenv("PHONE")
 session_string = os.getenv("SESSION_STRING")
+session_strings = [s.strip() for s in os.getenv("SESSION_STRINGS", "").split(",") if s.strip()]
 
 # Log credential status (without revealing actual values)
 logger.info(f"API_ID: {'Not set' if not api_id else 'Set'}")
 logger.info(f"API_HASH: {'Not set' if not api_hash else 'Set'}")
 logger.info(f"PHONE: {'Not set' if not phone else 'Set'}")
 logger.info(f"SESSION_STRING: {'Not set' if not session_string else 'Set'}")
+logger.info(f"SESSION_STRINGS: {len(session_strings)} account(s)")
+
+# Upper bound on posts per channel per request; history is fetched in pages of 100
+max_posts_limit = os.getenv("MAX_POSTS_LIMIT")
+max_posts_limit = int(max_posts_limit) if max_posts_limit and max_posts_limit.isdigit() else 500
+
+# Channels to follow with real-time updates instead of polling
+monitor_channels = [c.strip().lstrip('@') for c in os.getenv("MONITOR_CHANNELS", "").split(",") if c.strip()]
+
+# Channels polled in the background, each on a cadence fitted to how often it posts
+schedule_channels = [c.strip().lstrip('@') for c in os.getenv("SCHEDULE_CHANNELS", "").split(",") if c.strip()]
+
+# Full-history exports started through the API, by channel
+backfill_dir = os.getenv("BACKFILL_DIR", "backfill")
+backfill_jobs = {}
+backfill_tasks = {}
+
+# Built on startup by create_services, so importing the app opens no SQLite files
+parser = None
+scheduler = None
+job_manager = None
+
+def create_services():
+    """Build the parser and the background services configured in the environment"""
+    global parser, scheduler, job_manager
+    # Initialize parser with string session from environment; the backfill and monitor CLIs build theirs the same way.
+    # A parser set beforehand (e.g. a benchmark's, on a fake backend) is kept
+    if parser is None:
+        parser = create_parser_from_env()
+    
+    if schedule_channels:
+        scheduler_options = {}
+        for env_name, option in (("SCHEDULE_BUDGET", "budget"),
+                                 ("SCHEDULE_MIN_INTERVAL", "min_interval"),
+                                 ("SCHEDULE_MAX_INTERVAL", "max_interval")):
+            value = os.getenv(env_name)
+            if value and value.isdigit():
+                scheduler_options[option] = int(value)
+        scheduler = PollingScheduler(parser, schedule_channels, **scheduler_options)
+    
+    # Re-poll views, forwards and reactions of recent posts to follow their growth
+    if os.getenv("ENGAGEMENT_TRACKING", "").lower() in ("1", "true", "yes"):
+        parser.engagement_tracker = EngagementTracker(
+            parser,
+            os.getenv("ENGAGEMENT_TRACKER_PATH", "parser_session.engagement.sqlite")
+        )
+    
+    # Thumbnails (or whole files) downloaded in the background when MEDIA_CACHE_DIR is set
+    media_cache_dir = os.getenv("MEDIA_CACHE_DIR")
+    if media_cache_dir:
+        media_cache_mb = os.getenv("MEDIA_CACHE_MAX_MB")
+        media_workers = os.getenv("MEDIA_WORKERS")
+        parser.media_cache = MediaCache(
+            media_cache_dir,
+            max_bytes=(int(media_cache_mb) if media_cache_mb and media_cache_mb.isdigit() else 512) * 1024 * 1024,
+            workers=int(media_workers) if media_workers and media_workers.isdigit() else 2,
+            mode=os.getenv("MEDIA_DOWNLOAD", "thumbs")
+        )
+    
+    # Background multi-channel fetches submitted through /api/jobs
+    job_workers = os.getenv("JOB_WORKERS")
+    job_manager = JobManager(
+        parser,
+        os.getenv("JOBS_PATH", "parser_session.jobs.sqlite"),
+        workers=int(job_workers) if job_workers and job_workers.isdigit() else 2
+    )
+
+class PostsJSONResponse(JSONResponse):
+    """JSON response that encodes Post objects directly, skipping FastAPI's generic encoder"""
 
-# Initialize parser with string session from environment
-max_rpm = os.getenv("MAX_REQUESTS_PER_MINUTE")
-parser = TelegramParser(
-    api_id=api_id,
-    api_hash=api_hash,
-    phone=phone,
-    session_string=session_string
-)
-if max_rpm and max_rpm.isdigit():
-    parser.max_requests_per_minute = int(max_rpm)
+    def render(self, content):
+        return dumps(content)
+
+def parse_channels(channels):
+    """Clean channel names (remove @ if present)"""
+    return [c.strip().lstrip('@') for c in channels.split(",")]
+
+def cap_limit(limit, max_limit=None):
+    """Check for valid limit to avoid abuse"""
+    max_limit = max_limit or max_posts_limit
+    if limit > max_limit:
+        logger.warning(f"Requested limit too high, capped at {max_limit}")
+        return max_limit
+    return limit
 
 @app.get("/api/posts")
 async def get_posts(
     channels: str = Query(..., description="Comma-separated list of channel usernames"),
     limit: int = Query(10, description="Maximum posts per channel"),
-    days_back: Optional[int] = Query(None, description="Only posts from the last X days")
+    days_back: Optional[int] = Query(None, description="Only posts from the last X days"),
+    min_id: Optional[int] = Query(None, description="Only posts with a higher post_id"),
+    since: Optional[str] = Query(None, description="'last' returns only posts newer than the previous call's"),
+    consumer: str = Query("default", description="Whose high-water marks since=last reads and advances"),
+    max_staleness: Optional[int] = Query(None, description="Serve channels fetched within this many seconds from local storage"),
+    dedupe: bool = Query(False, description="Keep only the earliest post of each duplicate cluster")
 ):
     """Get posts from specified Telegram channels with anti-blocking measures"""
+    if since not in (None, "last"):
+        raise HTTPException(status_code=400, detail="since must be 'last'")
+    
     try:
-        # Clean channel names (remove @ if present)
-        channel_list = [c.strip().lstrip('@') for c in channels.split(",")]
-        
-        # Check for valid limit to avoid abuse
-        if limit > 50:
-            limit = 50
-            logger.warning(f"Requested limit too high, capped at {limit}")
+        channel_list = parse_channels(channels)
+        limit = cap_limit(limit)
         
-        posts = await parser.get_posts(channel_list, limit, days_back)
+        posts = await parser.get_posts(
+            channel_list, limit, days_back,
+            min_id=min_id, since=since, max_staleness=max_staleness, consumer=consumer
+        )
+        # Highest post id returned per channel, to send back as min_id; since=last reports the consumer's marks
+        if since == "last":
+            high_water_marks = {c: parser.channel_cache.get_high_water(c, consumer) for c in channel_list}
+        else:
+            newest = {}
+            for post in posts:
+                key = post.channel_username.lower()
+                newest[key] = max(newest.get(key, 0), post.post_id)
+            high_water_marks = {c: newest.get(c.lower(), min_id or 0) for c in channel_list}
+        fetched = len(posts)
+        if dedupe:
+            posts = dedupe_posts(posts)
         
-        return {
+        return PostsJSONResponse({
             "posts": posts,
             "meta": {
                 "channels_processed": len(channel_list),
                 "total_posts": len(posts),
-                "retrieved_at": datetime.now().isoformat()
+                "duplicates_removed": fetched - len(posts),
+                "retrieved_at": datetime.now().isoformat(),
+                "high_water_marks": high_water_marks
             }
-        }
+        })
     except Exception as e:
         logger.error(f"Error processing request: {str(e)}")
         return JSONResponse(
@@ -73,7 +213,210 @@ async def get_posts(
             content={"error": "Internal server error", "message": str(e)}
         )
 
+@app.get("/api/posts/stream")
+async def stream_posts(
+    channels: str = Query(..., description="Comma-separated list of channel usernames"),
+    limit: int = Query(10, description="Maximum posts per channel"),
+    days_back: Optional[int] = Query(None, description="Only posts from the last X days"),
+    min_id: Optional[int] = Query(None, description="Only posts with a higher post_id"),
+    since: Optional[str] = Query(None, description="'last' returns only posts newer than the previous call's"),
+    consumer: str = Query("default", description="Whose high-water marks since=last reads and advances"),
+    max_staleness: Optional[int] = Query(None, description="Serve channels fetched within this many seconds from local storage"),
+    format: str = Query("ndjson", description="'ndjson' (one post per line) or 'sse' (server-sent events)")
+):
+    """Stream posts as soon as each channel is processed"""
+    if since not in (None, "last"):
+        raise HTTPException(status_code=400, detail="since must be 'last'")
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'")
+    
+    channel_list = parse_channels(channels)
+    limit = cap_limit(limit)
+    
+    def encode(event, payload):
+        data = dumps(payload).decode("utf-8")
+        if format == "sse":
+            return f"event: {event}\ndata: {data}\n\n"
+        return data + "\n"
+    
+    async def body():
+        total = 0
+        try:
+            async for post in parser.iter_posts(
+                channel_list, limit, days_back,
+                min_id=min_id, since=since, max_staleness=max_staleness, consumer=consumer
+            ):
+                total += 1
+                yield encode("post", post)
+        except Exception as e:
+            logger.error(f"Error streaming posts: {str(e)}")
+            yield encode("error", {"error": "Internal server error", "message": str(e)})
+            return
+        if format == "sse":
+            yield encode("end", {
+                "channels_processed": len(channel_list),
+                "total_posts": total,
+                "retrieved_at": datetime.now().isoformat()
+            })
+    
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(body(), media_type=media_type)
+
+def parse_date(value, name, end=False):
+    """ISO date or datetime query parameter as an aware datetime; a bare ``end`` date covers that whole day"""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be an ISO date or datetime")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    if end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+@app.get("/api/search")
+async def search_posts(
+    q: str = Query(..., description='Words to find; "exact phrases" and -excluded words are supported'),
+    channels: Optional[str] = Query(None, description="Comma-separated list of channel usernames"),
+    date_from: Optional[str] = Query(None, alias="from", description="Only posts from this ISO date or datetime"),
+    date_to: Optional[str] = Query(None, alias="to", description="Only posts up to this ISO date or datetime"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum results per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page")
+):
+    """Ranked full-text search over locally stored posts, without calling Telegram"""
+    started = time.perf_counter()
+    try:
+        results, next_cursor = await asyncio.to_thread(
+            parser.post_store.search,
+            q,
+            channels=parse_channels(channels) if channels else None,
+            date_from=parse_date(date_from, "from") if date_from else None,
+            date_to=parse_date(date_to, "to", end=True) if date_to else None,
+            limit=limit,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return PostsJSONResponse({
+        "results": results,
+        "meta": {
+            "query": q,
+            "total_results": len(results),
+            "next_cursor": next_cursor,
+            "took_ms": round((time.perf_counter() - started) * 1000, 1)
+        }
+    })
+
+@app.post("/api/jobs", status_code=202)
+async def submit_job(
+    channels: str = Query(..., description="Comma-separated list of channel usernames"),
+    limit: int = Query(10, description="Maximum posts per channel"),
+    days_back: Optional[int] = Query(None, description="Only posts from the last X days"),
+    min_id: Optional[int] = Query(None, description="Only posts with a higher post_id"),
+    max_staleness: Optional[int] = Query(None, description="Serve channels fetched within this many seconds from local storage")
+):
+    """Queue a fetch of many channels and return its job id immediately
+
+    Submitting the same channels and options again returns the existing job.
+    """
+    channel_list = parse_channels(channels)
+    job_id, attached = job_manager.submit(
+        channel_list,
+        limit=cap_limit(limit),
+        days_back=days_back,
+        min_id=min_id,
+        max_staleness=max_staleness
+    )
+    job = job_manager.get(job_id, limit=0)
+    return {
+        "job_id": job_id,
+        "attached": attached,
+        "status": job["status"],
+        "progress": job["progress"]
+    }
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(
+    job_id: str,
+    offset: int = Query(0, ge=0, description="Index of the first post to return"),
+    limit: int = Query(100, ge=0, le=1000, description="Maximum posts to return")
+):
+    """Status, per-channel progress and a page of the posts collected so far"""
+    job = job_manager.get(job_id, offset, limit)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return PostsJSONResponse(job)
+
+@app.post("/api/backfill/{channel}")
+async def start_backfill(
+    channel: str,
+    chunk_size: int = Query(10000, description="Posts per gzip JSONL chunk")
+):
+    """Start (or resume) a background export of a channel's full history"""
+    channel = channel.strip().lstrip('@')
+    task = backfill_tasks.get(channel)
+    if task is None or task.done():
+        job = BackfillJob(parser, channel, backfill_dir, chunk_size=chunk_size)
+        backfill_jobs[channel] = job
+        backfill_tasks[channel] = asyncio.create_task(job.run())
+    return backfill_jobs[channel].progress()
+
+@app.get("/api/backfill/{channel}")
+async def backfill_progress(channel: str):
+    """Progress of a channel's history export"""
+    job = backfill_jobs.get(channel.strip().lstrip('@'))
+    if job is None:
+        raise HTTPException(status_code=404, detail="No backfill for this channel")
+    return job.progress()
+
+@app.get("/api/engagement")
+async def engagement_series(
+    channel: str = Query(..., description="Channel username"),
+    post_ids: Optional[str] = Query(None, description="Comma-separated post IDs; all tracked posts if omitted")
+):
+    """Engagement snapshots and view velocity of tracked posts"""
+    if parser.engagement_tracker is None:
+        raise HTTPException(status_code=404, detail="Engagement tracking is disabled")
+    try:
+        ids = [int(i) for i in post_ids.split(",") if i.strip()] if post_ids else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="post_ids must be comma-separated integers")
+    series = parser.engagement_tracker.get_series(channel.strip().lstrip('@'), ids)
+    return {"data": series, "meta": {"channel": channel, "total_posts": len(series)}}
+
+@app.get("/api/media/{cache_key}")
+async def get_media(cache_key: str):
+    """A downloaded thumbnail or file, by the cache_key of a post's media item"""
+    path = parser.media_cache.get(cache_key) if parser.media_cache is not None else None
+    if path is None:
+        raise HTTPException(status_code=404, detail="Media is not cached")
+    return FileResponse(path)
+
+@app.get("/api/schedule")
+async def schedule_status():
+    """Polling budget and each scheduled channel's interval, posting rate and next poll"""
+    if scheduler is None:
+        raise HTTPException(status_code=404, detail="No channels scheduled (set SCHEDULE_CHANNELS)")
+    return scheduler.status()
+
+@app.get("/api/cache")
+async def cache_stats():
+    """Response cache hit/miss counters and request coalescing stats"""
+    return parser.cache_stats()
+
+@app.get("/api/metrics")
+async def prometheus_metrics():
+    """RPC, FloodWait, rate limiter and fetch metrics in Prometheus text format"""
+    metrics.observe_session_pool(parser.session_pool)
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/api/health")
 async def health_check():
     """Simple health check endpoint"""
-    return {"status": "ok", "version": "1.0.0"}
\ No newline at end of file
+    return {
+        "status": "ok",
+        "version": "1.0.0",
+        "accounts": parser.session_pool.status(),
+        "pipeline": parser.pipeline.status(),
+        "monitor": app.state.monitor.status() if monitor_channels else None
+    }
\ No newline at end of file
@@ -0,0 +1,98 @@
+"""
+Micro-benchmark: entity-offset extraction vs the previous per-call regex functions.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_extraction
+"""
+import json
+import os
+import re
+import timeit
+from telethon.tl.types import Message, MessageEntityHashtag, MessageEntityTextUrl, MessageEntityUrl, PeerChannel
+from telegram_parser.extraction import extract_entities, _from_patterns, link_domains
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# Previous implementations, kept here as the baseline
+def legacy_extract_hashtags(text):
+    if not text:
+        return []
+    import re
+    return re.findall(r'#(\w+)', text)
+
+
+def legacy_extract_urls(text):
+    if not text:
+        return []
+    import re
+    return re.findall(r'https?://\S+', text)
+
+
+def legacy_metadata(message):
+    has_link = False
+    if hasattr(message, "entities") and message.entities:
+        for entity in message.entities:
+            if entity.__class__.__name__ == "MessageEntityUrl":
+                has_link = True
+    return {"has_link": has_link, "link_domains": []}
+
+
+def legacy(message):
+    text = message.message
+    return legacy_extract_hashtags(text), legacy_extract_urls(text), legacy_metadata(message)
+
+
+def regex_same_fields(message):
+    """What the fallback path costs: regexes producing every field the entity path does"""
+    result = {"hashtags": [], "mentions": [], "urls": [], "cashtags": []}
+    _from_patterns(message.message, result)
+    result["link_domains"] = link_domains(result["urls"])
+    return result
+
+
+def utf16_len(text):
+    return len(text.encode("utf-16-le")) // 2
+
+
+def build_entities(text):
+    """Entities as Telegram would send them, with UTF-16 offsets"""
+    entities = []
+    for pattern, entity_type in ((r'https?://\S+', MessageEntityUrl), (r'#\w+', MessageEntityHashtag)):
+        for match in re.finditer(pattern, text):
+            offset = utf16_len(text[:match.start()])
+            entities.append(entity_type(offset=offset, length=utf16_len(match.group())))
+    entities.append(MessageEntityTextUrl(offset=0, length=1, url="https://example.com/hidden"))
+    return sorted(entities, key=lambda e: e.offset)
+
+
+def load_messages():
+    with open(os.path.join(ROOT, "example.json")) as f:
+        texts = [post["text"] for page in json.load(f) for post in page["posts"]]
+    # Emoji before links shift UTF-16 offsets; include such posts too
+    texts += ["🔥 " + text + " #новости" for text in texts]
+    return [
+        Message(id=i, peer_id=PeerChannel(1), date=None, message=text, entities=build_entities(text))
+        for i, text in enumerate(texts)
+    ]
+
+
+def main(number=2000):
+    messages = load_messages()
+    cases = (
+        ("legacy (hashtags, urls, has_link)", legacy),
+        ("regex, all fields", regex_same_fields),
+        ("entity offsets, all fields", extract_entities)
+    )
+    for name, func in cases:
+        seconds = timeit.timeit(lambda: [func(message) for message in messages], number=number)
+        per_post = seconds / (number * len(messages)) * 1e6
+        print(f"{name:36s} {per_post:8.2f} us/post")
+
+    # The new engine also fills link_domains and hidden links, which the old one never did
+    print("sample:", json.dumps(extract_entities(messages[-1]), ensure_ascii=False)[:300])
+
+
+if __name__ == '__main__':
+    main()
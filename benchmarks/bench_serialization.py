@@ -0,0 +1,108 @@
+"""
+Benchmark: memory per post and response encoding time, nested dicts vs the Post model.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_serialization
+"""
+import json
+import os
+import timeit
+import tracemalloc
+from datetime import datetime
+from fastapi.encoders import jsonable_encoder
+from telegram_parser import serialization
+from telegram_parser.models import Engagement, Post, Reaction
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_sources(count):
+    with open(os.path.join(ROOT, "example.json")) as f:
+        posts = [post for page in json.load(f) for post in page["posts"]]
+    return [posts[i % len(posts)] for i in range(count)]
+
+
+def as_dict(src):
+    """The previous shape: nested dicts and lists built per post"""
+    engagement = src["engagement"]
+    return {
+        "channel_username": src["channel_username"],
+        "channel_title": src["channel_title"],
+        "post_id": src["post_id"],
+        "date": src["date"],
+        "text": src["text"],
+        "media": list(src["media"]),
+        "engagement": {
+            "views": engagement["views"],
+            "forwards": engagement["forwards"],
+            "reactions": [{"emoji": r["emoji"], "count": r["count"]} for r in engagement["reactions"]]
+        },
+        "has_link": src["has_link"],
+        "link_domains": list(src["link_domains"]),
+        "hashtags": list(src.get("hashtags", [])),
+        "mentions": list(src.get("mentions", [])),
+        "urls": list(src.get("urls", [])),
+        "cashtags": list(src.get("cashtags", [])),
+        "cluster_id": src.get("cluster_id")
+    }
+
+
+def as_post(src, date):
+    engagement = src["engagement"]
+    return Post(
+        src["channel_username"],
+        src["channel_title"],
+        src["post_id"],
+        date,
+        src["text"],
+        list(src["media"]),
+        Engagement(
+            engagement["views"],
+            engagement["forwards"],
+            [Reaction(r["emoji"], r["count"]) for r in engagement["reactions"]]
+        ),
+        src["has_link"],
+        list(src["link_domains"]),
+        list(src.get("hashtags", [])),
+        list(src.get("mentions", [])),
+        list(src.get("urls", [])),
+        list(src.get("cashtags", [])),
+        src.get("cluster_id")
+    )
+
+
+def measure(build, sources):
+    """Bytes allocated per post; texts and other strings are shared, so this is the container overhead"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    built = [build(src) for src in sources]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return built, (after - before) / len(sources)
+
+
+def main(count=5000, number=20):
+    sources = load_sources(count)
+    dates = {src["date"]: datetime.fromisoformat(src["date"]) for src in sources}
+    dicts, dict_bytes = measure(as_dict, sources)
+    posts, post_bytes = measure(lambda src: as_post(src, dates[src["date"]]), sources)
+    print(f"memory per post: dicts {dict_bytes:8.0f} B, Post {post_bytes:8.0f} B")
+
+    # Both payloads must encode to the same document
+    assert json.loads(serialization.dumps({"posts": posts})) == json.loads(json.dumps({"posts": dicts}))
+
+    cases = (
+        ("dicts, jsonable_encoder + json (before)",
+         lambda: json.dumps(jsonable_encoder({"posts": dicts}), ensure_ascii=False).encode("utf-8")),
+        ("dicts, json only", lambda: json.dumps({"posts": dicts}, ensure_ascii=False).encode("utf-8")),
+        (f"Post, serialization.dumps ({'orjson' if serialization.orjson else 'json'})",
+         lambda: serialization.dumps({"posts": posts}))
+    )
+    for name, func in cases:
+        seconds = timeit.timeit(func, number=number)
+        print(f"{name:44s} {seconds / number * 1e3:8.2f} ms per {count} posts")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+"""
+Throughput benchmark for TelegramParser.get_posts and /api/posts against the offline fake backend.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_throughput
+    python -m benchmarks.bench_throughput --scenario baseline --scenario flood_waits --json
+
+Each scenario reports posts per second, RPCs per method, injected
+FloodWaits and p50/p99 request latency. Pacing is off unless ``--pacing``
+names a policy, so the numbers reflect the parser's own overhead, RPC
+batching and the rate limiter.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+from telegram_parser.pacing import PACING_POLICIES
+from .fake_telegram import FakeTelegramClient, make_channels, make_parser
+
+# Defaults shared by all scenarios; each scenario overrides some of them
+DEFAULTS = {
+    "channels": 10,              # channels in the fake backend
+    "channel_size": 2000,        # posts per channel
+    "channels_per_request": 5,   # channels named in each get_posts call
+    "limit": 50,                 # posts per channel per call
+    "requests": 20,              # get_posts calls to make
+    "concurrency": 4,            # calls in flight at once
+    "latency": 0.05,             # seconds per RPC
+    "flood_wait_rate": 0.0,      # probability an RPC raises FloodWaitError
+    "flood_wait_seconds": 1,
+    "accounts": 1,
+    "rate_per_minute": 100000,   # starting rate of every bucket; high means effectively unthrottled
+    "response_cache": False,     # keep the parser's short-lived response cache on
+    "pacing": "none"             # pacing policy of every account
+}
+
+SCENARIOS = {
+    "baseline": {},
+    "deep_pages": {"limit": 500, "requests": 6, "concurrency": 2},
+    "many_channels": {"channels": 50, "channels_per_request": 25, "requests": 6},
+    "slow_network": {"latency": 0.25, "requests": 8},
+    "flood_waits": {"flood_wait_rate": 0.05, "flood_wait_seconds": 1},
+    "rate_limited": {"rate_per_minute": None, "requests": 4},
+    "multi_account": {"accounts": 3, "flood_wait_rate": 0.05, "flood_wait_seconds": 1},
+    "cached": {"response_cache": True}
+}
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+def build(config, workdir):
+    client = FakeTelegramClient(
+        make_channels(config["channels"], config["channel_size"]),
+        latency=config["latency"],
+        flood_wait_rate=config["flood_wait_rate"],
+        flood_wait_seconds=config["flood_wait_seconds"]
+    )
+    parser = make_parser(client, accounts=config["accounts"], workdir=workdir,
+                         rate_per_minute=config["rate_per_minute"], pacing=config["pacing"])
+    if not config["response_cache"]:
+        parser.response_cache.ttl = 0
+    return client, parser
+
+
+def request_channels(config, index):
+    """Rotate through the backend's channels so consecutive calls overlap only partly"""
+    count = config["channels"]
+    start = index * config["channels_per_request"] // 2
+    return [f"fake_channel_{(start + i) % count}" for i in range(min(config["channels_per_request"], count))]
+
+
+async def run_load(config, call):
+    """Make ``requests`` calls with ``concurrency`` in flight; returns (post count, latencies, wall time)"""
+    semaphore = asyncio.Semaphore(config["concurrency"])
+    latencies = []
+
+    async def one(index):
+        async with semaphore:
+            started = time.perf_counter()
+            count = await call(request_channels(config, index))
+            latencies.append(time.perf_counter() - started)
+            return count
+
+    started = time.perf_counter()
+    counts = await asyncio.gather(*(one(i) for i in range(config["requests"])))
+    return sum(counts), latencies, time.perf_counter() - started
+
+
+def summarize(name, target, client, posts, latencies, elapsed):
+    return {
+        "scenario": name,
+        "target": target,
+        "posts": posts,
+        "seconds": round(elapsed, 3),
+        "posts_per_second": round(posts / elapsed, 1) if elapsed else None,
+        "rpc_calls": dict(client.calls),
+        "rpc_total": sum(client.calls.values()),
+        "flood_waits": sum(client.flood_waits.values()),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1)
+    }
+
+
+async def bench_parser(name, config):
+    with tempfile.TemporaryDirectory() as workdir:
+        client, parser = build(config, workdir)
+
+        async def call(channels):
+            return len(await parser.get_posts(channels, limit=config["limit"]))
+
+        posts, latencies, elapsed = await run_load(config, call)
+        return summarize(name, "get_posts", client, posts, latencies, elapsed)
+
+
+async def bench_api(name, config):
+    import httpx
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # app.py only builds its own parser and services on startup, which ASGITransport does not run;
+        # should that change, their files still stay out of the working tree
+        for env_name in ("CACHE_PATH", "POST_STORE_PATH", "DEDUPE_INDEX_PATH", "JOBS_PATH", "ENGAGEMENT_TRACKER_PATH"):
+            os.environ.setdefault(env_name, os.path.join(workdir, f"app.{env_name.lower()}.sqlite"))
+        import app as app_module
+
+        client, parser = build(config, workdir)
+        original = app_module.parser
+        app_module.parser = parser
+        try:
+            transport = httpx.ASGITransport(app=app_module.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+                async def call(channels):
+                    response = await http.get("/api/posts", params={
+                        "channels": ",".join(channels),
+                        "limit": config["limit"]
+                    })
+                    response.raise_for_status()
+                    return response.json()["meta"]["total_posts"]
+
+                posts, latencies, elapsed = await run_load(config, call)
+        finally:
+            app_module.parser = original
+        return summarize(name, "/api/posts", client, posts, latencies, elapsed)
+
+
+async def run(names, targets, pacing=None):
+    results = []
+    for name in names:
+        config = {**DEFAULTS, **SCENARIOS[name]}
+        if pacing:
+            config["pacing"] = pacing
+        for target in targets:
+            bench = bench_parser if target == "parser" else bench_api
+            results.append(await bench(name, config))
+    return results
+
+
+def print_table(results):
+    print(f"{'scenario':14s} {'target':11s} {'posts':>6s} {'posts/s':>9s} {'rpcs':>6s} {'floods':>6s} "
+          f"{'p50 ms':>8s} {'p99 ms':>8s}  rpc calls")
+    for r in results:
+        calls = ", ".join(f"{k}={v}" for k, v in sorted(r["rpc_calls"].items()))
+        print(f"{r['scenario']:14s} {r['target']:11s} {r['posts']:6d} {r['posts_per_second']:9.1f} "
+              f"{r['rpc_total']:6d} {r['flood_waits']:6d} {r['p50_ms']:8.1f} {r['p99_ms']:8.1f}  {calls}")
+
+
+def main():
+    import logging
+
+    arg_parser = argparse.ArgumentParser(description="Parser throughput against an offline fake Telegram")
+    arg_parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                            help="Scenario to run (repeatable); all by default")
+    arg_parser.add_argument("--target", action="append", choices=("parser", "api"),
+                            help="Benchmark get_posts, /api/posts or both (default)")
+    arg_parser.add_argument("--pacing", choices=sorted(PACING_POLICIES), help="Pacing policy for every scenario")
+    arg_parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = arg_parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    results = asyncio.run(run(args.scenario or list(SCENARIOS), args.target or ["parser", "api"], args.pacing))
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,253 @@
+"""
+Offline stand-in for the parts of Telethon that TelegramParser uses.
+
+``FakeTelegramClient`` serves synthetic channels built from the texts in
+example.json, with configurable per-RPC latency, FloodWaitError rate and
+channel sizes, and counts every RPC it answers. ``make_parser`` returns a
+TelegramParser wired to it, so parser changes can be measured without
+credentials or network access.
+"""
+import asyncio
+import json
+import os
+import random
+import tempfile
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from telethon.errors import FloodWaitError
+from telethon.tl.functions.channels import GetFullChannelRequest
+from telethon.tl.functions.messages import GetMessagesReactionsRequest, GetMessagesViewsRequest
+from telethon.tl.types import (
+    Channel,
+    ChatPhotoEmpty,
+    Message,
+    MessageReactions,
+    MessageViews,
+    PeerChannel,
+    ReactionCount,
+    ReactionEmoji,
+    UpdateMessageReactions,
+    Updates
+)
+from telethon.tl.types.messages import MessageViews as MessagesViews
+from telegram_parser.parser import TelegramParser
+from telegram_parser.rate_limiter import AdaptiveRateLimiter
+from telegram_parser.session_pool import Account, SessionPool
+from .bench_extraction import ROOT, build_entities
+
+EMOJIS = ("👍", "🔥", "❤", "😁", "🤔")
+
+
+def load_texts():
+    with open(os.path.join(ROOT, "example.json")) as f:
+        return [post["text"] for page in json.load(f) for post in page["posts"]]
+
+
+class FakeChannel:
+    """A broadcast channel with ``size`` posts, ids 1..size, one every ``interval`` (newest now)"""
+
+    def __init__(self, channel_id, username, size, interval=timedelta(hours=1), inline_reactions=0.5):
+        self.id = channel_id
+        self.username = username
+        self.size = size
+        self.interval = interval
+        # Share of messages that carry their reactions inline instead of needing a lookup
+        self.inline_reactions = inline_reactions
+        self.newest_date = datetime.now(timezone.utc).replace(microsecond=0)
+        self.entity = Channel(
+            id=channel_id,
+            title=f"Fake channel {username}",
+            photo=ChatPhotoEmpty(),
+            date=self.newest_date - size * interval,
+            broadcast=True,
+            access_hash=channel_id * 7919,
+            username=username
+        )
+
+    def date_of(self, message_id):
+        return self.newest_date - (self.size - message_id) * self.interval
+
+    def reactions_of(self, message_id):
+        return MessageReactions(results=[
+            ReactionCount(reaction=ReactionEmoji(emoticon=emoji), count=(message_id * (i + 3)) % 97 + 1)
+            for i, emoji in enumerate(EMOJIS[:message_id % len(EMOJIS) + 1])
+        ])
+
+
+class FakeTelegramClient:
+    """Answers get_entity, get_messages and raw requests like a TelegramClient would.
+
+    Every call sleeps for ``latency`` seconds (± ``jitter`` as a fraction)
+    and raises FloodWaitError of ``flood_wait_seconds`` with probability
+    ``flood_wait_rate``. ``calls`` counts answered RPCs by method,
+    ``flood_waits`` the injected errors.
+    """
+
+    def __init__(self, channels, latency=0.05, jitter=0.5, flood_wait_rate=0.0, flood_wait_seconds=1, seed=0):
+        self.channels = {channel.username.lower(): channel for channel in channels}
+        self._by_id = {channel.id: channel for channel in channels}
+        self.latency = latency
+        self.jitter = jitter
+        self.flood_wait_rate = flood_wait_rate
+        self.flood_wait_seconds = flood_wait_seconds
+        self.random = random.Random(seed)
+        self.calls = Counter()
+        self.flood_waits = Counter()
+        self._connected = False
+        self._texts = [(text, build_entities(text)) for text in load_texts()]
+
+    async def _rpc(self, name):
+        delay = self.latency * (1 + self.random.uniform(-self.jitter, self.jitter))
+        await asyncio.sleep(max(0, delay))
+        if self.flood_wait_rate and self.random.random() < self.flood_wait_rate:
+            self.flood_waits[name] += 1
+            raise FloodWaitError(request=None, capture=self.flood_wait_seconds)
+        self.calls[name] += 1
+
+    def _channel(self, peer):
+        channel = self._by_id.get(getattr(peer, "channel_id", None))
+        if channel is None:
+            raise ValueError(f"Could not find the input entity for {peer!r}")
+        return channel
+
+    def _message(self, channel, message_id):
+        text, entities = self._texts[(channel.id + message_id) % len(self._texts)]
+        inline = (message_id % 100) < channel.inline_reactions * 100
+        return Message(
+            id=message_id,
+            peer_id=PeerChannel(channel.id),
+            date=channel.date_of(message_id),
+            message=text,
+            entities=entities,
+            post=True,
+            views=message_id * 13 % 5000 + 100,
+            forwards=message_id % 17,
+            reactions=channel.reactions_of(message_id) if inline else None
+        )
+
+    # Connection surface used by ClientManager and the health probe
+    async def connect(self):
+        self._connected = True
+
+    async def disconnect(self):
+        self._connected = False
+
+    def is_connected(self):
+        return self._connected
+
+    async def is_user_authorized(self):
+        return True
+
+    async def get_me(self):
+        await self._rpc("get_me")
+        return SimpleNamespace(id=1, username="fake")
+
+    def add_event_handler(self, callback, event=None):
+        pass
+
+    def remove_event_handler(self, callback, event=None):
+        pass
+
+    async def get_entity(self, entity):
+        await self._rpc("get_entity")
+        channel = self.channels.get(str(entity).lstrip("@").lower())
+        if channel is None:
+            raise ValueError(f'No user has "{entity}" as username')
+        return channel.entity
+
+    async def get_messages(self, entity, limit=100, min_id=0, offset_id=0, offset_date=None, reverse=False, **kwargs):
+        """Same paging semantics as TelegramClient.get_messages for a channel's history"""
+        await self._rpc("get_messages")
+        channel = self._channel(entity)
+        min_id = min_id or 0
+        if reverse:
+            first = max(min_id, offset_id or 0) + 1
+            if offset_date is not None:
+                while first <= channel.size and channel.date_of(first) < offset_date:
+                    first += 1
+            ids = range(first, min(channel.size, first + limit - 1) + 1)
+        else:
+            last = channel.size if not offset_id else min(channel.size, offset_id - 1)
+            if offset_date is not None:
+                while last > 0 and channel.date_of(last) >= offset_date:
+                    last -= 1
+            ids = range(last, max(min_id, last - limit), -1)
+        return [self._message(channel, message_id) for message_id in ids]
+
+    async def __call__(self, request, *args, **kwargs):
+        if isinstance(request, GetFullChannelRequest):
+            await self._rpc("GetFullChannelRequest")
+            channel = self._channel(request.channel)
+            return SimpleNamespace(full_chat=SimpleNamespace(
+                about=f"About {channel.username}",
+                participants_count=channel.size * 10
+            ))
+        if isinstance(request, GetMessagesReactionsRequest):
+            await self._rpc("GetMessagesReactionsRequest")
+            channel = self._channel(request.peer)
+            return Updates(
+                updates=[
+                    UpdateMessageReactions(PeerChannel(channel.id), message_id, channel.reactions_of(message_id))
+                    for message_id in request.id if 0 < message_id <= channel.size
+                ],
+                users=[], chats=[], date=None, seq=0
+            )
+        if isinstance(request, GetMessagesViewsRequest):
+            await self._rpc("GetMessagesViewsRequest")
+            return MessagesViews(
+                views=[MessageViews(views=message_id * 13 % 5000 + 100, forwards=message_id % 17)
+                       for message_id in request.id],
+                chats=[], users=[]
+            )
+        raise NotImplementedError(f"{type(request).__name__} is not faked")
+
+
+class FakeClientManager:
+    """ClientManager stand-in that hands out a FakeTelegramClient"""
+
+    def __init__(self, client):
+        self.client = client
+        self.reconnects = 0
+
+    async def start(self):
+        await self.client.connect()
+
+    async def stop(self):
+        await self.client.disconnect()
+
+    async def get_client(self):
+        if not self.client.is_connected():
+            await self.client.connect()
+        return self.client
+
+    def add_reconnect_callback(self, callback):
+        pass
+
+    def remove_reconnect_callback(self, callback):
+        pass
+
+    def status(self):
+        return {"connected": self.client.is_connected(), "fake": True}
+
+
+def make_channels(count, size, **options):
+    return [FakeChannel(1000 + i, f"fake_channel_{i}", size, **options) for i in range(count)]
+
+
+def make_parser(client, accounts=1, workdir=None, rate_per_minute=None, pacing="none", **parser_options):
+    """A TelegramParser whose accounts all talk to ``client``, with its SQLite files in ``workdir``"""
+    workdir = workdir or tempfile.mkdtemp(prefix="fake-telegram-")
+    parser = TelegramParser(
+        api_id=1,
+        api_hash="fake",
+        phone=None,
+        session_file=os.path.join(workdir, "fake_session"),
+        **parser_options
+    )
+    parser.session_pool = SessionPool([
+        Account(f"fake-{i}", FakeClientManager(client), AdaptiveRateLimiter(pacing=pacing)) for i in range(accounts)
+    ])
+    if rate_per_minute:
+        parser.max_requests_per_minute = rate_per_minute
+    return parser
@@ -2,14 +2,19 @@
 Message Content Processors (MCPs) for Telegram posts
 These processors normalize and filter the post data before output
 """
+import re
+
+# Compiled once at import instead of on every call
+NEWLINES_RE = re.compile(r'\n+')
+HASHTAG_RE = re.compile(r'#(\w+)')
+URL_RE = re.compile(r'https?://\S+')
 
 def clean_text(text):
     """Clean and normalize post text"""
     if not text:
         return ""
     # Replace multiple newlines with single newline
-    import re
-    text = re.sub(r'\n+', '\n', text)
+    text = NEWLINES_RE.sub('\n', text)
     # Trim whitespace
     return text.strip()
 
@@ -17,16 +22,14 @@ def extract_hashtags(text):
     """Extract hashtags from post text"""
     if not text:
         return []
-    import re
-    hashtags = re.findall(r'#(\w+)', text)
+    hashtags = HASHTAG_RE.findall(text)
     return hashtags
 
 def extract_urls(text):
     """Extract URLs from post text"""
     if not text:
         return []
-    import re
-    urls = re.findall(r'https?://\S+', text)
+    urls = URL_RE.findall(text)
     return urls
 
 def process_post(post_data):
@@ -0,0 +1,158 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+import time
+from telethon.errors import FloodWaitError
+from .rate_limiter import RateLimitExceeded
+from .serialization import dumps
+
+
+class BackfillJob:
+    """Export a channel's whole history to gzip JSONL chunks, resumable from a checkpoint.
+
+    History is walked newest to oldest one page at a time. After each page
+    the posts are appended to the current chunk and the checkpoint (offset
+    and counters) is replaced atomically, so a crash or restart continues
+    from the last finished page. A page written just before a crash may be
+    written again on resume. Memory use is bounded by one page.
+    """
+
+    def __init__(self, parser, channel, output_dir, chunk_size=10000, page_size=100):
+        self.parser = parser
+        self.channel = channel.strip().lstrip('@')
+        self.output_dir = output_dir
+        self.chunk_size = chunk_size
+        self.page_size = page_size
+        self.logger = logging.getLogger(__name__)
+        self.checkpoint_path = os.path.join(output_dir, f"{self.channel}.checkpoint.json")
+        self.state = self._load_checkpoint()
+        self.running = False
+        self.error = None
+        self._run_started = None
+        self._run_posts = 0
+
+    def _load_checkpoint(self):
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path) as f:
+                return json.load(f)
+        return {
+            "channel": self.channel,
+            "offset_id": 0,
+            "chunk": 0,
+            "chunk_posts": 0,
+            "total_posts": 0,
+            "done": False,
+            "updated_at": None
+        }
+
+    def _save_checkpoint(self):
+        self.state["updated_at"] = time.time()
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _chunk_path(self):
+        return os.path.join(self.output_dir, f"{self.channel}-{self.state['chunk']:05d}.jsonl.gz")
+
+    def _write_page(self, posts):
+        # Appending makes a multi-member gzip file, which gzip readers handle transparently
+        with gzip.open(self._chunk_path(), "ab") as f:
+            for post in posts:
+                f.write(dumps(post))
+                f.write(b"\n")
+        self.state["chunk_posts"] += len(posts)
+        self.state["total_posts"] += len(posts)
+        if self.state["chunk_posts"] >= self.chunk_size:
+            self.state["chunk"] += 1
+            self.state["chunk_posts"] = 0
+
+    def progress(self):
+        elapsed = time.monotonic() - self._run_started if self._run_started else 0
+        return {
+            "channel": self.channel,
+            "running": self.running,
+            "done": self.state["done"],
+            "total_posts": self.state["total_posts"],
+            "offset_id": self.state["offset_id"],
+            "chunks": self.state["chunk"] + (1 if self.state["chunk_posts"] else 0),
+            "posts_per_second": round(self._run_posts / elapsed, 2) if elapsed else None,
+            "error": self.error
+        }
+
+    async def run(self):
+        """Walk the remaining history; returns the final progress"""
+        if self.state["done"]:
+            return self.progress()
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.running = True
+        self.error = None
+        self._run_started = time.monotonic()
+        self._run_posts = 0
+        try:
+            while True:
+                try:
+                    # Also stores the page, so the exported history is searchable too; old posts'
+                    # media and engagement are not worth downloads and tracking
+                    posts = await self.parser.fetch_channel(
+                        self.channel,
+                        self.page_size,
+                        offset_id=self.state["offset_id"] or None,
+                        side_effects=False
+                    )
+                except (FloodWaitError, RateLimitExceeded) as e:
+                    # Every account is rate limited; the checkpoint is already on disk, so wait and carry on
+                    wait_time = getattr(e, "seconds", 0)
+                    self.logger.warning(f"Backfill of {self.channel} waiting {wait_time:.0f} seconds: {str(e)}")
+                    await asyncio.sleep(wait_time)
+                    continue
+                if not posts:
+                    self.state["done"] = True
+                    self._save_checkpoint()
+                    break
+
+                self._write_page(posts)
+                self.state["offset_id"] = posts[-1].post_id
+                self._save_checkpoint()
+
+                self._run_posts += len(posts)
+                progress = self.progress()
+                self.logger.info(
+                    f"Backfill {self.channel}: {progress['total_posts']} posts, "
+                    f"offset {progress['offset_id']}, {progress['posts_per_second']} posts/s"
+                )
+        except Exception as e:
+            self.error = str(e)
+            self.logger.error(f"Backfill of {self.channel} failed: {str(e)}")
+            raise
+        finally:
+            self.running = False
+        return self.progress()
+
+
+async def main(channel, output_dir, chunk_size):
+    from dotenv import load_dotenv
+    from .parser import create_parser_from_env
+
+    load_dotenv()
+    parser = create_parser_from_env()
+    await parser.start()
+    try:
+        progress = await BackfillJob(parser, channel, output_dir, chunk_size=chunk_size).run()
+        print(json.dumps(progress))
+    finally:
+        await parser.stop()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
+    arg_parser = argparse.ArgumentParser(description="Export a channel's full history to gzip JSONL chunks")
+    arg_parser.add_argument("channel")
+    arg_parser.add_argument("--output", default="backfill", help="Directory for chunks and the checkpoint")
+    arg_parser.add_argument("--chunk-size", type=int, default=10000, help="Posts per chunk file")
+    args = arg_parser.parse_args()
+    asyncio.run(main(args.channel, args.output, args.chunk_size))
@@ -0,0 +1,212 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from telethon.errors import (
+    ChannelBannedError,
+    ChannelInvalidError,
+    ChannelPrivateError,
+    UsernameInvalidError,
+    UsernameNotOccupiedError
+)
+from telethon.tl.types import InputPeerChannel
+
+
+class UnknownChannel(Exception):
+    """The username does not exist, or belongs to a user or chat rather than a channel"""
+
+
+# Errors that mean the username will not resolve to a readable channel any time soon
+UNAVAILABLE_ERRORS = (
+    UnknownChannel,
+    UsernameNotOccupiedError,
+    UsernameInvalidError,
+    ChannelPrivateError,
+    ChannelInvalidError,
+    ChannelBannedError
+)
+
+# High-water marks of API clients that do not name themselves
+DEFAULT_CONSUMER = "default"
+
+# Errors reading a channel that may only mean its cached access_hash is stale
+STALE_ENTITY_ERRORS = (ChannelInvalidError, ChannelPrivateError)
+
+
+class ChannelUnavailable(Exception):
+    """Raised for a username that recently failed to resolve"""
+
+    def __init__(self, username, error, retry_in):
+        super().__init__(f"{username} is unavailable ({error}), next retry in {retry_in:.0f} seconds")
+        self.username = username
+        self.error = error
+        self.retry_in = retry_in
+
+
+class CachedChannel:
+    """Resolved channel as stored in the cache: enough to address it without get_entity"""
+
+    def __init__(self, channel_id, access_hash, title="", info=None):
+        self.id = channel_id
+        self.access_hash = access_hash
+        self.title = title
+        self.info = info
+
+    @property
+    def input_entity(self):
+        return InputPeerChannel(channel_id=self.id, access_hash=self.access_hash)
+
+
+class ChannelCache:
+    """SQLite-backed cache of resolved channel entities and full-channel info.
+
+    Entries are keyed by ``(account, username)`` because an ``access_hash`` is
+    only valid for the session that resolved it. Entity and info have their
+    own TTLs. Failed lookups are cached too, with an exponential backoff
+    between ``negative_ttl`` and ``max_negative_ttl``. The same database keeps
+    each consumer's per-channel high-water marks for incremental fetching.
+    """
+
+    def __init__(self, path, entity_ttl=7 * 24 * 3600, info_ttl=24 * 3600,
+                 negative_ttl=3600, max_negative_ttl=7 * 24 * 3600):
+        self.path = path
+        self.entity_ttl = entity_ttl
+        self.info_ttl = info_ttl
+        self.negative_ttl = negative_ttl
+        self.max_negative_ttl = max_negative_ttl
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS channels (
+                account TEXT NOT NULL,
+                username TEXT NOT NULL,
+                channel_id INTEGER,
+                access_hash INTEGER,
+                title TEXT,
+                entity_fetched_at REAL,
+                info TEXT,
+                info_fetched_at REAL,
+                error TEXT,
+                error_count INTEGER NOT NULL DEFAULT 0,
+                retry_at REAL,
+                PRIMARY KEY (account, username)
+            )
+        """)
+
+        # Highest post id handed to each consumer per channel, shared by all accounts
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(high_water_marks)")]
+        if columns and "consumer" not in columns:
+            # Marks from before they were kept per consumer become the default consumer's
+            self._conn.execute("ALTER TABLE high_water_marks RENAME TO high_water_marks_shared")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS high_water_marks (
+                consumer TEXT NOT NULL,
+                username TEXT NOT NULL,
+                post_id INTEGER NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (consumer, username)
+            )
+        """)
+        if columns and "consumer" not in columns:
+            self._conn.execute(
+                "INSERT INTO high_water_marks (consumer, username, post_id, updated_at) "
+                "SELECT ?, username, post_id, updated_at FROM high_water_marks_shared",
+                (DEFAULT_CONSUMER,)
+            )
+            self._conn.execute("DROP TABLE high_water_marks_shared")
+
+    def _row(self, account, username):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT channel_id, access_hash, title, entity_fetched_at, info, info_fetched_at, error, retry_at "
+                "FROM channels WHERE account = ? AND username = ?",
+                (account, username.lower())
+            ).fetchone()
+
+    def get(self, username, account="default"):
+        """Return the cached channel, or None when missing or expired.
+
+        Raises ChannelUnavailable while a cached failure is still backing off.
+        ``CachedChannel.info`` is None when only the info part has expired.
+        """
+        row = self._row(account, username)
+        if row is None:
+            return None
+        channel_id, access_hash, title, entity_fetched_at, info, info_fetched_at, error, retry_at = row
+        now = time.time()
+        if error and retry_at and retry_at > now:
+            raise ChannelUnavailable(username, error, retry_at - now)
+        if channel_id is None or entity_fetched_at is None or now - entity_fetched_at > self.entity_ttl:
+            return None
+        if info is not None and (info_fetched_at is None or now - info_fetched_at > self.info_ttl):
+            info = None
+        return CachedChannel(channel_id, access_hash, title, json.loads(info) if info is not None else None)
+
+    def put_entity(self, username, entity, account="default"):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO channels (account, username, channel_id, access_hash, title, entity_fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (account, username) DO UPDATE SET channel_id = excluded.channel_id, "
+                "access_hash = excluded.access_hash, title = excluded.title, "
+                "entity_fetched_at = excluded.entity_fetched_at, error = NULL, error_count = 0, retry_at = NULL",
+                (account, username.lower(), entity.id, entity.access_hash, getattr(entity, "title", ""), time.time())
+            )
+
+    def put_info(self, username, info, account="default"):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE channels SET info = ?, info_fetched_at = ? WHERE account = ? AND username = ?",
+                (json.dumps(info, ensure_ascii=False), time.time(), account, username.lower())
+            )
+
+    def put_error(self, username, error, account="default"):
+        """Record a failed lookup; each consecutive failure doubles the retry delay"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT error_count FROM channels WHERE account = ? AND username = ?",
+                (account, username.lower())
+            ).fetchone()
+            error_count = (row[0] if row else 0) + 1
+            retry_in = min(self.max_negative_ttl, self.negative_ttl * 2 ** (error_count - 1))
+            self._conn.execute(
+                "INSERT INTO channels (account, username, error, error_count, retry_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (account, username) DO UPDATE SET error = excluded.error, "
+                "error_count = excluded.error_count, retry_at = excluded.retry_at, "
+                "channel_id = NULL, access_hash = NULL, entity_fetched_at = NULL",
+                (account, username.lower(), str(error) or type(error).__name__, error_count, time.time() + retry_in)
+            )
+        self.logger.info(f"Caching failure for {username} for {retry_in} seconds: {str(error)}")
+
+    def invalidate(self, username, account="default"):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM channels WHERE account = ? AND username = ?",
+                (account, username.lower())
+            )
+
+    def get_high_water(self, username, consumer=DEFAULT_CONSUMER):
+        """Return the highest post id handed to ``consumer`` for a channel, or 0"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT post_id FROM high_water_marks WHERE consumer = ? AND username = ?",
+                (consumer, username.lower())
+            ).fetchone()
+        return row[0] if row else 0
+
+    def set_high_water(self, username, post_id, consumer=DEFAULT_CONSUMER):
+        """Advance the consumer's high-water mark for a channel; it never moves backwards"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO high_water_marks (consumer, username, post_id, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (consumer, username) DO UPDATE SET post_id = MAX(post_id, excluded.post_id), "
+                "updated_at = excluded.updated_at",
+                (consumer, username.lower(), post_id, time.time())
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,78 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+
+class SingleFlight:
+    """Share one in-flight coroutine between concurrent callers with the same key"""
+
+    def __init__(self):
+        self._inflight = {}
+        self.shared = 0
+
+    async def do(self, key, func):
+        """Run ``func()`` for ``key`` unless a call for it is already running, then await that one"""
+        future = self._inflight.get(key)
+        if future is not None:
+            self.shared += 1
+            # shield: a cancelled follower must not cancel the leader's work
+            return await asyncio.shield(future)
+
+        future = asyncio.ensure_future(func())
+        self._inflight[key] = future
+        try:
+            return await asyncio.shield(future)
+        finally:
+            if future.done():
+                self._inflight.pop(key, None)
+            else:
+                # The leader was cancelled; drop the key once the work finishes
+                future.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+    def __len__(self):
+        return len(self._inflight)
+
+
+class TTLCache:
+    """Size-bounded LRU cache whose entries expire ``ttl`` seconds after being set"""
+
+    def __init__(self, max_size=256, ttl=60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+        self.misses += 1
+        return None
+
+    def set(self, key, value):
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None
+        }
@@ -0,0 +1,213 @@
+"""
+Cross-channel duplicate and repost detection.
+
+Every processed post gets a ``cluster_id`` shared with the posts it
+duplicates. Forwards match their origin exactly through ``fwd_from``.
+Rewritten reposts are matched by a 64-bit SimHash of the normalized text.
+The fingerprints live in SQLite and are split into four 16-bit bands with
+one index each. Two fingerprints within ``max_distance`` <= 3 bits of each
+other share at least one whole band, so a lookup only reads the rows
+sharing a band instead of scanning the whole index. Each band is searched
+on its own, newest rows first, with the distance computed inside SQLite.
+"""
+import hashlib
+import re
+import sqlite3
+import threading
+from telethon import utils
+from telethon.tl.types import PeerChannel
+
+URL_RE = re.compile(r'https?://\S+|www\.\S+')
+WORD_RE = re.compile(r'\w+')
+
+BANDS = 4
+BAND_BITS = 64 // BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+BAND_COLUMNS = [f"band{band}" for band in range(BANDS)]
+MASK = (1 << 64) - 1
+
+# Shorter texts ("Photo", "Read more") collide too easily to be matched by content
+MIN_WORDS = 8
+SHINGLE_SIZE = 3
+
+
+def normalize(text):
+    """Lower-cased words without links, so formatting and tracking URLs do not matter"""
+    return WORD_RE.findall(URL_RE.sub(" ", text.lower()))
+
+
+def _feature_hash(feature):
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def simhash(words):
+    """64-bit SimHash over word shingles"""
+    if len(words) < SHINGLE_SIZE:
+        features = words
+    else:
+        features = [" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)]
+    # A bit is set when most features have it set; counted per column of the
+    # binary strings, which is several times faster than shifting each value
+    values = [format(value, "064b") for value in map(_feature_hash, set(features))]
+    half = len(values) / 2
+    fingerprint = 0
+    for position, column in enumerate(zip(*values)):
+        if column.count("1") > half:
+            fingerprint |= 1 << (63 - position)
+    return fingerprint
+
+
+def fingerprint(text):
+    """SimHash of a post's text, or None when it is too short to be matched by content"""
+    words = normalize(text or "")
+    return simhash(words) if len(words) >= MIN_WORDS else None
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def _signed(value):
+    # SQLite integers are signed 64-bit
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _bands(fingerprint):
+    return [fingerprint >> (band * BAND_BITS) & BAND_MASK for band in range(BANDS)]
+
+
+def origin_key(message, channel_id):
+    """``<peer id>:<post id>`` of the post a message forwards, or of the message itself"""
+    fwd_from = getattr(message, "fwd_from", None)
+    if fwd_from is not None and isinstance(fwd_from.from_id, PeerChannel) and fwd_from.channel_post:
+        return f"{utils.get_peer_id(fwd_from.from_id)}:{fwd_from.channel_post}"
+    return f"{utils.get_peer_id(PeerChannel(channel_id))}:{message.id}"
+
+
+class DedupeIndex:
+    """Assign cluster ids to posts, persisted in SQLite (WAL).
+
+    ``max_candidates`` bounds the rows compared per band; in a band shared
+    by more posts than that (e.g. a templated daily post), only the newest
+    are matched against.
+    """
+
+    def __init__(self, path, max_distance=3, max_candidates=5000):
+        if max_distance >= BANDS:
+            raise ValueError(f"max_distance must be below {BANDS} for banded lookups to find every match")
+        self.path = path
+        self.max_distance = max_distance
+        self.max_candidates = max_candidates
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # Over the stored, signed values
+        self._conn.create_function("hamming", 2, lambda a, b: hamming(a & MASK, b & MASK), deterministic=True)
+        band_definitions = ", ".join(f"{column} INTEGER" for column in BAND_COLUMNS)
+        self._conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS fingerprints (
+                channel_username TEXT NOT NULL COLLATE NOCASE,
+                post_id INTEGER NOT NULL,
+                origin TEXT NOT NULL,
+                simhash INTEGER,
+                {band_definitions},
+                cluster_id TEXT NOT NULL,
+                PRIMARY KEY (channel_username, post_id)
+            );
+            CREATE INDEX IF NOT EXISTS fingerprints_origin ON fingerprints (origin);
+            CREATE INDEX IF NOT EXISTS fingerprints_simhash ON fingerprints (simhash);
+        """)
+        for column in BAND_COLUMNS:
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS fingerprints_{column} ON fingerprints ({column})")
+        # The closest of the band's newest rows; the band index keeps equal values in rowid order
+        self._band_queries = [
+            f"SELECT distance, cluster_id FROM ("
+            f"SELECT hamming(simhash, ?) AS distance, cluster_id, rowid FROM fingerprints WHERE {column} = ? "
+            f"ORDER BY rowid DESC LIMIT {int(max_candidates)}"
+            f") WHERE distance <= ? ORDER BY distance, rowid LIMIT 1"
+            for column in BAND_COLUMNS
+        ]
+        self._insert_query = (
+            f"INSERT INTO fingerprints (channel_username, post_id, origin, simhash, {', '.join(BAND_COLUMNS)}, "
+            f"cluster_id) VALUES (?, ?, ?, ?, {', '.join('?' * BANDS)}, ?)"
+        )
+
+    def _match(self, origin, fingerprint):
+        row = self._conn.execute(
+            "SELECT cluster_id FROM fingerprints WHERE origin = ? LIMIT 1", (origin,)
+        ).fetchone()
+        if row is not None:
+            return row[0]
+        if fingerprint is None:
+            return None
+        row = self._conn.execute(
+            "SELECT cluster_id FROM fingerprints WHERE simhash = ? LIMIT 1", (_signed(fingerprint),)
+        ).fetchone()
+        if row is not None:
+            return row[0]
+        best = None
+        for query, band in zip(self._band_queries, _bands(fingerprint)):
+            row = self._conn.execute(query, (_signed(fingerprint), band, self.max_distance)).fetchone()
+            if row is not None and (best is None or row[0] < best[0]):
+                best = row
+        return best[1] if best else None
+
+    def assign(self, posts, messages, channel_id, fingerprints=None):
+        """Set ``cluster_id`` on each post, matching against everything indexed so far.
+
+        ``fingerprints`` are the posts' ``fingerprint()`` values when already
+        computed (e.g. by the pipeline's fingerprint stage).
+        """
+        if fingerprints is None:
+            fingerprints = [fingerprint(post.text) for post in posts]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for post, message, post_fingerprint in zip(posts, messages, fingerprints):
+                    post.cluster_id = self._assign_one(post, message, channel_id, post_fingerprint)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _assign_one(self, post, message, channel_id, fingerprint):
+        row = self._conn.execute(
+            "SELECT cluster_id FROM fingerprints WHERE channel_username = ? AND post_id = ?",
+            (post.channel_username, post.post_id)
+        ).fetchone()
+        if row is not None:
+            # Already indexed (e.g. fetched again): keep its cluster
+            return row[0]
+        origin = origin_key(message, channel_id)
+        cluster_id = self._match(origin, fingerprint) or f"{post.channel_username.lower()}/{post.post_id}"
+        bands = _bands(fingerprint) if fingerprint is not None else [None] * BANDS
+        self._conn.execute(
+            self._insert_query,
+            (post.channel_username, post.post_id, origin,
+             _signed(fingerprint) if fingerprint is not None else None, *bands, cluster_id)
+        )
+        return cluster_id
+
+    def stats(self):
+        with self._lock:
+            posts, clusters = self._conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT cluster_id) FROM fingerprints"
+            ).fetchone()
+        return {"posts": posts, "clusters": clusters}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def dedupe_posts(posts):
+    """Keep the earliest post of each cluster, in the original order"""
+    first = {}
+    for post in posts:
+        key = post.cluster_id or f"{post.channel_username}/{post.post_id}"
+        kept = first.get(key)
+        if kept is None or post.date < kept.date:
+            first[key] = post
+    keep = {id(post) for post in first.values()}
+    return [post for post in posts if id(post) in keep]
@@ -0,0 +1,87 @@
+"""
+Entity-based extraction of hashtags, mentions, URLs, link domains and cashtags.
+
+Telegram already tells us where these are in ``message.entities``, with
+offsets and lengths counted in UTF-16 code units. Slicing by those offsets
+avoids scanning the text with regular expressions. The precompiled patterns
+below are only a fallback for messages without entities.
+"""
+import re
+from telethon.tl.types import (
+    MessageEntityCashtag,
+    MessageEntityHashtag,
+    MessageEntityMention,
+    MessageEntityTextUrl,
+    MessageEntityUrl
+)
+
+HASHTAG_RE = re.compile(r'#(\w+)')
+MENTION_RE = re.compile(r'(?<![\w@])@(\w{4,32})')
+URL_RE = re.compile(r'https?://\S+')
+CASHTAG_RE = re.compile(r'(?<![\w$])\$([A-Za-z]{1,8})\b')
+
+# Scheme, optional userinfo, then the host; one URL per line
+DOMAIN_RE = re.compile(r'^(?:[a-zA-Z][a-zA-Z0-9+.-]*://)?(?:[^@/?#\s]*@)?([^:/?#\s]+)', re.MULTILINE)
+
+# Characters outside the BMP take two UTF-16 code units, shifting entity offsets
+ASTRAL_RE = re.compile('[\U00010000-\U0010FFFF]')
+
+# Entity type -> (result key, prefix to strip)
+ENTITY_KINDS = {
+    MessageEntityHashtag: ("hashtags", "#"),
+    MessageEntityMention: ("mentions", "@"),
+    MessageEntityUrl: ("urls", ""),
+    MessageEntityCashtag: ("cashtags", "$")
+}
+
+
+def link_domains(urls):
+    """Unique lower-cased hosts without ``www.``, in order; bare hosts like ``vc.ru/x`` are accepted"""
+    if not urls:
+        return []
+    # One regex pass over all URLs instead of a parse per URL
+    hosts = DOMAIN_RE.findall("\n".join(urls).lower())
+    return list(dict.fromkeys(host[4:] if host.startswith("www.") else host for host in hosts))
+
+
+def _from_patterns(text, result):
+    result["hashtags"] = HASHTAG_RE.findall(text)
+    result["mentions"] = MENTION_RE.findall(text)
+    result["urls"] = URL_RE.findall(text)
+    result["cashtags"] = CASHTAG_RE.findall(text)
+
+
+def _from_entities(text, entities, result):
+    encoded = text.encode("utf-16-le") if ASTRAL_RE.search(text) else None
+    for entity in entities:
+        if type(entity) is MessageEntityTextUrl:
+            # Hidden link: the URL is not part of the visible text
+            result["urls"].append(entity.url)
+            continue
+        kind = ENTITY_KINDS.get(type(entity))
+        if kind is None:
+            continue
+        key, prefix = kind
+        if encoded is None:
+            # No astral characters: UTF-16 offsets equal str indices
+            value = text[entity.offset:entity.offset + entity.length]
+        else:
+            value = encoded[entity.offset * 2:(entity.offset + entity.length) * 2].decode("utf-16-le")
+        if prefix and value.startswith(prefix):
+            value = value[1:]
+        result[key].append(value)
+
+
+def extract_entities(message):
+    """Extract hashtags, mentions, urls, link_domains, cashtags and has_link from a message"""
+    text = getattr(message, "message", None) or ""
+    entities = getattr(message, "entities", None)
+    result = {"hashtags": [], "mentions": [], "urls": [], "cashtags": []}
+    if entities:
+        _from_entities(text, entities, result)
+    elif text:
+        _from_patterns(text, result)
+
+    result["link_domains"] = link_domains(result["urls"])
+    result["has_link"] = bool(result["urls"])
+    return result
@@ -0,0 +1,268 @@
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from .serialization import dumps, loads
+
+# Job states; failed jobs are resumed when the same request is submitted again
+QUEUED, RUNNING, COMPLETED, FAILED = "queued", "running", "completed", "failed"
+
+
+def job_key(channels, options):
+    """Identity of a request: the same channels (any order or case) with the same options"""
+    normalized = sorted({c.strip().lstrip('@').lower() for c in channels if c.strip()})
+    payload = json.dumps([normalized, sorted(options.items())], default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class JobStore:
+    """SQLite (WAL) persistence for jobs, their per-channel progress and the posts collected so far"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                key TEXT NOT NULL,
+                status TEXT NOT NULL,
+                options TEXT NOT NULL,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                finished_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_key ON jobs (key, created_at);
+            CREATE TABLE IF NOT EXISTS job_channels (
+                job_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                channel TEXT NOT NULL,
+                done INTEGER NOT NULL DEFAULT 0,
+                post_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (job_id, position)
+            );
+            CREATE TABLE IF NOT EXISTS job_posts (
+                job_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (job_id, seq)
+            );
+        """)
+
+    def create(self, key, channels, options):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute(
+                "INSERT INTO jobs (id, key, status, options, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, key, QUEUED, json.dumps(options), now, now)
+            )
+            self._conn.executemany(
+                "INSERT INTO job_channels (job_id, position, channel) VALUES (?, ?, ?)",
+                [(job_id, position, channel) for position, channel in enumerate(channels)]
+            )
+            self._conn.execute("COMMIT")
+        return job_id
+
+    def latest(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, status, finished_at FROM jobs WHERE key = ? ORDER BY created_at DESC LIMIT 1",
+                (key,)
+            ).fetchone()
+        return row
+
+    def set_status(self, job_id, status, error=None):
+        now = time.time()
+        finished_at = now if status in (COMPLETED, FAILED) else None
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ?, finished_at = ? WHERE id = ?",
+                (status, error, now, finished_at, job_id)
+            )
+
+    def unfinished(self):
+        """Ids of jobs that were queued or running when the process stopped"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?) ORDER BY created_at", (QUEUED, RUNNING)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def options(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT options FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def pending_channels(self, job_id):
+        """``(position, channel)`` for channels without saved results"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT position, channel FROM job_channels WHERE job_id = ? AND done = 0 ORDER BY position",
+                (job_id,)
+            ).fetchall()
+
+    def save_channel(self, job_id, position, posts):
+        """Append a finished channel's posts and mark it done in one transaction"""
+        rows = [dumps(post).decode("utf-8") for post in posts]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            (next_seq,) = self._conn.execute(
+                "SELECT COALESCE(MAX(seq) + 1, 0) FROM job_posts WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            self._conn.executemany(
+                "INSERT INTO job_posts (job_id, seq, data) VALUES (?, ?, ?)",
+                [(job_id, next_seq + i, data) for i, data in enumerate(rows)]
+            )
+            self._conn.execute(
+                "UPDATE job_channels SET done = 1, post_count = ? WHERE job_id = ? AND position = ?",
+                (len(rows), job_id, position)
+            )
+            self._conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time(), job_id))
+            self._conn.execute("COMMIT")
+
+    def get(self, job_id, offset=0, limit=100):
+        """Job status, per-channel progress and one page of posts, or None for an unknown id"""
+        with self._lock:
+            job = self._conn.execute(
+                "SELECT id, status, options, error, created_at, updated_at, finished_at FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+            if job is None:
+                return None
+            channels = self._conn.execute(
+                "SELECT channel, done, post_count FROM job_channels WHERE job_id = ? ORDER BY position",
+                (job_id,)
+            ).fetchall()
+            rows = self._conn.execute(
+                "SELECT data FROM job_posts WHERE job_id = ? AND seq >= ? ORDER BY seq LIMIT ?",
+                (job_id, offset, limit)
+            ).fetchall()
+        total_posts = sum(count for _, _, count in channels)
+        next_offset = offset + len(rows)
+        return {
+            "job_id": job[0],
+            "status": job[1],
+            "options": json.loads(job[2]),
+            "error": job[3],
+            "created_at": job[4],
+            "updated_at": job[5],
+            "finished_at": job[6],
+            "progress": {
+                "channels_total": len(channels),
+                "channels_done": sum(1 for _, done, _ in channels if done),
+                "posts": total_posts
+            },
+            "channels": [{"channel": c, "done": bool(done), "posts": count} for c, done, count in channels],
+            "posts": [loads(row[0]) for row in rows],
+            "offset": offset,
+            "next_offset": next_offset if next_offset < total_posts else None
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class JobManager:
+    """Run large multi-channel fetches in the background, persisting results per channel.
+
+    ``submit`` returns at once with a job id. A fixed pool of workers takes
+    jobs from a queue and fetches their channels through the parser; each
+    channel's posts are saved as soon as it finishes, so results can be
+    paged through while the job is still running. Submitting the same
+    channels and options again attaches to the running job (or one that
+    finished within ``dedupe_window`` seconds), and a failed job resumes
+    from the channels it had not finished. A channel that could not be
+    fetched (e.g. every account rate limited) stays unfinished and fails
+    the job once the other channels are done. Unfinished jobs are picked
+    up again on start.
+    """
+
+    def __init__(self, parser, path, workers=2, dedupe_window=300):
+        self.parser = parser
+        self.store = JobStore(path)
+        self.workers = workers
+        self.dedupe_window = dedupe_window
+        self.logger = logging.getLogger(__name__)
+        self._queue = asyncio.Queue()
+        self._tasks = []
+
+    async def start(self):
+        for job_id in self.store.unfinished():
+            self.store.set_status(job_id, QUEUED)
+            self._queue.put_nowait(job_id)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, channels, **options):
+        """Queue a fetch of ``channels``; returns ``(job_id, attached)``"""
+        key = job_key(channels, options)
+        latest = self.store.latest(key)
+        if latest is not None:
+            job_id, status, finished_at = latest
+            if status in (QUEUED, RUNNING):
+                return job_id, True
+            if status == COMPLETED and time.time() - finished_at <= self.dedupe_window:
+                return job_id, True
+            if status == FAILED:
+                self.logger.info(f"Resuming failed job {job_id}")
+                self.store.set_status(job_id, QUEUED)
+                self._queue.put_nowait(job_id)
+                return job_id, True
+        job_id = self.store.create(key, channels, options)
+        self._queue.put_nowait(job_id)
+        return job_id, False
+
+    def get(self, job_id, offset=0, limit=100):
+        return self.store.get(job_id, offset, limit)
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"Job {job_id} failed: {str(e)}")
+                self.store.set_status(job_id, FAILED, str(e))
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id):
+        options = self.store.options(job_id)
+        pending = self.store.pending_channels(job_id)
+        self.store.set_status(job_id, RUNNING)
+        self.logger.info(f"Job {job_id}: fetching {len(pending)} channels")
+        positions = [position for position, _ in pending]
+        channels = [channel for _, channel in pending]
+        errors = []
+        async for index, posts, error in self.parser.iter_channel_results(channels, **options):
+            if error is not None:
+                # Left unfinished, so resubmitting the job fetches it again
+                errors.append(f"{channels[index]}: {str(error)}")
+                continue
+            self.store.save_channel(job_id, positions[index], posts)
+        if errors:
+            self.store.set_status(job_id, FAILED, "; ".join(errors))
+            self.logger.warning(f"Job {job_id} failed for {len(errors)} of {len(channels)} channels")
+            return
+        self.store.set_status(job_id, COMPLETED)
+        self.logger.info(f"Job {job_id} completed")
+
+    def status(self):
+        return {"workers": len(self._tasks), "queued": self._queue.qsize()}
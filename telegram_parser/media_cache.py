@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from telethon.tl.types import MessageMediaDocument, MessageMediaPhoto, PhotoSize, PhotoSizeProgressive
+
+# Longest side of the photo size picked as a thumbnail
+THUMB_MAX_SIDE = 320
+
+
+def _thumb_size(photo):
+    """The largest stored photo size that still fits in THUMB_MAX_SIDE, else the smallest one"""
+    sizes = [s for s in photo.sizes if isinstance(s, (PhotoSize, PhotoSizeProgressive))]
+    if not sizes:
+        return None
+    fitting = [s for s in sizes if max(s.w, s.h) <= THUMB_MAX_SIDE]
+    if fitting:
+        return max(fitting, key=lambda s: s.w * s.h)
+    return min(sizes, key=lambda s: s.w * s.h)
+
+
+class MediaCache:
+    """Download thumbnails (or whole files) in the background into a size-capped on-disk cache.
+
+    Files are named after the media's ``cache_key`` (``photo-<id>`` or
+    ``document-<id>``), so a photo reposted in several messages or channels
+    is fetched once. ``schedule`` only queues work: a fixed pool of workers
+    does the downloads while the page is processed and returned. Once the
+    cache grows past ``max_bytes`` the least recently used files are
+    deleted.
+    """
+
+    def __init__(self, path, max_bytes=512 * 1024 * 1024, workers=2, mode="thumbs", max_file_bytes=20 * 1024 * 1024):
+        if mode not in ("thumbs", "files"):
+            raise ValueError("mode must be 'thumbs' or 'files'")
+        self.path = path
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self.mode = mode
+        self.max_file_bytes = max_file_bytes
+        self.logger = logging.getLogger(__name__)
+        os.makedirs(path, exist_ok=True)
+
+        # cache_key -> (file name, size), least recently used first
+        self._entries = OrderedDict()
+        self.total_bytes = 0
+        self._pending = set()
+        self._queue = asyncio.Queue()
+        self._tasks = []
+        self.downloads = 0
+        self.hits = 0
+        self.failures = 0
+        self._load()
+
+    def _load(self):
+        files = []
+        for name in os.listdir(self.path):
+            if name.endswith(".part"):
+                os.remove(os.path.join(self.path, name))
+                continue
+            stat = os.stat(os.path.join(self.path, name))
+            files.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._entries[os.path.splitext(name)[0]] = (name, size)
+            self.total_bytes += size
+
+    def _touch(self, key):
+        name, _ = self._entries[key]
+        self._entries.move_to_end(key)
+        try:
+            # mtime keeps the LRU order across restarts
+            os.utime(os.path.join(self.path, name))
+        except OSError:
+            pass
+
+    def get(self, key):
+        """Absolute path of a cached file, or None"""
+        if key not in self._entries:
+            return None
+        self._touch(key)
+        return os.path.join(self.path, self._entries[key][0])
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, (name, size) = self._entries.popitem(last=False)
+            try:
+                os.remove(os.path.join(self.path, name))
+            except OSError:
+                pass
+            self.total_bytes -= size
+
+    def _start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def schedule(self, client, message, media):
+        """Queue downloads for a message's media items; cached and in-flight keys are skipped"""
+        for item in media:
+            key = item.cache_key
+            if key is None:
+                continue
+            if key in self._entries:
+                self.hits += 1
+                self._touch(key)
+                continue
+            if key in self._pending:
+                continue
+            if self.mode == "files" and item.size and item.size > self.max_file_bytes:
+                continue
+            self._pending.add(key)
+            self._queue.put_nowait((client, message, key))
+        if self._pending:
+            self._start()
+
+    def _thumb(self, message):
+        media = message.media
+        if type(media) is MessageMediaPhoto:
+            return _thumb_size(media.photo)
+        if type(media) is MessageMediaDocument and media.document.thumbs:
+            return -1
+        return None
+
+    async def _download(self, client, message, key):
+        if self.mode == "thumbs":
+            thumb = self._thumb(message)
+            if thumb is None:
+                return
+            data = await client.download_media(message, file=bytes, thumb=thumb)
+        else:
+            data = await client.download_media(message, file=bytes)
+        if not data:
+            return
+        extension = ".jpg" if self.mode == "thumbs" else os.path.splitext(message.file.name or "")[1] or message.file.ext
+        name = key + (extension or "")
+        tmp_path = os.path.join(self.path, name + ".part")
+        await asyncio.to_thread(self._write, tmp_path, os.path.join(self.path, name), data)
+        self._entries[key] = (name, len(data))
+        self.total_bytes += len(data)
+        self.downloads += 1
+        self._evict()
+
+    @staticmethod
+    def _write(tmp_path, path, data):
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    async def _worker(self):
+        while True:
+            client, message, key = await self._queue.get()
+            try:
+                await self._download(client, message, key)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                self.logger.warning(f"Could not download {key}: {str(e)}")
+            finally:
+                self._pending.discard(key)
+                self._queue.task_done()
+
+    def status(self):
+        return {
+            "mode": self.mode,
+            "files": len(self._entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "queued": self._queue.qsize(),
+            "downloads": self.downloads,
+            "hits": self.hits,
+            "failures": self.failures
+        }
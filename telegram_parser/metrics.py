@@ -0,0 +1,182 @@
+"""
+In-process metrics rendered in the Prometheus text exposition format.
+
+Counters and histograms are updated where the work happens (every RPC
+goes through ``RpcClient._call``, every channel through the parser), and
+gauges describing the rate limiters are refreshed from the session pool
+when the metrics are scraped.
+"""
+import bisect
+import time
+from contextlib import contextmanager
+
+# Seconds; covers cache hits through multi-minute FloodWait-delayed fetches
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def clear(self):
+        self._values.clear()
+
+    def _samples(self):
+        for key, value in sorted(self._values.items()):
+            yield self.name, key, None, value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for name, key, extra, value in self._samples():
+            lines.append(f"{name}{_format_labels(self.label_names, key, extra)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value, **labels):
+        self._values[self._key(labels)] = value
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        entry = self._values.get(key)
+        if entry is None:
+            # Per-bucket (non-cumulative) counts, then sum and count
+            entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self):
+        for key, (counts, total, count) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", key, f'le="{_format_value(float(bound))}"', cumulative
+            yield f"{self.name}_sum", key, None, total
+            yield f"{self.name}_count", key, None, count
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name, documentation, labels=()):
+        return self.register(Gauge(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def render(self):
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+REGISTRY = Registry()
+
+RPC_REQUESTS = REGISTRY.counter(
+    "telegram_parser_rpc_requests_total", "RPCs sent to Telegram by outcome", ("kind", "account", "outcome"))
+RPC_LATENCY = REGISTRY.histogram(
+    "telegram_parser_rpc_latency_seconds", "Duration of RPCs sent to Telegram, excluding rate limiting", ("kind",))
+FLOOD_WAITS = REGISTRY.counter(
+    "telegram_parser_flood_waits_total", "FloodWaitError responses", ("kind", "account"))
+FLOOD_WAIT_SECONDS = REGISTRY.counter(
+    "telegram_parser_flood_wait_seconds_total", "Seconds of FloodWait Telegram asked for", ("kind", "account"))
+CHANNEL_FETCH_LATENCY = REGISTRY.histogram(
+    "telegram_parser_channel_fetch_seconds", "Time to produce one channel's posts", ("source",))
+PIPELINE_STAGE_LATENCY = REGISTRY.histogram(
+    "telegram_parser_pipeline_stage_seconds", "Time a pipeline stage takes for one page of messages", ("stage",))
+POSTS_PROCESSED = REGISTRY.counter(
+    "telegram_parser_posts_processed_total", "Messages turned into posts")
+SCHEDULER_POLLS = REGISTRY.counter(
+    "telegram_parser_scheduler_polls_total", "Scheduled channel polls by outcome", ("outcome",))
+SCHEDULER_POLL_RATE = REGISTRY.gauge(
+    "telegram_parser_scheduler_polls_per_minute", "Polls per minute planned by the scheduler")
+LIMITER_RATE = REGISTRY.gauge(
+    "telegram_parser_rate_limiter_rate_per_minute", "Current token bucket rate", ("kind", "account"))
+LIMITER_WAITING = REGISTRY.gauge(
+    "telegram_parser_rate_limiter_waiting", "Requests queued for a token", ("kind", "account"))
+LIMITER_THROTTLED = REGISTRY.gauge(
+    "telegram_parser_rate_limiter_throttled_seconds",
+    "Seconds requests have spent waiting for a token or a FloodWait", ("kind", "account"))
+LIMITER_BLOCKED = REGISTRY.gauge(
+    "telegram_parser_rate_limiter_blocked_seconds", "Remaining FloodWait block", ("kind", "account"))
+
+
+def observe_session_pool(session_pool):
+    """Refresh the rate limiter gauges from every account's buckets"""
+    for account in session_pool.accounts:
+        for kind, bucket in account.rate_limiter.buckets.items():
+            labels = {"kind": kind, "account": account.name}
+            LIMITER_RATE.set(round(bucket.rate, 3), **labels)
+            LIMITER_WAITING.set(bucket.waiting, **labels)
+            LIMITER_THROTTLED.set(round(bucket.throttled_seconds, 3), **labels)
+            LIMITER_BLOCKED.set(round(bucket.blocked_for(), 3), **labels)
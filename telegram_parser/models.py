@@ -0,0 +1,140 @@
+from datetime import datetime
+
+
+class Reaction:
+    __slots__ = ("emoji", "count")
+
+    def __init__(self, emoji, count):
+        self.emoji = emoji
+        self.count = count
+
+    def to_dict(self):
+        return {"emoji": self.emoji, "count": self.count}
+
+
+class Engagement:
+    __slots__ = ("views", "forwards", "reactions")
+
+    def __init__(self, views=0, forwards=0, reactions=None):
+        self.views = views
+        self.forwards = forwards
+        self.reactions = reactions if reactions is not None else []
+
+    @property
+    def reaction_count(self):
+        return sum(reaction.count for reaction in self.reactions)
+
+    def to_dict(self):
+        return {
+            "views": self.views,
+            "forwards": self.forwards,
+            "reactions": [reaction.to_dict() for reaction in self.reactions]
+        }
+
+
+class Media:
+    """One media attachment, described from the message alone (no download needed)"""
+
+    __slots__ = (
+        "type", "id", "file_id", "mime_type", "size", "width", "height", "duration", "file_name",
+        "grouped_id", "url", "cache_key"
+    )
+
+    def __init__(self, type, id=None, file_id=None, mime_type=None, size=None, width=None, height=None,
+                 duration=None, file_name=None, grouped_id=None, url=None, cache_key=None):
+        self.type = type
+        self.id = id
+        self.file_id = file_id
+        self.mime_type = mime_type
+        self.size = size
+        self.width = width
+        self.height = height
+        self.duration = duration
+        self.file_name = file_name
+        self.grouped_id = grouped_id
+        self.url = url
+        self.cache_key = cache_key
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{name: data.get(name) for name in cls.__slots__})
+
+
+class Post:
+    """One processed channel post.
+
+    Slots instead of nested dicts keep large result sets small; ``to_dict``
+    produces the JSON wire format the API has always returned.
+    """
+
+    __slots__ = (
+        "channel_username", "channel_title", "post_id", "date", "text", "media", "engagement",
+        "has_link", "link_domains", "hashtags", "mentions", "urls", "cashtags", "cluster_id"
+    )
+
+    def __init__(self, channel_username, channel_title, post_id, date, text, media, engagement,
+                 has_link=False, link_domains=(), hashtags=(), mentions=(), urls=(), cashtags=(),
+                 cluster_id=None):
+        self.channel_username = channel_username
+        self.channel_title = channel_title
+        self.post_id = post_id
+        self.date = date  # timezone-aware datetime
+        self.text = text
+        self.media = media
+        self.engagement = engagement
+        self.has_link = has_link
+        self.link_domains = link_domains
+        self.hashtags = hashtags
+        self.mentions = mentions
+        self.urls = urls
+        self.cashtags = cashtags
+        self.cluster_id = cluster_id  # shared by duplicates and reposts, see dedupe.DedupeIndex
+
+    def to_dict(self):
+        return {
+            "channel_username": self.channel_username,
+            "channel_title": self.channel_title,
+            "post_id": self.post_id,
+            "date": self.date.isoformat(),
+            "text": self.text,
+            "media": [media.to_dict() for media in self.media],
+            "engagement": self.engagement.to_dict(),
+            "has_link": self.has_link,
+            "link_domains": self.link_domains,
+            "hashtags": self.hashtags,
+            "mentions": self.mentions,
+            "urls": self.urls,
+            "cashtags": self.cashtags,
+            "cluster_id": self.cluster_id
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a post from its wire format (e.g. as kept in the post store)"""
+        engagement = data["engagement"]
+        return cls(
+            data["channel_username"],
+            data["channel_title"],
+            data["post_id"],
+            datetime.fromisoformat(data["date"]),
+            data["text"],
+            [Media.from_dict(media) for media in data["media"]],
+            Engagement(
+                engagement["views"],
+                engagement["forwards"],
+                [Reaction(r["emoji"], r["count"]) for r in engagement["reactions"]]
+            ),
+            data.get("has_link", False),
+            data.get("link_domains", []),
+            data.get("hashtags", []),
+            data.get("mentions", []),
+            data.get("urls", []),
+            data.get("cashtags", []),
+            data.get("cluster_id")
+        )
+
+    def __repr__(self):
+        return f"<Post {self.channel_username}/{self.post_id}>"
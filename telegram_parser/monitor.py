@@ -0,0 +1,147 @@
+import asyncio
+import inspect
+import logging
+from telethon import events, utils
+from telethon.tl.types import PeerChannel
+
+
+class ChannelMonitor:
+    """Push-based ingestion: process new and edited channel posts as Telegram sends them.
+
+    Updates go through the same processors as ``TelegramParser.get_posts`` and
+    are written to the parser's post store, or handed to ``sink`` (a sync or
+    async callable taking a list of posts) when one is given. On start and
+    after every reconnect a reconciliation pass fetches anything newer than
+    each channel's high-water mark (kept under ``consumer``), so posts
+    published while the connection was down are not lost.
+
+    Telegram only pushes updates for channels the account has joined.
+    """
+
+    def __init__(self, parser, channels, sink=None, account=None, reconcile_limit=100, consumer="monitor"):
+        self.parser = parser
+        self.channels = [c.strip().lstrip('@') for c in channels]
+        self.sink = sink
+        self.consumer = consumer
+        self.account = account or parser.session_pool.primary
+        self.reconcile_limit = reconcile_limit
+        self.logger = logging.getLogger(__name__)
+
+        self._rpc = None
+        self._entities = {}
+        self._usernames = {}
+        self._handlers = []
+        self._reconcile_lock = asyncio.Lock()
+        self.posts_received = 0
+
+    async def start(self):
+        """Resolve channels, subscribe to their updates and close any gap since the last run"""
+        self._rpc = await self.account.rpc()
+        for channel in self.channels:
+            try:
+                _, entity = await self.parser.resolve_channel(channel, self.account)
+            except Exception as e:
+                self.logger.error(f"Cannot monitor {channel}: {str(e)}")
+                continue
+            self._entities[channel] = entity
+            self._usernames[utils.get_peer_id(PeerChannel(entity.id))] = channel
+
+        chats = [entity.input_entity for entity in self._entities.values()]
+        if not chats:
+            self.logger.warning("No channels to monitor")
+            return
+        for event in (events.NewMessage(chats=chats), events.MessageEdited(chats=chats)):
+            self._rpc.client.add_event_handler(self._on_message, event)
+            self._handlers.append(event)
+        self.account.client_manager.add_reconnect_callback(self.reconcile)
+        self.logger.info(f"Monitoring {len(chats)} channels for new posts")
+
+        await self.reconcile()
+
+    async def stop(self):
+        self.account.client_manager.remove_reconnect_callback(self.reconcile)
+        for event in self._handlers:
+            self._rpc.client.remove_event_handler(self._on_message, event)
+        self._handlers = []
+
+    async def _emit(self, posts, stored=False):
+        if not posts:
+            return
+        if self.sink is None:
+            if not stored:
+                self.parser.post_store.upsert_posts(posts)
+            return
+        result = self.sink(posts)
+        if inspect.isawaitable(result):
+            await result
+
+    async def _on_message(self, event):
+        channel = self._usernames.get(event.chat_id)
+        if channel is None:
+            return
+        try:
+            posts = await self.parser.process_messages(self._rpc, channel, self._entities[channel], [event.message])
+            self.posts_received += len(posts)
+            await self._emit(posts)
+            self.parser.channel_cache.set_high_water(channel, event.message.id, self.consumer)
+        except Exception as e:
+            self.logger.error(f"Error processing update from {channel}: {str(e)}")
+
+    async def reconcile(self):
+        """Fetch posts newer than each channel's high-water mark"""
+        async with self._reconcile_lock:
+            for channel in self._entities:
+                try:
+                    await self._reconcile_channel(channel)
+                except Exception as e:
+                    self.logger.error(f"Reconciliation failed for {channel}: {str(e)}")
+
+    async def _reconcile_channel(self, channel):
+        min_id = self.parser.channel_cache.get_high_water(channel, self.consumer)
+        total = 0
+        while True:
+            # fetch_channel writes the post store and fails over to another account while this one is rate limited
+            posts = await self.parser.fetch_channel(channel, self.reconcile_limit, min_id=min_id or None)
+            total += len(posts)
+            await self._emit(posts, stored=True)
+            if posts:
+                self.parser.channel_cache.set_high_water(channel, max(post.post_id for post in posts), self.consumer)
+            # A first run only takes the latest page; afterwards page forward until caught up
+            if not min_id or len(posts) < self.reconcile_limit:
+                break
+            min_id = max(post.post_id for post in posts)
+        if total:
+            self.logger.info(f"Reconciled {total} posts for {channel}")
+
+    def status(self):
+        return {
+            "channels": list(self._entities),
+            "posts_received": self.posts_received,
+            "account": self.account.name
+        }
+
+
+async def main(channels):
+    from dotenv import load_dotenv
+    from .parser import create_parser_from_env
+
+    load_dotenv()
+    parser = create_parser_from_env()
+    await parser.start()
+    monitor = ChannelMonitor(parser, channels)
+    try:
+        await monitor.start()
+        # The client manager's health probe reconnects; the monitor reconciles after each reconnect
+        await asyncio.Event().wait()
+    finally:
+        await monitor.stop()
+        await parser.stop()
+
+
+if __name__ == '__main__':
+    import sys
+
+    logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
+    if len(sys.argv) < 2:
+        sys.exit("Usage: python -m telegram_parser.monitor channel [channel ...]")
+    asyncio.run(main(sys.argv[1:]))
@@ -0,0 +1,81 @@
+import random
+
+
+class PacingPolicy:
+    """Decide how long to pause before an RPC of a given class.
+
+    The rate limiter asks for the delay before waiting for a token and,
+    once the token is granted, only sleeps for whatever part of it the
+    token wait has not already covered, so pacing never stacks on top of
+    throttling. Local processing is never paced.
+    """
+
+    name = "none"
+
+    def delay(self, kind):
+        return 0
+
+    def status(self):
+        return {"policy": self.name}
+
+
+class NoPacing(PacingPolicy):
+    """Only the token buckets decide when RPCs go out"""
+
+
+class JitterPacing(PacingPolicy):
+    """A uniform random pause before every RPC"""
+
+    name = "jitter"
+
+    def __init__(self, min_delay=0.1, max_delay=0.5):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+
+    def delay(self, kind):
+        return random.uniform(self.min_delay, self.max_delay)
+
+    def status(self):
+        return {"policy": self.name, "min_delay": self.min_delay, "max_delay": self.max_delay}
+
+
+class HumanPacing(JitterPacing):
+    """Longer pauses before the calls a person opening a channel would trigger first"""
+
+    name = "human"
+
+    # RPC class -> (min, max) seconds; everything else uses the base range
+    DEFAULT_DELAYS = {
+        "get_entity": (2, 5),
+        "get_full_channel": (1, 2)
+    }
+
+    def __init__(self, min_delay=0.3, max_delay=0.7, delays=None):
+        super().__init__(min_delay, max_delay)
+        self.delays = {**self.DEFAULT_DELAYS, **(delays or {})}
+
+    def delay(self, kind):
+        low, high = self.delays.get(kind, (self.min_delay, self.max_delay))
+        return random.uniform(low, high)
+
+    def status(self):
+        return {**super().status(), "delays": self.delays}
+
+
+PACING_POLICIES = {
+    "none": NoPacing,
+    "jitter": JitterPacing,
+    "human": HumanPacing
+}
+
+
+def make_pacing(policy):
+    """Return a PacingPolicy from a policy object or one of the names in PACING_POLICIES"""
+    if isinstance(policy, PacingPolicy):
+        return policy
+    if policy is None:
+        return NoPacing()
+    try:
+        return PACING_POLICIES[policy.strip().lower()]()
+    except KeyError:
+        raise ValueError(f"Unknown pacing policy {policy!r}, expected one of {', '.join(PACING_POLICIES)}")
@@ -1,19 +1,35 @@
+import os
 import logging
-import time
-import random
 import asyncio
-from datetime import datetime, timedelta
-from telethon import TelegramClient
-from telethon.sessions import StringSession
+import time
+from datetime import datetime, timedelta, timezone
 from telethon.tl.functions.channels import GetFullChannelRequest
 from telethon.errors import FloodWaitError
-from .processors.text_processor import TextProcessor
-from .processors.media_processor import MediaProcessor
-from .processors.engagement_processor import EngagementProcessor
-from .processors.metadata_processor import MetadataProcessor
+from telethon.tl.types import Channel
+from .processors import EngagementProcessor
+from .pipeline import BatchContext, Pipeline, parse_stages
+from .session_manager import ClientManager, AuthorizationError
+from .rate_limiter import AdaptiveRateLimiter, RateLimitExceeded
+from .session_pool import Account, SessionPool, account_name
+from .cache import (
+    ChannelCache,
+    CachedChannel,
+    ChannelUnavailable,
+    UnknownChannel,
+    DEFAULT_CONSUMER,
+    STALE_ENTITY_ERRORS,
+    UNAVAILABLE_ERRORS
+)
+from .store import PostStore
+from .coalescing import SingleFlight, TTLCache
+from .dedupe import DedupeIndex
+from .models import Engagement, Post
+from . import metrics
 
 class TelegramParser:
-    def __init__(self, api_id, api_hash, phone, session_string=None, session_file='parser_session'):
+    def __init__(self, api_id, api_hash, phone, session_string=None, session_file='parser_session',
+                 max_concurrent_channels=3, cache_path=None, store_path=None, session_strings=None,
+                 pacing="human", dedupe_path=None, stages=None, process_workers=None):
         self.api_id = api_id
         self.api_hash = api_hash
         self.phone = phone
@@ -21,180 +37,411 @@ class TelegramParser:
         self.session_file = session_file
         self.logger = logging.getLogger(__name__)
         
-        # Initialize processors
-        self.text_processor = TextProcessor()
-        self.media_processor = MediaProcessor()
-        self.engagement_processor = EngagementProcessor()
-        self.metadata_processor = MetadataProcessor()
-        
-        # Rate limiting properties
-        self.request_count = 0
-        self.last_request_time = 0
-        self.max_requests_per_minute = 20  # Conservative limit
-
-    async def _rate_limit(self):
-        """Implement rate limiting to avoid blocks"""
-        current_time = time.time()
-        time_passed = current_time - self.last_request_time
-        
-        # If we've made too many requests in the past minute, sleep
-        if self.request_count >= self.max_requests_per_minute and time_passed < 60:
-            sleep_time = 60 - time_passed + random.uniform(1, 5)  # Add jitter
-            self.logger.info(f"Rate limiting: sleeping for {sleep_time:.2f} seconds")
-            await asyncio.sleep(sleep_time)
-            self.request_count = 0
-            self.last_request_time = time.time()
-        
-        # If more than a minute has passed, reset counter
-        elif time_passed >= 60:
-            self.request_count = 0
-            self.last_request_time = current_time
-        
-        # Increment request counter
-        self.request_count += 1
-
-    async def get_posts(self, channel_list, limit=10, days_back=None):
-        """Get posts from specified channels with rate limiting and anti-block measures"""
-        # Initialize client with string session if available, otherwise use file session
-        if self.session_string:
-            client = TelegramClient(StringSession(self.session_string), self.api_id, self.api_hash)
-            self.logger.info("Using StringSession for authentication")
+        # One long-lived client and rate limiter per account, shared by all requests.
+        # Pauses are charged per RPC by the pacing policy ("none", "jitter" or "human")
+        if session_strings:
+            accounts = [
+                Account(
+                    account_name(s),
+                    ClientManager(api_id=api_id, api_hash=api_hash, session_string=s),
+                    AdaptiveRateLimiter(pacing=pacing)
+                )
+                for s in session_strings
+            ]
         else:
-            client = TelegramClient(self.session_file, self.api_id, self.api_hash)
-            self.logger.info("Using file-based session for authentication")
+            accounts = [Account("default", ClientManager(
+                api_id=api_id,
+                api_hash=api_hash,
+                phone=phone,
+                session_string=session_string,
+                session_file=session_file
+            ), AdaptiveRateLimiter(pacing=pacing))]
+        self.session_pool = SessionPool(accounts)
+        
+        # Processor stages turning each page of messages into post fields (see pipeline.DEFAULT_STAGES)
+        self.pipeline = Pipeline(stages, process_workers)
+        # Also used directly to refresh reactions, even when no stage collects them
+        self.engagement_processor = self.pipeline.processor("engagement") or EngagementProcessor()
+        
+        # How many channels a single get_posts call fetches at once
+        self.max_concurrent_channels = max_concurrent_channels
+        
+        # Resolved entities and channel info, kept on disk next to the session
+        self.channel_cache = ChannelCache(cache_path or f"{session_file}.cache.sqlite")
+        
+        # Every processed post is kept locally so fresh data can be served without Telegram
+        self.post_store = PostStore(store_path or f"{session_file}.posts.sqlite")
+        
+        # Identical concurrent channel fetches share one run; results are kept briefly
+        self.single_flight = SingleFlight()
+        self.response_cache = TTLCache(max_size=256, ttl=60)
+        
+        # Near-duplicate and repost index; every processed post gets a cluster_id
+        self.dedupe_index = DedupeIndex(dedupe_path or f"{session_file}.dedupe.sqlite")
+        
+        # Optional EngagementTracker; when set, every processed post is handed to it
+        self.engagement_tracker = None
+        
+        # Optional MediaCache; when set, media is downloaded in the background
+        self.media_cache = None
+
+    @property
+    def client_manager(self):
+        return self.session_pool.primary.client_manager
+
+    @property
+    def rate_limiter(self):
+        return self.session_pool.primary.rate_limiter
+
+    @property
+    def max_requests_per_minute(self):
+        return self.rate_limiter.bucket("get_messages").rate
+
+    @max_requests_per_minute.setter
+    def max_requests_per_minute(self, value):
+        # Starting rate only; each bucket adapts from here on FloodWait feedback
+        self.session_pool.set_rate(value)
+
+    async def start(self):
+        """Connect every account's client, start their health probes and the pipeline's workers"""
+        await self.session_pool.start()
+        await self.pipeline.start()
+
+    async def stop(self):
+        """Disconnect every account's client"""
+        if self.media_cache is not None:
+            await self.media_cache.stop()
+        self.pipeline.shutdown()
+        await self.session_pool.stop()
+
+    def _build_post(self, channel, channel_entity, msg, fields):
+        """Assemble a post from the pipeline's fields; fields of disabled stages get neutral values"""
+        engagement = fields.get("engagement")
+        if engagement is None:
+            engagement = Engagement(getattr(msg, "views", 0), getattr(msg, "forwards", 0))
+        return Post(
+            channel,
+            getattr(channel_entity, "title", ""),
+            msg.id,
+            msg.date,
+            fields.get("text", getattr(msg, "message", "")),
+            fields.get("media", []),
+            engagement,
+            **fields.get("metadata", {})
+        )
+
+    async def process_messages(self, client, channel, channel_entity, messages, side_effects=True):
+        """Turn messages of one channel (e.g. pushed as updates) into posts, tagged with duplicate clusters
+
+        With ``side_effects`` the posts' media is queued for the media cache
+        and their engagement tracked; history exports turn that off.
+        """
+        results = await self.pipeline.run(messages, BatchContext(client, channel, channel_entity))
+        posts = [self._build_post(channel, channel_entity, msg, fields) for msg, fields in zip(messages, results)]
+        metrics.POSTS_PROCESSED.inc(len(posts))
+        
+        # Matches on the processed text and fwd_from; without a fingerprint stage the index hashes itself
+        fingerprints = None
+        if self.pipeline.processor("fingerprint") is not None:
+            fingerprints = [fields["fingerprint"] for fields in results]
+        await asyncio.to_thread(self.dedupe_index.assign, posts, messages, channel_entity.id, fingerprints)
+        
+        if not side_effects:
+            return posts
+        if self.media_cache is not None:
+            # Queued only; downloads never hold up the page
+            for msg, post in zip(messages, posts):
+                if post.media:
+                    self.media_cache.schedule(client, msg, post.media)
+
+        if self.engagement_tracker is not None:
+            self.engagement_tracker.track(posts)
+        return posts
+
+    async def _resolve_channel(self, client, channel):
+        """Return the channel's entity and info, spending RPCs only on cache misses"""
+        # Raises ChannelUnavailable while a recent failure is backing off
+        cached = self.channel_cache.get(channel, client.account)
         
         try:
-            # Connect to client
-            await client.connect()
-            
-            # Check authorization
-            if not await client.is_user_authorized():
-                if self.session_string:
-                    self.logger.error("StringSession is not valid or expired")
-                    raise Exception("StringSession authentication failed")
-                elif not self.phone:
-                    self.logger.error("No phone number provided for authentication")
-                    raise Exception("Authentication required but no phone number provided")
-                else:
-                    self.logger.info("First-time authentication required")
-                    # This will cause problems in non-interactive environments
-                    # Only used for local development
-                    await client.send_code_request(self.phone)
-                    code = input('Enter the code you received: ')
-                    await client.sign_in(self.phone, code)
-                
-            results = []
-            
-            for channel in channel_list:
+            if cached is None:
+                # Get channel entity
                 try:
-                    # Apply rate limiting before each request
-                    await self._rate_limit()
-                    
-                    # Add random delay between channels to appear more human-like
-                    await asyncio.sleep(random.uniform(2, 5))
-                    
-                    # Get channel entity
-                    channel_entity = await client.get_entity(channel)
-                    
-                    # Add small delay before next API call
-                    await asyncio.sleep(random.uniform(1, 2))
-                    
-                    # Apply rate limiting again
-                    await self._rate_limit()
-                    
-                    # Get channel info
-                    channel_info = await client(GetFullChannelRequest(channel=channel_entity))
-                    
-                    # Calculate date filter if days_back specified
-                    date_filter = None
-                    if days_back:
-                        date_filter = datetime.now() - timedelta(days=days_back)
-                    
-                    # Apply rate limiting before getting messages
-                    await self._rate_limit()
-                    
-                    # Get messages (with retry logic)
-                    try:
-                        messages = await client.get_messages(
-                            channel_entity, 
-                            limit=limit
-                        )
-                        
-                        for msg in messages:
-                            # Skip messages older than date_filter if specified
-                            if date_filter and msg.date.replace(tzinfo=None) < date_filter:
-                                continue
-                            
-                            # Process message with MCPs
-                            processed_post = {
-                                "channel_username": channel,
-                                "channel_title": getattr(channel_entity, "title", ""),
-                                "post_id": msg.id,
-                                "date": msg.date.isoformat(),
-                                "text": self.text_processor.process(msg),
-                                "media": self.media_processor.process(msg),
-                                "engagement": await self.engagement_processor.process(client, msg, channel_entity),
-                                **self.metadata_processor.process(msg)
-                            }
-                            
-                            results.append(processed_post)
-                            
-                            # Add small delay between processing messages
-                            await asyncio.sleep(random.uniform(0.3, 0.7))
-                            
-                    except FloodWaitError as e:
-                        wait_time = e.seconds
-                        self.logger.error(f"Rate limit hit for {channel}. Need to wait {wait_time} seconds.")
-                        if wait_time < 300:  # Only retry for short waits
-                            self.logger.info(f"Waiting {wait_time} seconds before retry...")
-                            await asyncio.sleep(wait_time + 10)  # Add buffer time
-                            # Get messages with reduced limit
-                            retry_limit = max(1, limit//2)
-                            self.logger.info(f"Retrying with reduced limit of {retry_limit}")
-                            
-                            # Apply rate limiting again
-                            await self._rate_limit()
-                            
-                            messages = await client.get_messages(
-                                channel_entity, 
-                                limit=retry_limit
-                            )
-                            
-                            for msg in messages:
-                                if date_filter and msg.date.replace(tzinfo=None) < date_filter:
-                                    continue
-                                
-                                processed_post = {
-                                    "channel_username": channel,
-                                    "channel_title": getattr(channel_entity, "title", ""),
-                                    "post_id": msg.id,
-                                    "date": msg.date.isoformat(),
-                                    "text": self.text_processor.process(msg),
-                                    "media": self.media_processor.process(msg),
-                                    "engagement": await self.engagement_processor.process(client, msg, channel_entity),
-                                    **self.metadata_processor.process(msg)
-                                }
-                                
-                                results.append(processed_post)
-                                
-                                # Add small delay between processing messages
-                                await asyncio.sleep(random.uniform(0.3, 0.7))
-                        else:
-                            self.logger.error(f"Wait time too long ({wait_time}s) for {channel}. Skipping.")
-                    
-                except Exception as e:
-                    self.logger.error(f"Error processing channel {channel}: {str(e)}")
-                    # Continue with next channel instead of failing completely
+                    entity = await client.get_entity(channel)
+                except ValueError as e:
+                    # get_entity's error for usernames nobody has
+                    raise UnknownChannel(str(e)) from e
+                if not isinstance(entity, Channel):
+                    raise UnknownChannel(f"{channel} is not a channel")
+                self.channel_cache.put_entity(channel, entity, client.account)
+                cached = CachedChannel(entity.id, entity.access_hash, entity.title)
+            
+            if cached.info is None:
+                # Get channel info
+                channel_info = await client(GetFullChannelRequest(channel=cached.input_entity))
+                cached.info = {
+                    "about": channel_info.full_chat.about,
+                    "participants_count": channel_info.full_chat.participants_count
+                }
+                self.channel_cache.put_info(channel, cached.info, client.account)
+        except UNAVAILABLE_ERRORS as e:
+            self.channel_cache.put_error(channel, e, client.account)
+            raise
+        
+        return cached
+
+    async def _get_messages(self, client, channel_entity, limit, min_id=None, date_filter=None, offset_id=None):
+        """Get the newest messages (before ``offset_id`` if set), or in incremental mode the oldest ones after min_id
+
+        History is read in pages and, when walking backwards, reading stops at
+        the first message older than ``date_filter``.
+        """
+        messages = []
+        if min_id:
+            # Walk forward from the watermark so a burst larger than limit is
+            # picked up over the next polls instead of leaving a gap
+            async for msg in client.iter_messages(
+                channel_entity.input_entity,
+                limit=limit,
+                min_id=min_id,
+                reverse=True
+            ):
+                if date_filter and msg.date < date_filter:
                     continue
+                messages.append(msg)
+            messages.reverse()
+            return messages
+        async for msg in client.iter_messages(channel_entity.input_entity, limit=limit, offset_id=offset_id or 0):
+            # Newest first: everything after this message is older still
+            if date_filter and msg.date < date_filter:
+                break
+            messages.append(msg)
+        return messages
+
+    async def _fetch_channel(self, client, channel, limit, days_back, min_id=None, offset_id=None,
+                             side_effects=True):
+        """Fetch, process and store posts for one channel with one account's client"""
+        channel_entity = await self._resolve_channel(client, channel)
+        
+        # Calculate date filter if days_back specified
+        date_filter = None
+        if days_back:
+            date_filter = datetime.now(timezone.utc) - timedelta(days=days_back)
+        
+        # Get messages (the RPC client waits out and retries short FloodWaits)
+        try:
+            messages = await self._get_messages(client, channel_entity, limit, min_id, date_filter, offset_id)
+        except STALE_ENTITY_ERRORS as e:
+            # The cached access_hash may be stale; resolve once more before giving up
+            self.logger.info(f"Cached entity for {channel} rejected ({str(e)}), resolving again")
+            self.channel_cache.invalidate(channel, client.account)
+            channel_entity = await self._resolve_channel(client, channel)
+            messages = await self._get_messages(client, channel_entity, limit, min_id, date_filter, offset_id)
+        
+        posts = await self.process_messages(client, channel, channel_entity, messages, side_effects)
+        
+        self.post_store.upsert_posts(posts)
+        # The store is complete up to the channel's newest message only after a
+        # plain fetch, or an incremental one that caught up with the head
+        if not date_filter and not offset_id and (not min_id or len(messages) < limit):
+            self.post_store.record_fetch(channel, [post.post_id for post in posts], min_id)
+        
+        return posts
+
+    async def _with_failover(self, channel, call):
+        """Run ``call(client)`` with the channel's home account, failing over while an account sits out a FloodWait"""
+        error = None
+        for account in self.session_pool.candidates(channel):
+            # Reuse the long-lived client instead of connecting on every call
+            client = await account.rpc()
+            try:
+                return await call(client)
+            except (FloodWaitError, RateLimitExceeded) as e:
+                error = e
+                self.logger.warning(f"{account.name} is rate limited for {channel}, trying next account")
+        raise error
+
+    async def fetch_channel(self, channel, limit, min_id=None, days_back=None, offset_id=None, side_effects=True):
+        """Fetch, process and store up to ``limit`` posts of one channel, newest first.
+
+        ``min_id`` reads forward from that post id (the oldest ``limit`` newer
+        posts), ``offset_id`` backwards from it (the newest ``limit`` older
+        ones). ``side_effects`` is passed on to ``process_messages``. Raises
+        FloodWaitError or RateLimitExceeded only when every account is rate
+        limited.
+        """
+        return await self._with_failover(
+            channel,
+            lambda client: self._fetch_channel(client, channel, limit, days_back, min_id, offset_id, side_effects)
+        )
+
+    async def resolve_channel(self, channel, account=None):
+        """``(client, channel entity)`` for ``account``'s client, or the first account not rate limited"""
+        if account is not None:
+            client = await account.rpc()
+            return client, await self._resolve_channel(client, channel)
+        
+        async def resolve(client):
+            return client, await self._resolve_channel(client, channel)
+        
+        return await self._with_failover(channel, resolve)
+
+    def _read_channel_from_store(self, channel, limit, days_back, min_id=None):
+        min_date = datetime.now(timezone.utc) - timedelta(days=days_back) if days_back else None
+        posts = self.post_store.get_posts(channel, limit, min_date=min_date, min_id=min_id)
+        self.logger.info(f"Served {len(posts)} posts for {channel} from local store")
+        return posts
+
+    def cache_stats(self):
+        return {
+            "response_cache": self.response_cache.stats(),
+            "inflight_fetches": len(self.single_flight),
+            "coalesced_fetches": self.single_flight.shared,
+            "dedupe_index": self.dedupe_index.stats(),
+            "media_cache": self.media_cache.status() if self.media_cache is not None else None
+        }
+
+    async def iter_channel_results(self, channel_list, limit=10, days_back=None, min_id=None, since=None,
+                                    max_staleness=None, consumer=DEFAULT_CONSUMER):
+        """Yield ``(index, posts, error)`` for each requested channel as soon as it is done
+
+        A channel that could not be fetched yields no posts and the exception
+        that stopped it; authorization and connection errors are raised.
+        """
+        if since not in (None, "last"):
+            raise ValueError(f"Unsupported since value: {since}")
+        
+        # Bound the fan-out; the shared rate limiter paces the actual RPCs
+        semaphore = asyncio.Semaphore(max(1, self.max_concurrent_channels))
+        
+        async def fetch_from_telegram(channel, channel_min_id):
+            async with semaphore:
+                return await self.fetch_channel(channel, limit, channel_min_id, days_back)
+        
+        async def read(channel, channel_min_id):
+            started = time.perf_counter()
+            if max_staleness is not None and self.post_store.is_fresh(channel, max_staleness, limit):
+                posts = self._read_channel_from_store(channel, limit, days_back, channel_min_id)
+                metrics.CHANNEL_FETCH_LATENCY.observe(time.perf_counter() - started, source="store")
+                return posts, None
             
-            self.logger.info(f"Successfully processed {len(results)} posts from {len(channel_list)} channels")
-            return results
+            key = (channel.lower(), limit, days_back, channel_min_id)
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                metrics.CHANNEL_FETCH_LATENCY.observe(time.perf_counter() - started, source="cache")
+                return list(cached), None
             
+            try:
+                # Overlapping requests for the same channel wait on one fetch
+                posts = await self.single_flight.do(key, lambda: fetch_from_telegram(channel, channel_min_id))
+            except (FloodWaitError, RateLimitExceeded) as e:
+                self.logger.error(f"Skipping {channel}, every account is rate limited: {str(e)}")
+                return [], e
+            except ChannelUnavailable as e:
+                self.logger.info(f"Skipping {channel}: {str(e)}")
+                return [], e
+            except (AuthorizationError, OSError):
+                raise
+            except Exception as e:
+                self.logger.error(f"Error processing channel {channel}: {str(e)}")
+                # Continue with next channel instead of failing completely
+                return [], e
+            finally:
+                metrics.CHANNEL_FETCH_LATENCY.observe(time.perf_counter() - started, source="telegram")
+            self.response_cache.set(key, posts)
+            return list(posts), None
+        
+        async def fetch(channel):
+            channel_min_id = self.channel_cache.get_high_water(channel, consumer) if since == "last" else min_id
+            posts, error = await read(channel, channel_min_id)
+            if since == "last" and posts:
+                # Only now that the posts are processed and stored, and only for this consumer
+                self.channel_cache.set_high_water(channel, max(post.post_id for post in posts), consumer)
+            return posts, error
+        
+        async def fetch_indexed(index, channel):
+            return (index, *await fetch(channel))
+        
+        tasks = [asyncio.ensure_future(fetch_indexed(i, channel)) for i, channel in enumerate(channel_list)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # The consumer went away (e.g. a streaming client disconnected)
+            for task in tasks:
+                task.cancel()
+
+    async def iter_posts(self, channel_list, limit=10, days_back=None, min_id=None, since=None, max_staleness=None,
+                         consumer=DEFAULT_CONSUMER):
+        """Yield processed posts as each channel completes, in completion order"""
+        count = 0
+        try:
+            async for _, posts, _ in self.iter_channel_results(channel_list, limit, days_back, min_id, since,
+                                                             max_staleness, consumer):
+                for post in posts:
+                    count += 1
+                    yield post
         except Exception as e:
             self.logger.error(f"Error in get_posts: {str(e)}")
             raise
-            
-        finally:
-            # Always disconnect client
-            await client.disconnect()
-            self.logger.info("Client disconnected")
\ No newline at end of file
+        self.logger.info(f"Successfully processed {count} posts from {len(channel_list)} channels")
+
+    async def get_posts(self, channel_list, limit=10, days_back=None, min_id=None, since=None, max_staleness=None,
+                        consumer=DEFAULT_CONSUMER):
+        """Get posts from specified channels with rate limiting and anti-block measures
+
+        ``min_id`` only returns posts newer than that id. ``since="last"`` does
+        the same per channel, starting from the highest post id returned for
+        it by ``consumer``'s previous ``since="last"`` call; other calls never
+        move that mark. With ``max_staleness`` (seconds), channels fetched
+        recently enough are answered from the local post store.
+        Posts are returned grouped in the order channels were requested.
+        """
+        channel_results = [[] for _ in channel_list]
+        try:
+            async for index, posts, _ in self.iter_channel_results(channel_list, limit, days_back, min_id, since,
+                                                                 max_staleness, consumer):
+                channel_results[index] = posts
+        except Exception as e:
+            self.logger.error(f"Error in get_posts: {str(e)}")
+            raise
+        
+        results = [post for posts in channel_results for post in posts]
+        self.logger.info(f"Successfully processed {len(results)} posts from {len(channel_list)} channels")
+        return results
+
+
+def create_parser_from_env():
+    """Build a TelegramParser from the same environment variables the API uses"""
+    session_strings = [s.strip() for s in os.getenv("SESSION_STRINGS", "").split(",") if s.strip()]
+    process_workers = os.getenv("PROCESS_WORKERS")
+    parser = TelegramParser(
+        api_id=os.getenv("API_ID"),
+        api_hash=os.getenv("API_HASH"),
+        phone=os.getenv("PHONE"),
+        session_string=os.getenv("SESSION_STRING"),
+        session_strings=session_strings,
+        cache_path=os.getenv("CACHE_PATH"),
+        store_path=os.getenv("POST_STORE_PATH"),
+        pacing=os.getenv("PACING", "human"),
+        dedupe_path=os.getenv("DEDUPE_INDEX_PATH"),
+        stages=parse_stages(os.getenv("PIPELINE_STAGES")),
+        process_workers=int(process_workers) if process_workers and process_workers.isdigit() else None
+    )
+    max_rpm = os.getenv("MAX_REQUESTS_PER_MINUTE")
+    if max_rpm and max_rpm.isdigit():
+        parser.max_requests_per_minute = int(max_rpm)
+    max_concurrent = os.getenv("MAX_CONCURRENT_CHANNELS")
+    if max_concurrent and max_concurrent.isdigit():
+        parser.max_concurrent_channels = int(max_concurrent)
+    
+    # Channel cache TTLs in seconds, and the short-lived per-channel response cache
+    for env_name, target, attr in (("ENTITY_CACHE_TTL", parser.channel_cache, "entity_ttl"),
+                                   ("CHANNEL_INFO_TTL", parser.channel_cache, "info_ttl"),
+                                   ("NEGATIVE_CACHE_TTL", parser.channel_cache, "negative_ttl"),
+                                   ("RESPONSE_CACHE_TTL", parser.response_cache, "ttl"),
+                                   ("RESPONSE_CACHE_SIZE", parser.response_cache, "max_size")):
+        value = os.getenv(env_name)
+        if value and value.isdigit():
+            setattr(target, attr, int(value))
+    return parser
@@ -0,0 +1,14 @@
+from .engagement_processor import EngagementProcessor
+from .fingerprint_processor import FingerprintProcessor
+from .media_processor import MediaProcessor
+from .metadata_processor import MetadataProcessor
+from .text_processor import TextProcessor
+
+# Names usable in pipeline stage configuration
+PROCESSORS = {
+    "engagement": EngagementProcessor,
+    "text": TextProcessor,
+    "media": MediaProcessor,
+    "metadata": MetadataProcessor,
+    "fingerprint": FingerprintProcessor
+}
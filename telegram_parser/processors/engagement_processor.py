@@ -1,43 +1,81 @@
-import asyncio
-import random
+import logging
 from telethon.tl.functions.messages import GetMessagesReactionsRequest
+from ..models import Engagement, Reaction
+
+# GetMessagesReactionsRequest accepts at most this many message ids per call
+REACTIONS_BATCH_SIZE = 100
+
+logger = logging.getLogger(__name__)
+
+
+def format_reactions(message_reactions):
+    """Convert a MessageReactions object into a list of Reaction"""
+    reactions = []
+    if message_reactions and getattr(message_reactions, "results", None):
+        for reaction in message_reactions.results:
+            reactions.append(Reaction(getattr(reaction.reaction, "emoticon", None), reaction.count))
+    return reactions
+
 
 class EngagementProcessor:
-    async def process(self, client, message, channel_entity):
-        """Extract engagement metrics from a message with anti-blocking measures"""
-        engagement = {
-            "views": getattr(message, "views", 0),
-            "forwards": getattr(message, "forwards", 0),
-            "reactions": []
-        }
+    field = "engagement"
+    executor = "loop"
+
+    async def process_batch(self, messages, context):
+        return await self.fetch_batch(context.client, messages, context.channel_entity.input_entity)
+
+    async def fetch_batch(self, client, messages, channel_entity):
+        """Extract engagement metrics for a page of messages from one channel
+
+        Messages that already carry inline reactions are answered locally; the
+        rest are looked up with as few GetMessagesReactionsRequest calls as
+        possible and merged back by message id.
+        """
+        engagements = []
+        missing = {}
+        for message in messages:
+            engagement = Engagement(getattr(message, "views", 0), getattr(message, "forwards", 0))
+            engagements.append(engagement)
+            
+            # Try direct reactions first (less API intensive)
+            if getattr(message, "reactions", None):
+                engagement.reactions = format_reactions(message.reactions)
+            else:
+                missing[message.id] = engagement
         
-        # Try direct reactions first (less API intensive)
-        if hasattr(message, "reactions") and message.reactions:
-            for reaction in message.reactions.results:
-                engagement["reactions"].append({
-                    "emoji": getattr(reaction.reaction, "emoticon", None),
-                    "count": reaction.count
-                })
-            return engagement
+        reactions = await self.fetch_reactions(client, channel_entity, list(missing))
+        for message_id, engagement in missing.items():
+            if message_id in reactions:
+                engagement.reactions = reactions[message_id]
         
-        # Only make additional API request if necessary and with delay
-        try:
-            # Add random delay before API call to appear more natural
-            await asyncio.sleep(random.uniform(0.5, 1.5))
-            
-            reactions_response = await client(GetMessagesReactionsRequest(
-                peer=channel_entity,
-                id=[message.id]
-            ))
-            
-            if hasattr(reactions_response, "reactions"):
-                for reaction in reactions_response.reactions:
-                    engagement["reactions"].append({
-                        "emoji": getattr(reaction.reaction, "emoticon", None) or str(reaction.reaction),
-                        "count": reaction.count
-                    })
-        except Exception as e:
-            # Just log and continue - reactions are optional
-            pass
+        return engagements
+
+    async def fetch_reactions(self, client, channel_entity, message_ids, ignore_errors=True):
+        """Look up reactions for many messages, up to 100 ids per request
+
+        Returns a dict of message id to reaction list for the messages
+        Telegram reported on. Failed requests are skipped unless
+        ``ignore_errors`` is false, since an incomplete answer looks the
+        same as messages without reactions.
+        """
+        reactions = {}
+        for start in range(0, len(message_ids), REACTIONS_BATCH_SIZE):
+            chunk = message_ids[start:start + REACTIONS_BATCH_SIZE]
+            try:
+                response = await client(GetMessagesReactionsRequest(
+                    peer=channel_entity,
+                    id=chunk
+                ))
+            except Exception as e:
+                if not ignore_errors:
+                    raise
+                # Just log and continue - reactions are optional
+                logger.debug(f"Could not fetch reactions for {len(chunk)} messages: {str(e)}")
+                continue
             
-        return engagement
\ No newline at end of file
+            # The response is an Updates object with one UpdateMessageReactions per message
+            for update in getattr(response, "updates", []):
+                message_id = getattr(update, "msg_id", None)
+                if message_id is not None:
+                    reactions[message_id] = format_reactions(getattr(update, "reactions", None))
+        return reactions
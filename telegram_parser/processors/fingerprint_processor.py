@@ -0,0 +1,19 @@
+from ..dedupe import fingerprint
+
+
+class FingerprintProcessor:
+    """SimHash of each post's text for the duplicate index; pure CPU, so large batches run in the process pool"""
+
+    field = "fingerprint"
+    executor = "process"
+
+    def process_batch(self, messages, context=None):
+        return self.process_payloads([getattr(message, "message", None) for message in messages])
+
+    def prepare(self, message, fields):
+        # The text stage's output when it ran, so both hash the same text
+        return fields.get("text", getattr(message, "message", None))
+
+    @staticmethod
+    def process_payloads(payloads):
+        return [fingerprint(text) for text in payloads]
@@ -1,32 +1,123 @@
-from telethon.tl.functions.messages import GetMessagesReactionsRequest
-
-async def get_reactions(client, channel_entity, message):
-    reactions = []
-    # 1. Try direct attribute
-    if hasattr(message, "reactions") and message.reactions and hasattr(message.reactions, "results"):
-        for reaction in message.reactions.results:
-            reactions.append({
-                "emoji": getattr(reaction.reaction, "emoticon", None),
-                "count": reaction.count
-            })
-    else:
-        # 2. Fallback: explicit API call
-        try:
-            resp = await client(GetMessagesReactionsRequest(
-                peer=channel_entity,
-                id=[message.id]
-            ))
-            if hasattr(resp, "reactions"):
-                for reaction in resp.reactions:
-                    reactions.append({
-                        "emoji": getattr(reaction.reaction, "emoticon", None),
-                        "count": reaction.count
-                    })
-        except Exception as e:
-            # Optionally log the error
-            pass
-    return reactions
+from telethon import utils
+from telethon.tl.types import (
+    DocumentAttributeAnimated,
+    DocumentAttributeAudio,
+    DocumentAttributeFilename,
+    DocumentAttributeImageSize,
+    DocumentAttributeSticker,
+    DocumentAttributeVideo,
+    MessageMediaDocument,
+    MessageMediaPhoto,
+    MessageMediaWebPage,
+    PhotoSizeProgressive,
+    WebPage
+)
+from ..models import Media
+
+
+def largest_photo_size(photo):
+    """``(width, height, bytes)`` of the biggest stored size of a photo"""
+    best = (None, None, None)
+    for size in getattr(photo, "sizes", None) or []:
+        width, height = getattr(size, "w", None), getattr(size, "h", None)
+        if width is None:
+            # Stripped and path sizes are previews without dimensions
+            continue
+        if isinstance(size, PhotoSizeProgressive):
+            byte_size = max(size.sizes) if size.sizes else None
+        else:
+            byte_size = getattr(size, "size", None)
+        if best[0] is None or width * height > best[0] * best[1]:
+            best = (width, height, byte_size)
+    return best
+
+
+def _file_id(file):
+    try:
+        return utils.pack_bot_file_id(file)
+    except Exception:
+        return None
+
+
+def _photo(photo, grouped_id):
+    width, height, size = largest_photo_size(photo)
+    return Media(
+        "photo",
+        id=photo.id,
+        file_id=_file_id(photo),
+        mime_type="image/jpeg",
+        size=size,
+        width=width,
+        height=height,
+        grouped_id=grouped_id,
+        cache_key=f"photo-{photo.id}"
+    )
+
+
+def _document(document, grouped_id):
+    media = Media(
+        "document",
+        id=document.id,
+        file_id=_file_id(document),
+        mime_type=document.mime_type,
+        size=document.size,
+        grouped_id=grouped_id,
+        cache_key=f"document-{document.id}"
+    )
+    for attribute in document.attributes:
+        attribute_type = type(attribute)
+        if attribute_type is DocumentAttributeVideo:
+            media.type = "video_note" if attribute.round_message else "video"
+            media.width, media.height, media.duration = attribute.w, attribute.h, attribute.duration
+        elif attribute_type is DocumentAttributeAudio:
+            media.type = "voice" if attribute.voice else "audio"
+            media.duration = attribute.duration
+        elif attribute_type is DocumentAttributeImageSize:
+            media.width, media.height = attribute.w, attribute.h
+        elif attribute_type is DocumentAttributeFilename:
+            media.file_name = attribute.file_name
+    # Checked last: GIFs also carry a video attribute, stickers an image size
+    for attribute in document.attributes:
+        if type(attribute) is DocumentAttributeAnimated:
+            media.type = "animation"
+        elif type(attribute) is DocumentAttributeSticker:
+            media.type = "sticker"
+    if media.type == "document" and (document.mime_type or "").startswith("image/"):
+        media.type = "image"
+    return media
+
 
 class MediaProcessor:
+    field = "media"
+    executor = "loop"
+
+    def process_batch(self, messages, context=None):
+        return [self.process(message) for message in messages]
+
     def process(self, message):
-        return []
\ No newline at end of file
+        """Describe the message's media from fields Telegram already sent, without extra RPCs"""
+        media = getattr(message, "media", None)
+        if media is None:
+            return []
+        grouped_id = getattr(message, "grouped_id", None)
+        media_type = type(media)
+        if media_type is MessageMediaPhoto:
+            if media.photo is None:
+                # Expired self-destructing photo
+                return []
+            return [_photo(media.photo, grouped_id)]
+        if media_type is MessageMediaDocument:
+            if media.document is None:
+                return []
+            return [_document(media.document, grouped_id)]
+        if media_type is MessageMediaWebPage:
+            webpage = media.webpage
+            if type(webpage) is not WebPage:
+                # Pending or empty previews carry no details yet
+                return []
+            return [Media("webpage", id=webpage.id, url=webpage.url, grouped_id=grouped_id)]
+        # Polls, locations, contacts, games, ...: the type is all we keep
+        name = media_type.__name__
+        if name.startswith("MessageMedia"):
+            name = name[len("MessageMedia"):]
+        return [Media(name.lower(), grouped_id=grouped_id)]
@@ -1,14 +1,31 @@
+from types import SimpleNamespace
+from ..extraction import extract_entities
+
+
 class MetadataProcessor:
+    field = "metadata"
+    executor = "loop"
+
     def process(self, message):
-        # Example: extract has_link, link_domains
-        has_link = False
-        link_domains = []
-        if hasattr(message, "entities") and message.entities:
-            for entity in message.entities:
-                if entity.__class__.__name__ == "MessageEntityUrl":
-                    has_link = True
-                    # Optionally extract domain from message text
+        # Links, hashtags, mentions and cashtags sliced from message.entities
+        extracted = extract_entities(message)
         return {
-            "has_link": has_link,
-            "link_domains": link_domains
-        }
\ No newline at end of file
+            "has_link": extracted["has_link"],
+            "link_domains": extracted["link_domains"],
+            "hashtags": extracted["hashtags"],
+            "mentions": extracted["mentions"],
+            "urls": extracted["urls"],
+            "cashtags": extracted["cashtags"]
+        }
+
+    def process_batch(self, messages, context=None):
+        return [self.process(message) for message in messages]
+
+    def prepare(self, message, fields):
+        # Messages hold a reference to the client and cannot be pickled; the entities can
+        return getattr(message, "message", None), getattr(message, "entities", None)
+
+    @staticmethod
+    def process_payloads(payloads):
+        processor = MetadataProcessor()
+        return [processor.process(SimpleNamespace(message=text, entities=entities)) for text, entities in payloads]
@@ -1,4 +1,10 @@
 class TextProcessor:
+    field = "text"
+    executor = "loop"
+
     def process(self, message):
         # Extract main text content, handle formatting, mentions, hashtags
-        return getattr(message, "message", "")
\ No newline at end of file
+        return getattr(message, "message", "")
+
+    def process_batch(self, messages, context=None):
+        return [self.process(message) for message in messages]
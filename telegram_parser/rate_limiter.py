@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import time
+from .pacing import make_pacing
+
+
+class RateLimitExceeded(Exception):
+    """Raised instead of calling Telegram while a bucket sits out a long FloodWait"""
+
+    def __init__(self, kind, seconds):
+        super().__init__(f"{kind} is blocked for another {seconds:.0f} seconds")
+        self.kind = kind
+        self.seconds = seconds
+
+
+class TokenBucket:
+    """Token bucket whose refill rate adapts to FloodWait feedback.
+
+    Each FloodWait multiplies the rate by ``decrease_factor`` and blocks the
+    bucket for the wait Telegram asked for. After every ``recovery_interval``
+    seconds without a FloodWait the rate grows by ``increase_step`` until it
+    reaches ``max_rate`` (additive increase, multiplicative decrease).
+    """
+
+    def __init__(self, name, rate, capacity=3, min_rate=1, max_rate=None, recovery_interval=300,
+                 increase_step=None, decrease_factor=0.5):
+        self.name = name
+        self.rate = rate  # requests per minute
+        self.capacity = capacity
+        self.min_rate = min_rate
+        self.max_rate = max_rate or rate * 3
+        self.recovery_interval = recovery_interval
+        self.increase_step = increase_step or max(1, rate * 0.1)
+        self.decrease_factor = decrease_factor
+        self.logger = logging.getLogger(__name__)
+
+        now = time.monotonic()
+        self.tokens = capacity
+        self.updated = now
+        self.last_adjusted = now
+        self.blocked_until = 0
+        self.flood_waits = 0
+        self.waiting = 0
+        self.throttled_seconds = 0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now):
+        # Creep back up after a quiet period
+        while now - self.last_adjusted >= self.recovery_interval and self.rate < self.max_rate:
+            self.last_adjusted += self.recovery_interval
+            self.rate = min(self.max_rate, self.rate + self.increase_step)
+            self.logger.info(f"Rate for {self.name} raised to {self.rate:.1f}/min")
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate / 60)
+        self.updated = now
+
+    def blocked_for(self):
+        return max(0, self.blocked_until - time.monotonic())
+
+    async def acquire(self, max_wait=None):
+        """Take one token, sleeping until one is available"""
+        started = time.monotonic()
+        self.waiting += 1
+        try:
+            async with self._lock:
+                while True:
+                    now = time.monotonic()
+                    blocked = self.blocked_until - now
+                    if blocked > 0:
+                        if max_wait is not None and blocked > max_wait:
+                            raise RateLimitExceeded(self.name, blocked)
+                        self.logger.info(f"{self.name} is in FloodWait: sleeping for {blocked:.2f} seconds")
+                        await asyncio.sleep(blocked)
+                        continue
+                    self._refill(now)
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    await asyncio.sleep((1 - self.tokens) * 60 / self.rate)
+        finally:
+            self.waiting -= 1
+            self.throttled_seconds += time.monotonic() - started
+
+    def penalize(self, seconds):
+        """Shrink the rate and block the bucket for a FloodWait of ``seconds``"""
+        now = time.monotonic()
+        self.flood_waits += 1
+        self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+        self.tokens = 0
+        self.updated = now
+        self.last_adjusted = now
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self.logger.warning(f"FloodWait of {seconds}s on {self.name}, rate lowered to {self.rate:.1f}/min")
+
+    def status(self):
+        return {
+            "rate_per_minute": round(self.rate, 2),
+            "tokens": round(self.tokens, 2),
+            "blocked_for": round(self.blocked_for(), 1),
+            "flood_waits": self.flood_waits,
+            "waiting": self.waiting
+        }
+
+
+class AdaptiveRateLimiter:
+    """One adaptive token bucket per RPC class, shared by every in-flight request.
+
+    ``pacing`` (a PacingPolicy or its name) adds a pause before each RPC on
+    top of the bucket; time already spent waiting for a token counts towards it.
+    """
+
+    # Starting rates (requests per minute) for each RPC class
+    DEFAULT_RATES = {
+        "get_entity": 10,
+        "get_full_channel": 10,
+        "get_messages": 20,
+        "get_reactions": 20,
+        "get_views": 20,
+        "download_media": 30,
+        "other": 20
+    }
+
+    def __init__(self, rates=None, max_wait=300, pacing=None, **bucket_options):
+        self.max_wait = max_wait
+        self.pacing = make_pacing(pacing)
+        self.bucket_options = bucket_options
+        self.buckets = {}
+        for kind, rate in {**self.DEFAULT_RATES, **(rates or {})}.items():
+            self.buckets[kind] = TokenBucket(kind, rate, **bucket_options)
+
+    def bucket(self, kind):
+        if kind not in self.buckets:
+            self.buckets[kind] = TokenBucket(kind, self.DEFAULT_RATES["other"], **self.bucket_options)
+        return self.buckets[kind]
+
+    def set_rate(self, rate):
+        """Reset every bucket to the same starting rate"""
+        for kind, bucket in self.buckets.items():
+            self.buckets[kind] = TokenBucket(kind, rate, **self.bucket_options)
+
+    async def acquire(self, kind):
+        """Take a token of the ``kind`` bucket, then sleep out what is left of the pacing delay"""
+        delay = self.pacing.delay(kind)
+        started = time.monotonic()
+        await self.bucket(kind).acquire(max_wait=self.max_wait)
+        remaining = delay - (time.monotonic() - started)
+        if remaining > 0:
+            await asyncio.sleep(remaining)
+
+    def on_flood_wait(self, kind, seconds):
+        self.bucket(kind).penalize(seconds)
+
+    def status(self):
+        return {kind: bucket.status() for kind, bucket in self.buckets.items()}
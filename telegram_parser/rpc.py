@@ -0,0 +1,118 @@
+import logging
+import time
+from telethon.errors import FloodWaitError
+from telethon.tl.functions.channels import GetFullChannelRequest
+from telethon.tl.functions.contacts import ResolveUsernameRequest
+from telethon.tl.functions.messages import GetHistoryRequest, GetMessagesReactionsRequest, GetMessagesViewsRequest
+from . import metrics
+
+# Rate-limiter bucket used for each raw request type
+REQUEST_KINDS = {
+    ResolveUsernameRequest: "get_entity",
+    GetFullChannelRequest: "get_full_channel",
+    GetHistoryRequest: "get_messages",
+    GetMessagesReactionsRequest: "get_reactions",
+    GetMessagesViewsRequest: "get_views"
+}
+
+
+class RpcClient:
+    """Wrap a TelegramClient so every RPC goes through the adaptive rate limiter.
+
+    FloodWaitError feedback is reported to the bucket of the RPC class that
+    caused it, and the request is retried once the bucket unblocks. Waits of
+    up to ``short_flood_wait`` seconds are routine under load and retried
+    as long as the waits add up to at most ``max_flood_wait``; longer ones
+    are retried ``max_retries`` times. A single wait above
+    ``max_flood_wait`` is re-raised at once so the caller can skip the work.
+    Anything not wrapped here is passed through to the underlying client.
+    """
+
+    def __init__(self, client, rate_limiter, max_flood_wait=300, max_retries=1, short_flood_wait=10,
+                 account="default"):
+        self.client = client
+        self.rate_limiter = rate_limiter
+        self.account = account
+        self.max_flood_wait = max_flood_wait
+        self.max_retries = max_retries
+        self.short_flood_wait = short_flood_wait
+        self.logger = logging.getLogger(__name__)
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    async def _call(self, kind, func, *args, **kwargs):
+        attempt = 0
+        waited = 0
+        while True:
+            await self.rate_limiter.acquire(kind)
+            started = time.perf_counter()
+            try:
+                result = await func(*args, **kwargs)
+            except FloodWaitError as e:
+                metrics.RPC_REQUESTS.inc(kind=kind, account=self.account, outcome="flood_wait")
+                metrics.FLOOD_WAITS.inc(kind=kind, account=self.account)
+                metrics.FLOOD_WAIT_SECONDS.inc(e.seconds, kind=kind, account=self.account)
+                self.rate_limiter.on_flood_wait(kind, e.seconds)
+                if e.seconds > self.max_flood_wait:
+                    self.logger.warning(f"Not retrying {kind}: FloodWait of {e.seconds} seconds is too long")
+                    raise
+                if e.seconds > self.short_flood_wait:
+                    attempt += 1
+                # Zero-second waits still count, so a request that keeps flooding ends
+                waited += max(e.seconds, 1)
+                if attempt > self.max_retries or waited > self.max_flood_wait:
+                    self.logger.warning(
+                        f"Not retrying {kind} after FloodWait of {e.seconds} seconds: retries exhausted"
+                    )
+                    raise
+                self.logger.info(f"Retrying {kind} after FloodWait of {e.seconds} seconds")
+            except Exception:
+                metrics.RPC_REQUESTS.inc(kind=kind, account=self.account, outcome="error")
+                raise
+            else:
+                metrics.RPC_REQUESTS.inc(kind=kind, account=self.account, outcome="ok")
+                return result
+            finally:
+                metrics.RPC_LATENCY.observe(time.perf_counter() - started, kind=kind)
+
+    async def get_entity(self, entity):
+        return await self._call("get_entity", self.client.get_entity, entity)
+
+    async def get_messages(self, entity, *args, **kwargs):
+        return await self._call("get_messages", self.client.get_messages, entity, *args, **kwargs)
+
+    async def download_media(self, message, *args, **kwargs):
+        return await self._call("download_media", self.client.download_media, message, *args, **kwargs)
+
+    async def iter_messages(self, entity, limit=None, page_size=100, min_id=0, offset_id=0, offset_date=None,
+                            reverse=False):
+        """Yield history page by page, spending one rate-limited request per page.
+
+        Stops as soon as the caller stops iterating, so a date cutoff never
+        costs more than the page it falls in.
+        """
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = page_size if remaining is None else min(page_size, remaining)
+            page = await self.get_messages(
+                entity,
+                limit=size,
+                min_id=min_id,
+                offset_id=offset_id,
+                offset_date=offset_date,
+                reverse=reverse
+            )
+            for message in page:
+                yield message
+            if len(page) < size:
+                return
+            if remaining is not None:
+                remaining -= len(page)
+            # Continue from the last message of this page in either direction
+            offset_id = page[-1].id
+            offset_date = None
+
+    async def __call__(self, request, *args, **kwargs):
+        kind = REQUEST_KINDS.get(type(request), "other")
+        return await self._call(kind, self.client, request, *args, **kwargs)
@@ -0,0 +1,313 @@
+import asyncio
+import heapq
+import inspect
+import logging
+import math
+import statistics
+import time
+from collections import deque
+from telethon.errors import FloodWaitError
+from .cache import ChannelUnavailable
+from .rate_limiter import RateLimitExceeded
+from . import metrics
+
+# Recent posts per channel used to estimate its posting rate and reach
+HISTORY_SIZE = 50
+# Rates are measured over at most this long, and never assumed below one post per window
+RATE_WINDOW = 30 * 24 * 3600
+# Engagement relative to the median channel is clamped to [1/ENGAGEMENT_RANGE, ENGAGEMENT_RANGE]
+ENGAGEMENT_RANGE = 4.0
+
+
+class ChannelSchedule:
+    """Polling state of one channel"""
+
+    __slots__ = ("channel", "history", "interval", "due_at", "last_polled_at", "polls", "posts", "errors")
+
+    def __init__(self, channel):
+        self.channel = channel
+        # (post timestamp, views per hour of age when seen) of the newest posts
+        self.history = deque(maxlen=HISTORY_SIZE)
+        self.interval = None
+        self.due_at = 0.0
+        self.last_polled_at = None
+        self.polls = 0
+        self.posts = 0
+        self.errors = 0
+
+    def observe(self, posts, now):
+        seen = {timestamp for timestamp, _ in self.history}
+        for post in sorted(posts, key=lambda p: p.date):
+            timestamp = post.date.timestamp()
+            if timestamp not in seen:
+                # Each post is seen once, fresh on busy channels and hours old on quiet ones:
+                # views per hour of age compares them fairly
+                age_hours = max(1.0, (now - timestamp) / 3600)
+                self.history.append((timestamp, (post.engagement.views or 0) / age_hours))
+
+    def posts_per_hour(self, now):
+        """Posts per hour over the recent history, decaying while the channel stays quiet"""
+        if not self.history:
+            return 3600 / RATE_WINDOW
+        oldest = max(self.history[0][0], now - RATE_WINDOW)
+        count = sum(1 for timestamp, _ in self.history if timestamp >= oldest)
+        return max(count, 1) * 3600 / max(now - oldest, 3600)
+
+    def views_per_hour(self):
+        return statistics.fmean(views for _, views in self.history) if self.history else None
+
+    def status(self, now):
+        return {
+            "channel": self.channel,
+            "interval": round(self.interval) if self.interval else None,
+            "next_poll_in": round(max(0.0, self.due_at - now)),
+            "last_polled_at": self.last_polled_at,
+            "posts_per_hour": round(self.posts_per_hour(now), 3),
+            "views_per_hour": round(self.views_per_hour() or 0, 1),
+            "polls": self.polls,
+            "posts": self.posts,
+            "errors": self.errors
+        }
+
+
+class PollingScheduler:
+    """Poll each channel on its own cadence instead of a flat cron.
+
+    Channels wait in a heap ordered by the time they are next due. Every
+    ``rebalance`` seconds the global ``budget`` (polls per minute) is split
+    between channels in proportion to the square root of their posting
+    rate times their views relative to the other channels, the split that
+    minimizes the average delay before a post is picked up.
+    Intervals stay within ``min_interval`` and ``max_interval``; budget a
+    channel cannot use below ``min_interval`` goes to the others. Channels
+    whose poll returned a full page are due again at once.
+
+    Every poll fetches posts newer than the channel's high-water mark (kept
+    under ``consumer``), so they land in the post store like any other
+    fetch, and are handed to ``sink`` (a sync or async callable taking a
+    list of posts) when given.
+    Without a ``budget``, a quarter of every account's ``get_messages``
+    rate is used, leaving the rest to API requests.
+    """
+
+    def __init__(self, parser, channels, sink=None, budget=None, min_interval=60, max_interval=6 * 3600,
+                 limit=100, concurrency=None, rebalance=60, consumer="scheduler"):
+        if min_interval > max_interval:
+            raise ValueError("min_interval must not exceed max_interval")
+        self.parser = parser
+        self.sink = sink
+        self.budget = budget
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.limit = limit
+        self.concurrency = concurrency or parser.max_concurrent_channels
+        self.rebalance_every = rebalance
+        self.consumer = consumer
+        self.logger = logging.getLogger(__name__)
+
+        self.schedules = {}
+        self._heap = []
+        self._inflight = set()
+        self._wakeup = asyncio.Event()
+        self._next_rebalance = 0.0
+        self._task = None
+        # Running polls, referenced so they are not garbage collected and can be cancelled on stop
+        self._polls = set()
+        for channel in channels:
+            self.add_channel(channel)
+
+    def polls_per_minute(self):
+        if self.budget:
+            return self.budget
+        accounts = self.parser.session_pool.accounts
+        return sum(account.rate_limiter.bucket("get_messages").rate for account in accounts) / 4
+
+    def add_channel(self, channel):
+        channel = channel.strip().lstrip('@')
+        if channel.lower() in self.schedules:
+            return
+        schedule = ChannelSchedule(channel)
+        # Start from what earlier fetches left in the store
+        schedule.observe(self.parser.post_store.get_posts(channel, HISTORY_SIZE), time.time())
+        # New channels are due at once, staggered so a large list does not start in a burst
+        schedule.due_at = time.time() + len(self.schedules) * 60 / self.polls_per_minute()
+        self.schedules[channel.lower()] = schedule
+        heapq.heappush(self._heap, (schedule.due_at, channel.lower()))
+        self._next_rebalance = 0.0
+        self._wakeup.set()
+
+    def remove_channel(self, channel):
+        # Its heap entries become stale and are skipped
+        self.schedules.pop(channel.strip().lstrip('@').lower(), None)
+
+    def rebalance(self, now=None):
+        """Recompute every channel's interval from the budget and reschedule"""
+        now = now or time.time()
+        if not self.schedules:
+            return
+        views = [v for v in (s.views_per_hour() for s in self.schedules.values()) if v]
+        median_views = statistics.median(views) if views else None
+        weights = {}
+        for key, schedule in self.schedules.items():
+            engagement = 1.0
+            if median_views and schedule.views_per_hour():
+                ratio = schedule.views_per_hour() / median_views
+                engagement = min(ENGAGEMENT_RANGE, max(1 / ENGAGEMENT_RANGE, ratio))
+            weights[key] = math.sqrt(schedule.posts_per_hour(now) * engagement)
+
+        # Water-filling: channels that hit a bound are fixed there and the rest share what is left
+        max_rate, min_rate = 60 / self.min_interval, 60 / self.max_interval
+        rates = {}
+        free = dict(weights)
+        budget = self.polls_per_minute()
+        while free:
+            total = sum(free.values())
+            proposed = {key: budget * weight / total for key, weight in free.items()}
+            over = [key for key, rate in proposed.items() if rate > max_rate]
+            under = [] if over else [key for key, rate in proposed.items() if rate < min_rate]
+            if not over and not under:
+                rates.update(proposed)
+                break
+            for key in over or under:
+                rates[key] = max_rate if over else min_rate
+                budget -= rates[key]
+                del free[key]
+        total_rate = sum(rates.values())
+        # Even max_interval for everyone can exceed the budget: then stretch all intervals alike
+        stretch = max(1.0, total_rate / self.polls_per_minute())
+
+        for key, schedule in self.schedules.items():
+            schedule.interval = 60 / rates[key] * stretch
+            if key in self._inflight or schedule.last_polled_at is None or schedule.errors:
+                continue
+            schedule.due_at = schedule.last_polled_at + schedule.interval
+        self._heap = [(s.due_at, key) for key, s in self.schedules.items() if key not in self._inflight]
+        heapq.heapify(self._heap)
+        metrics.SCHEDULER_POLL_RATE.set(round(total_rate / stretch, 3))
+        self._next_rebalance = now + self.rebalance_every
+
+    def _reschedule(self, key, due_at):
+        schedule = self.schedules.get(key)
+        if schedule is None:
+            return
+        schedule.due_at = due_at
+        heapq.heappush(self._heap, (due_at, key))
+        self._wakeup.set()
+
+    async def _fetch(self, channel):
+        min_id = self.parser.channel_cache.get_high_water(channel, self.consumer)
+        # Writes the post store; raises only when every account is rate limited
+        return await self.parser.fetch_channel(channel, self.limit, min_id=min_id or None)
+
+    async def poll(self, key):
+        schedule = self.schedules[key]
+        started = time.time()
+        try:
+            posts = await self._fetch(schedule.channel)
+        except (FloodWaitError, RateLimitExceeded) as e:
+            schedule.errors += 1
+            metrics.SCHEDULER_POLLS.inc(outcome="rate_limited")
+            self.logger.warning(f"Polling {schedule.channel} deferred: {str(e)}")
+            self._reschedule(key, time.time() + max(schedule.interval or 0, getattr(e, "seconds", 0)))
+            return
+        except ChannelUnavailable as e:
+            schedule.errors += 1
+            metrics.SCHEDULER_POLLS.inc(outcome="unavailable")
+            self._reschedule(key, time.time() + max(e.retry_in, self.min_interval))
+            return
+        except Exception as e:
+            schedule.errors += 1
+            metrics.SCHEDULER_POLLS.inc(outcome="error")
+            self.logger.error(f"Polling {schedule.channel} failed: {str(e)}")
+            backoff = (schedule.interval or self.min_interval) * 2 ** min(schedule.errors, 6)
+            self._reschedule(key, time.time() + min(backoff, self.max_interval))
+            return
+
+        metrics.SCHEDULER_POLLS.inc(outcome="ok")
+        schedule.errors = 0
+        schedule.polls += 1
+        schedule.posts += len(posts)
+        schedule.last_polled_at = started
+        schedule.observe(posts, time.time())
+        if posts:
+            await self._emit(posts)
+            newest = max(post.post_id for post in posts)
+            self.parser.channel_cache.set_high_water(schedule.channel, newest, self.consumer)
+        if len(posts) >= self.limit:
+            # A full page: there is more to catch up on
+            self._reschedule(key, time.time())
+        else:
+            self._reschedule(key, started + (schedule.interval or self.min_interval))
+
+    async def _emit(self, posts):
+        if self.sink is None:
+            return
+        try:
+            result = self.sink(posts)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            self.logger.error(f"Sink failed for {len(posts)} posts: {str(e)}")
+
+    async def run(self):
+        semaphore = asyncio.Semaphore(max(1, self.concurrency))
+
+        async def poll(key):
+            try:
+                await self.poll(key)
+            finally:
+                self._inflight.discard(key)
+                semaphore.release()
+
+        while True:
+            now = time.time()
+            if now >= self._next_rebalance:
+                self.rebalance(now)
+            # Entries of removed channels, or superseded by a reschedule, are stale
+            while self._heap and (
+                self._heap[0][1] not in self.schedules
+                or self._heap[0][1] in self._inflight
+                or self.schedules[self._heap[0][1]].due_at != self._heap[0][0]
+            ):
+                heapq.heappop(self._heap)
+            wake_at = self._next_rebalance
+            if self._heap and self._heap[0][0] <= now:
+                _, key = heapq.heappop(self._heap)
+                await semaphore.acquire()
+                self._inflight.add(key)
+                task = asyncio.create_task(poll(key))
+                self._polls.add(task)
+                task.add_done_callback(self._polls.discard)
+                continue
+            if self._heap:
+                wake_at = min(wake_at, self._heap[0][0])
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, wake_at - now))
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Stop scheduling and cancel running polls, before the parser's clients disconnect"""
+        tasks = [self._task] if self._task is not None else []
+        tasks += self._polls
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._polls.clear()
+
+    def status(self):
+        now = time.time()
+        schedules = sorted(self.schedules.values(), key=lambda s: s.due_at)
+        return {
+            "channels": len(schedules),
+            "budget_per_minute": round(self.polls_per_minute(), 3),
+            "planned_per_minute": round(sum(60 / s.interval for s in schedules if s.interval), 3),
+            "polling": len(self._inflight),
+            "schedule": [s.status(now) for s in schedules]
+        }
@@ -0,0 +1,113 @@
+"""
+Query parsing, highlighting and cursors for the post store's full-text search.
+
+The index itself is an FTS5 table kept in ``PostStore``. Search box input is
+translated into a MATCH expression here instead of being passed through, so
+a stray quote or ``AND`` can never become a syntax error.
+"""
+import base64
+import json
+import re
+
+# "quoted phrases", -excluded words and plain words
+TERM_RE = re.compile(r'(-?)"([^"]*)"|(-?)(\w+)')
+WORD_RE = re.compile(r'\w+')
+
+# FTS5 has no Russian stemmer: words this long also match as prefixes, so
+# "банк" finds "банка" and "банков" without pulling in every "ба..." word
+PREFIX_MIN_LENGTH = 4
+
+SNIPPET_WORDS = 16
+
+
+def parse_query(query):
+    """``(terms, excluded)``, each a list of ``(words, prefix)`` with case-folded words"""
+    terms, excluded = [], []
+    for match in TERM_RE.finditer(query):
+        phrase_sign, phrase, word_sign, word = match.groups()
+        if word is None:
+            words = tuple(w.casefold() for w in WORD_RE.findall(phrase))
+            if not words:
+                continue
+            term, sign = (words, False), phrase_sign
+        else:
+            term, sign = ((word.casefold(),), len(word) >= PREFIX_MIN_LENGTH), word_sign
+        (excluded if sign else terms).append(term)
+    return terms, excluded
+
+
+def _fts_term(term):
+    words, prefix = term
+    return '"' + " ".join(words) + '"' + ("*" if prefix else "")
+
+
+def fts_query(terms, excluded=(), channels=None):
+    """FTS5 MATCH expression for parsed terms, or None if nothing can match.
+
+    Terms are ANDed and looked up in the text column; channels are matched
+    in the index as well, as single tokens of the channel column.
+    """
+    if not terms:
+        return None
+    expression = " AND ".join(map(_fts_term, terms))
+    if excluded:
+        expression = f"({expression}) NOT ({' OR '.join(map(_fts_term, excluded))})"
+    expression = f"text : ({expression})"
+    if channels:
+        names = [f'"{name}"' for name in (re.sub(r'\W', '', c) for c in channels) if name]
+        if not names:
+            return None
+        expression += f" AND channel : ({' OR '.join(names)})"
+    return expression
+
+
+def highlight(text, terms, size=SNIPPET_WORDS, start_mark="<b>", end_mark="</b>"):
+    """The ``size``-word window of ``text`` with the most matched words, matches wrapped in marks.
+
+    Done here rather than with FTS5's snippet(), which re-evaluates the whole
+    query for every row it is called on.
+    """
+    tokens = list(WORD_RE.finditer(text))
+    if not tokens:
+        return text
+    words = [token.group().casefold() for token in tokens]
+    matched = [False] * len(words)
+    for term_words, prefix in terms:
+        length = len(term_words)
+        for i in range(len(words) - length + 1):
+            if words[i:i + length - 1] == list(term_words[:-1]) and (
+                words[i + length - 1].startswith(term_words[-1]) if prefix
+                else words[i + length - 1] == term_words[-1]
+            ):
+                matched[i:i + length] = [True] * length
+    best, best_count = 0, -1
+    for start in range(max(1, len(words) - size + 1)):
+        count = sum(matched[start:start + size])
+        if count > best_count:
+            best, best_count = start, count
+    window = range(best, min(best + size, len(tokens)))
+    parts = ["…" if best > 0 else text[:tokens[0].start()]]
+    position = tokens[best].start()
+    for i in window:
+        token = tokens[i]
+        parts.append(text[position:token.start()])
+        parts.append(f"{start_mark}{token.group()}{end_mark}" if matched[i] else token.group())
+        position = token.end()
+    parts.append("…" if window[-1] < len(tokens) - 1 else text[position:])
+    return "".join(parts)
+
+
+def encode_cursor(offset, min_rowid, max_rowid):
+    payload = json.dumps([offset, min_rowid, max_rowid]).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """``(offset, min_rowid, max_rowid)`` of the next page; ValueError if malformed"""
+    try:
+        offset, min_rowid, max_rowid = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if int(offset) < 0:
+            raise ValueError
+        return int(offset), int(min_rowid), int(max_rowid)
+    except Exception:
+        raise ValueError("Invalid cursor")
@@ -0,0 +1,34 @@
+"""
+JSON encoding for posts and API payloads.
+
+Uses orjson when it is installed and falls back to the standard library
+otherwise; both produce the same output. Objects with a ``to_dict`` method
+(``Post`` and friends) are encoded through it.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def _default(obj):
+    to_dict = getattr(obj, "to_dict", None)
+    if to_dict is None:
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+    return to_dict()
+
+
+if orjson is not None:
+    def dumps(obj):
+        """Encode ``obj`` as UTF-8 JSON bytes"""
+        return orjson.dumps(obj, default=_default)
+
+    loads = orjson.loads
+else:
+    def dumps(obj):
+        """Encode ``obj`` as UTF-8 JSON bytes"""
+        return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    loads = json.loads
@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import random
+import time
+from telethon import TelegramClient
+from telethon.sessions import StringSession
+
+
+class AuthorizationError(Exception):
+    """Raised when the session cannot be authorized non-interactively"""
+
+
+class ClientManager:
+    """Own one long-lived TelegramClient and share it between concurrent requests.
+
+    The client is connected lazily on first use, reconnected with exponential
+    backoff when the connection drops, and probed periodically with a cheap
+    ``get_me`` call while the background health task is running.
+    """
+
+    def __init__(self, api_id, api_hash, phone=None, session_string=None, session_file='parser_session',
+                 health_check_interval=60, probe_timeout=10, base_backoff=1, max_backoff=120, max_retries=5):
+        self.api_id = api_id
+        self.api_hash = api_hash
+        self.phone = phone
+        self.session_string = session_string
+        self.session_file = session_file
+        self.health_check_interval = health_check_interval
+        self.probe_timeout = probe_timeout
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_retries = max_retries
+        self.logger = logging.getLogger(__name__)
+
+        self._client = None
+        self._lock = asyncio.Lock()
+        self._health_task = None
+        self.last_probe_time = None
+        self.last_probe_ok = None
+        self.reconnects = 0
+        self._connected_once = False
+        self._reconnect_callbacks = []
+
+    def _create_client(self):
+        """Build the client with string session if available, otherwise use file session"""
+        if self.session_string:
+            self.logger.info("Using StringSession for authentication")
+            return TelegramClient(StringSession(self.session_string), self.api_id, self.api_hash)
+        self.logger.info("Using file-based session for authentication")
+        return TelegramClient(self.session_file, self.api_id, self.api_hash)
+
+    def add_reconnect_callback(self, callback):
+        """Register an async callable run after every reconnect (not the first connect)"""
+        self._reconnect_callbacks.append(callback)
+
+    def remove_reconnect_callback(self, callback):
+        if callback in self._reconnect_callbacks:
+            self._reconnect_callbacks.remove(callback)
+
+    def is_connected(self):
+        return self._client is not None and self._client.is_connected()
+
+    async def start(self):
+        """Connect eagerly and start the background health probe"""
+        await self.get_client()
+        if self._health_task is None:
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def stop(self):
+        """Stop the health probe and disconnect the client"""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+        if self._client is not None:
+            await self._client.disconnect()
+            self.logger.info("Client disconnected")
+
+    async def get_client(self):
+        """Return a connected, authorized client, reconnecting if needed"""
+        if self.is_connected():
+            return self._client
+        async with self._lock:
+            # Another request may have reconnected while we waited for the lock
+            if not self.is_connected():
+                await self._connect_with_backoff()
+            return self._client
+
+    async def _connect_with_backoff(self):
+        attempt = 0
+        while True:
+            try:
+                if self._client is None:
+                    self._client = self._create_client()
+                await self._client.connect()
+                try:
+                    await self._authorize(self._client)
+                except AuthorizationError:
+                    # Otherwise the next get_client would hand out the connected but unauthorized client
+                    await self._client.disconnect()
+                    self._client = None
+                    raise
+                reconnected = self._connected_once
+                self._connected_once = True
+                self.logger.info("Client connected")
+                if reconnected:
+                    self.reconnects += 1
+                    for callback in self._reconnect_callbacks:
+                        # Run outside the connect lock; callbacks use the client themselves
+                        asyncio.create_task(callback())
+                return
+            except (OSError, asyncio.TimeoutError) as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    self.logger.error(f"Giving up connecting after {attempt - 1} retries: {str(e)}")
+                    raise
+                delay = min(self.max_backoff, self.base_backoff * 2 ** (attempt - 1)) + random.uniform(0, 1)
+                self.logger.warning(f"Connection failed ({str(e)}), retrying in {delay:.2f} seconds")
+                await asyncio.sleep(delay)
+
+    async def _authorize(self, client):
+        if await client.is_user_authorized():
+            return
+        if self.session_string:
+            self.logger.error("StringSession is not valid or expired")
+            raise AuthorizationError("StringSession authentication failed")
+        if not self.phone:
+            self.logger.error("No phone number provided for authentication")
+            raise AuthorizationError("Authentication required but no phone number provided")
+        self.logger.info("First-time authentication required")
+        # This will cause problems in non-interactive environments
+        # Only used for local development
+        await client.send_code_request(self.phone)
+        code = input('Enter the code you received: ')
+        await client.sign_in(self.phone, code)
+
+    async def probe(self):
+        """Run one health probe, reconnecting if the connection is unusable"""
+        self.last_probe_time = time.time()
+        try:
+            client = await self.get_client()
+            await asyncio.wait_for(client.get_me(), timeout=self.probe_timeout)
+            self.last_probe_ok = True
+        except AuthorizationError:
+            self.last_probe_ok = False
+            raise
+        except Exception as e:
+            self.last_probe_ok = False
+            self.logger.warning(f"Health probe failed: {str(e)}")
+            # Force a fresh connection on the next get_client call
+            if self._client is not None:
+                await self._client.disconnect()
+        return self.last_probe_ok
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            try:
+                await self.probe()
+            except AuthorizationError:
+                self.logger.error("Session lost authorization, stopping health probe")
+                return
+            except Exception as e:
+                self.logger.error(f"Health probe error: {str(e)}")
+
+    def status(self):
+        return {
+            "connected": self.is_connected(),
+            "last_probe_ok": self.last_probe_ok,
+            "last_probe_time": self.last_probe_time,
+            "reconnects": self.reconnects
+        }
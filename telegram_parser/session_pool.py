@@ -0,0 +1,109 @@
+import asyncio
+import bisect
+import hashlib
+import logging
+from .rate_limiter import AdaptiveRateLimiter
+from .rpc import RpcClient
+
+
+def _hash(value):
+    return int(hashlib.md5(value.encode("utf-8")).hexdigest()[:16], 16)
+
+
+def account_name(session_string):
+    """Stable, non-secret name for a string session, used as its cache key"""
+    return "session-" + hashlib.sha1(session_string.encode("utf-8")).hexdigest()[:10]
+
+
+class Account:
+    """One Telegram session with its own connection and rate limiter"""
+
+    def __init__(self, name, client_manager, rate_limiter=None):
+        self.name = name
+        self.client_manager = client_manager
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter()
+
+    async def rpc(self):
+        """Rate-limited client for this account, connecting if needed"""
+        client = await self.client_manager.get_client()
+        return RpcClient(client, self.rate_limiter, account=self.name)
+
+    def blocked_for(self):
+        """Longest FloodWait any of this account's RPC classes is still sitting out"""
+        return max((bucket.blocked_for() for bucket in self.rate_limiter.buckets.values()), default=0)
+
+    def is_available(self):
+        return self.blocked_for() <= self.rate_limiter.max_wait
+
+    def status(self):
+        return {
+            "telegram": self.client_manager.status(),
+            "rate_limits": self.rate_limiter.status(),
+            "pacing": self.rate_limiter.pacing.status(),
+            "blocked_for": round(self.blocked_for(), 1)
+        }
+
+
+class SessionPool:
+    """Assign channels to accounts by consistent hashing, failing over past blocked accounts.
+
+    Each account owns ``replicas`` points on a hash ring. A channel goes to
+    the first account clockwise from its own hash, so adding or removing an
+    account only moves the channels next to it and per-account entity caches
+    stay warm.
+    """
+
+    def __init__(self, accounts, replicas=100):
+        if not accounts:
+            raise ValueError("SessionPool needs at least one account")
+        self.accounts = list(accounts)
+        self.logger = logging.getLogger(__name__)
+        self._ring = sorted(
+            (_hash(f"{account.name}:{replica}"), index)
+            for index, account in enumerate(self.accounts)
+            for replica in range(replicas)
+        )
+        self._points = [point for point, _ in self._ring]
+
+    @property
+    def primary(self):
+        return self.accounts[0]
+
+    def accounts_for(self, channel):
+        """All accounts in ring order for the channel, its home account first"""
+        start = bisect.bisect(self._points, _hash(channel.lower()))
+        seen = []
+        for offset in range(len(self._ring)):
+            index = self._ring[(start + offset) % len(self._ring)][1]
+            if index not in seen:
+                seen.append(index)
+                if len(seen) == len(self.accounts):
+                    break
+        return [self.accounts[index] for index in seen]
+
+    def candidates(self, channel):
+        """Accounts to try for a channel: available ones in ring order, else just its home account"""
+        ordered = self.accounts_for(channel)
+        available = [account for account in ordered if account.is_available()]
+        return available or ordered[:1]
+
+    async def start(self):
+        results = await asyncio.gather(
+            *(account.client_manager.start() for account in self.accounts),
+            return_exceptions=True
+        )
+        for account, result in zip(self.accounts, results):
+            if isinstance(result, Exception):
+                self.logger.error(f"Could not start {account.name}: {str(result)}")
+        if all(isinstance(result, Exception) for result in results):
+            raise results[0]
+
+    async def stop(self):
+        await asyncio.gather(*(account.client_manager.stop() for account in self.accounts))
+
+    def set_rate(self, rate):
+        for account in self.accounts:
+            account.rate_limiter.set_rate(rate)
+
+    def status(self):
+        return {account.name: account.status() for account in self.accounts}
@@ -0,0 +1,233 @@
+import logging
+import sqlite3
+import threading
+import time
+from .models import Post
+from .search import decode_cursor, encode_cursor, fts_query, highlight, parse_query
+from .serialization import dumps, loads
+
+class PostStore:
+    """Local SQLite (WAL) store of processed posts keyed by ``(channel_username, post_id)``.
+
+    Every fetched post is upserted, and each channel remembers when it was
+    last fetched up to its newest message and how deep the stored posts go
+    from there without a gap.
+    Reads within ``max_staleness`` of that time can then be answered from
+    disk without calling Telegram. Post texts are also kept in an FTS5
+    index, updated by triggers, which ``search`` queries.
+    """
+
+    # Broad queries rank only their newest matches: BM25 costs time per match
+    search_depth = 5000
+
+    def __init__(self, path):
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        has_index = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'posts_fts'"
+        ).fetchone() is not None
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS posts (
+                channel_username TEXT NOT NULL COLLATE NOCASE,
+                post_id INTEGER NOT NULL,
+                date REAL NOT NULL,
+                data TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (channel_username, post_id)
+            );
+            CREATE INDEX IF NOT EXISTS posts_date ON posts (date);
+            CREATE INDEX IF NOT EXISTS posts_channel_date ON posts (channel_username, date);
+            CREATE TABLE IF NOT EXISTS channel_fetches (
+                channel_username TEXT PRIMARY KEY COLLATE NOCASE,
+                fetched_at REAL NOT NULL,
+                depth INTEGER NOT NULL,
+                oldest_id INTEGER,
+                newest_id INTEGER
+            );
+            -- "_" is a token character so each channel username is one token
+            CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+                text, channel, date UNINDEXED,
+                tokenize = "unicode61 remove_diacritics 2 tokenchars '_'"
+            );
+            CREATE TRIGGER IF NOT EXISTS posts_fts_insert AFTER INSERT ON posts BEGIN
+                INSERT INTO posts_fts (rowid, text, channel, date)
+                VALUES (new.rowid, json_extract(new.data, '$.text'), new.channel_username, new.date);
+            END;
+            -- Refetches mostly change engagement; only reindex when the text was edited
+            CREATE TRIGGER IF NOT EXISTS posts_fts_update AFTER UPDATE OF data ON posts
+            WHEN json_extract(old.data, '$.text') IS NOT json_extract(new.data, '$.text') BEGIN
+                DELETE FROM posts_fts WHERE rowid = old.rowid;
+                INSERT INTO posts_fts (rowid, text, channel, date)
+                VALUES (new.rowid, json_extract(new.data, '$.text'), new.channel_username, new.date);
+            END;
+        """)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(channel_fetches)")]
+        if "oldest_id" not in columns:
+            # Without a known range, the next fetch of each channel starts its depth over
+            self._conn.execute("ALTER TABLE channel_fetches ADD COLUMN oldest_id INTEGER")
+            self._conn.execute("ALTER TABLE channel_fetches ADD COLUMN newest_id INTEGER")
+        if not has_index:
+            # Stores created before the index existed
+            self._conn.execute(
+                "INSERT INTO posts_fts (rowid, text, channel, date) "
+                "SELECT rowid, json_extract(data, '$.text'), channel_username, date FROM posts"
+            )
+
+    def upsert_posts(self, posts):
+        """Insert or refresh processed posts"""
+        if not posts:
+            return
+        now = time.time()
+        rows = [
+            (
+                post.channel_username,
+                post.post_id,
+                post.date.timestamp(),
+                dumps(post).decode("utf-8"),
+                now
+            )
+            for post in posts
+        ]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT INTO posts (channel_username, post_id, date, data, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (channel_username, post_id) DO UPDATE SET date = excluded.date, "
+                "data = excluded.data, updated_at = excluded.updated_at",
+                rows
+            )
+            self._conn.execute("COMMIT")
+
+    def record_fetch(self, channel, post_ids, after_id=None):
+        """Mark the channel as fetched up to its newest message.
+
+        ``post_ids`` are the fetched posts: the newest ones, or with
+        ``after_id`` every post after that id. The range stored before is
+        extended when the fetch reaches back into it, and replaced when
+        there may be posts missing in between.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN")
+            row = self._conn.execute(
+                "SELECT oldest_id, newest_id FROM channel_fetches WHERE channel_username = ?", (channel,)
+            ).fetchone()
+            oldest = min(post_ids) if post_ids else None
+            newest = max(post_ids) if post_ids else None
+            if row is not None and row[0] is not None:
+                stored_oldest, stored_newest = row
+                reaches = after_id is not None and after_id <= stored_newest
+                if reaches or oldest is not None and oldest <= stored_newest:
+                    oldest = min(stored_oldest, oldest) if oldest is not None else stored_oldest
+                    newest = max(stored_newest, newest) if newest is not None else stored_newest
+            depth = 0
+            if oldest is not None:
+                (depth,) = self._conn.execute(
+                    "SELECT COUNT(*) FROM posts WHERE channel_username = ? AND post_id BETWEEN ? AND ?",
+                    (channel, oldest, newest)
+                ).fetchone()
+            self._conn.execute(
+                "INSERT INTO channel_fetches (channel_username, fetched_at, depth, oldest_id, newest_id) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT (channel_username) DO UPDATE SET "
+                "fetched_at = excluded.fetched_at, depth = excluded.depth, "
+                "oldest_id = excluded.oldest_id, newest_id = excluded.newest_id",
+                (channel, time.time(), depth, oldest, newest)
+            )
+            self._conn.execute("COMMIT")
+
+    def is_fresh(self, channel, max_staleness, limit):
+        """True if the stored data for the channel can answer a request for ``limit`` posts"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetched_at, depth FROM channel_fetches WHERE channel_username = ?",
+                (channel,)
+            ).fetchone()
+        if row is None:
+            return False
+        fetched_at, depth = row
+        return time.time() - fetched_at <= max_staleness and depth >= limit
+
+    def get_posts(self, channel, limit, min_date=None, min_id=None):
+        """Return stored posts newest first, mirroring the network fetch semantics"""
+        query = "SELECT data FROM posts WHERE channel_username = ?"
+        params = [channel]
+        if min_date is not None:
+            query += " AND date >= ?"
+            params.append(min_date.timestamp())
+        if min_id:
+            # Same as the incremental network fetch: the oldest posts after min_id
+            query += " AND post_id > ? ORDER BY post_id ASC LIMIT ?"
+            params.extend([min_id, limit])
+        else:
+            query += " ORDER BY post_id DESC LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        posts = [Post.from_dict(loads(row[0])) for row in rows]
+        if min_id:
+            posts.reverse()
+        return posts
+
+    def search(self, query, channels=None, date_from=None, date_to=None, limit=20, cursor=None):
+        """Stored posts matching ``query``, best first (BM25), with highlighted snippets.
+
+        Returns ``(results, next_cursor)``. ``date_to`` is exclusive. Only
+        the newest ``search_depth`` matches are ranked, so very broad
+        queries stay fast; the cursor pins that set for the following pages
+        and continues at a rank within it. BM25 scores depend on the whole
+        index, so they drift as posts are stored in the meantime, while the
+        pinned matches keep their number and, nearly always, their order.
+        """
+        terms, excluded = parse_query(query)
+        match = fts_query(terms, excluded, channels)
+        if match is None:
+            return [], None
+        where = "posts_fts MATCH ?"
+        params = [match]
+        if date_from is not None:
+            where += " AND date >= ?"
+            params.append(date_from.timestamp())
+        if date_to is not None:
+            where += " AND date < ?"
+            params.append(date_to.timestamp())
+        with self._lock:
+            if cursor is not None:
+                offset, min_rowid, max_rowid = decode_cursor(cursor)
+            else:
+                offset = 0
+                # rowids grow with insertion, so this is the oldest match still ranked
+                row = self._conn.execute(
+                    f"SELECT rowid FROM posts_fts WHERE {where} ORDER BY rowid DESC LIMIT 1 OFFSET ?",
+                    params + [self.search_depth - 1]
+                ).fetchone()
+                min_rowid = row[0] if row else 0
+                max_rowid = self._conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM posts").fetchone()[0]
+            sql = (
+                f"SELECT rowid, bm25(posts_fts, 1.0, 0.0) AS score FROM posts_fts "
+                f"WHERE {where} AND rowid BETWEEN ? AND ?"
+            )
+            # bm25() is lower for better matches; every match is scored to sort anyway,
+            # so the offset costs no more than a keyset would
+            rows = self._conn.execute(
+                sql + " ORDER BY score, rowid LIMIT ? OFFSET ?", params + [min_rowid, max_rowid, limit + 1, offset]
+            ).fetchall()
+            page = rows[:limit]
+            if not page:
+                return [], None
+            rowids = [rowid for rowid, _ in page]
+            data = dict(self._conn.execute(
+                f"SELECT rowid, data FROM posts WHERE rowid IN ({', '.join('?' * len(rowids))})", rowids
+            ))
+        next_cursor = encode_cursor(offset + limit, min_rowid, max_rowid) if len(rows) > limit else None
+        results = []
+        for rowid, score in page:
+            post = loads(data[rowid])
+            results.append({"post": post, "snippet": highlight(post["text"] or "", terms), "score": -score})
+        return results, next_cursor
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,288 @@
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from array import array
+from datetime import datetime
+from telethon.tl.functions.messages import GetMessagesViewsRequest
+
+# GetMessagesViewsRequest accepts at most this many message ids per call
+VIEWS_BATCH_SIZE = 100
+
+# (post age in seconds up to which the interval applies, seconds between polls)
+DEFAULT_SCHEDULE = (
+    (3600, 5 * 60),
+    (6 * 3600, 15 * 60),
+    (24 * 3600, 60 * 60),
+    (72 * 3600, 3 * 3600)
+)
+
+
+class Series:
+    """Append-only engagement snapshots for one post, kept in compact typed arrays"""
+
+    __slots__ = ("posted_at", "next_poll_at", "timestamps", "views", "forwards", "reactions")
+
+    def __init__(self, posted_at, next_poll_at=0):
+        self.posted_at = posted_at
+        self.next_poll_at = next_poll_at
+        self.timestamps = array("d")
+        self.views = array("q")
+        self.forwards = array("q")
+        self.reactions = array("q")
+
+    def append(self, timestamp, views, forwards, reactions):
+        self.timestamps.append(timestamp)
+        self.views.append(views)
+        self.forwards.append(forwards)
+        self.reactions.append(reactions)
+
+    def velocity(self):
+        """Views per hour over the last interval and since publication"""
+        if not self.timestamps:
+            return {"views_per_hour": None, "avg_views_per_hour": None}
+        recent = None
+        if len(self.timestamps) > 1:
+            elapsed = self.timestamps[-1] - self.timestamps[-2]
+            if elapsed > 0:
+                recent = (self.views[-1] - self.views[-2]) * 3600 / elapsed
+        age = self.timestamps[-1] - self.posted_at
+        average = self.views[-1] * 3600 / age if age > 0 else None
+        return {
+            "views_per_hour": round(recent, 2) if recent is not None else None,
+            "avg_views_per_hour": round(average, 2) if average is not None else None
+        }
+
+    def to_dict(self):
+        return {
+            "posted_at": datetime.fromtimestamp(self.posted_at).astimezone().isoformat(),
+            "points": [
+                {"t": t, "views": v, "forwards": f, "reactions": r}
+                for t, v, f, r in zip(self.timestamps, self.views, self.forwards, self.reactions)
+            ],
+            **self.velocity()
+        }
+
+
+class EngagementTracker:
+    """Re-poll views, forwards and reactions of recent posts on a decaying schedule.
+
+    Posts enter through ``track`` (the parser calls it for every processed
+    post) and are polled while younger than ``window_hours``: often while
+    fresh, less often as they age. Each refresh spends one
+    GetMessagesViewsRequest and one GetMessagesReactionsRequest per 100 due
+    posts of a channel. Snapshots are appended to SQLite and mirrored in
+    per-post arrays for the posts still inside the window.
+    """
+
+    def __init__(self, parser, path, window_hours=72, schedule=DEFAULT_SCHEDULE, tick=60):
+        self.parser = parser
+        self.path = path
+        self.window = window_hours * 3600
+        self.schedule = schedule
+        self.tick = tick
+        self.logger = logging.getLogger(__name__)
+        self.series = {}
+        self._task = None
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS tracked_posts (
+                channel_username TEXT NOT NULL COLLATE NOCASE,
+                post_id INTEGER NOT NULL,
+                posted_at REAL NOT NULL,
+                PRIMARY KEY (channel_username, post_id)
+            );
+            CREATE TABLE IF NOT EXISTS snapshots (
+                channel_username TEXT NOT NULL COLLATE NOCASE,
+                post_id INTEGER NOT NULL,
+                ts REAL NOT NULL,
+                views INTEGER NOT NULL,
+                forwards INTEGER NOT NULL,
+                reactions INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS snapshots_post ON snapshots (channel_username, post_id, ts);
+        """)
+        self._load()
+
+    def _load(self):
+        """Rebuild in-memory series for posts still inside the window"""
+        cutoff = time.time() - self.window
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT t.channel_username, t.post_id, t.posted_at, s.ts, s.views, s.forwards, s.reactions "
+                "FROM tracked_posts t JOIN snapshots s "
+                "ON s.channel_username = t.channel_username AND s.post_id = t.post_id "
+                "WHERE t.posted_at >= ? ORDER BY s.ts",
+                (cutoff,)
+            ).fetchall()
+        for channel, post_id, posted_at, ts, views, forwards, reactions in rows:
+            key = (channel.lower(), post_id)
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = Series(posted_at)
+            series.append(ts, views, forwards, reactions)
+        for series in self.series.values():
+            series.next_poll_at = series.timestamps[-1] + self._interval(series.timestamps[-1] - series.posted_at)
+
+    def _interval(self, age):
+        for max_age, interval in self.schedule:
+            if age < max_age:
+                return interval
+        return self.schedule[-1][1]
+
+    def _append(self, rows):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO snapshots (channel_username, post_id, ts, views, forwards, reactions) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def track(self, posts):
+        """Start tracking recent posts, recording their current engagement as the first point"""
+        now = time.time()
+        new_posts = []
+        rows = []
+        for post in posts:
+            key = (post.channel_username.lower(), post.post_id)
+            if key in self.series:
+                continue
+            posted_at = post.date.timestamp()
+            if now - posted_at > self.window:
+                continue
+            engagement = post.engagement
+            reactions = engagement.reaction_count
+            series = Series(posted_at, now + self._interval(now - posted_at))
+            series.append(now, engagement.views or 0, engagement.forwards or 0, reactions)
+            self.series[key] = series
+            new_posts.append((post.channel_username, post.post_id, posted_at))
+            rows.append((post.channel_username, post.post_id, now, series.views[0], series.forwards[0], reactions))
+        if new_posts:
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO tracked_posts (channel_username, post_id, posted_at) VALUES (?, ?, ?)",
+                    new_posts
+                )
+            self._append(rows)
+
+    def due(self, now=None):
+        """Due post ids grouped by channel; posts that left the window are dropped"""
+        now = now or time.time()
+        by_channel = {}
+        for key, series in list(self.series.items()):
+            if now - series.posted_at > self.window:
+                del self.series[key]
+            elif series.next_poll_at <= now:
+                by_channel.setdefault(key[0], []).append(key[1])
+        return by_channel
+
+    def _defer(self, channel, post_ids, now):
+        """Move failed posts to their next regular poll instead of retrying them every tick"""
+        for post_id in post_ids:
+            series = self.series.get((channel, post_id))
+            if series is not None:
+                series.next_poll_at = now + self._interval(now - series.posted_at)
+
+    async def refresh_channel(self, channel, post_ids):
+        """Fetch current views, forwards and reactions for due posts in batched requests"""
+        client, channel_entity = await self.parser.resolve_channel(channel)
+        peer = channel_entity.input_entity
+        rows = []
+        for start in range(0, len(post_ids), VIEWS_BATCH_SIZE):
+            chunk = post_ids[start:start + VIEWS_BATCH_SIZE]
+            try:
+                response = await client(GetMessagesViewsRequest(peer=peer, id=chunk, increment=False))
+            except Exception as e:
+                self.logger.warning(f"Views refresh failed for {len(chunk)} posts of {channel}: {str(e)}")
+                self._defer(channel, chunk, time.time())
+                continue
+            try:
+                reactions = await self.parser.engagement_processor.fetch_reactions(
+                    client, peer, chunk, ignore_errors=False
+                )
+            except Exception as e:
+                # Recorded as zero, a failed lookup would look like every reaction was withdrawn
+                self.logger.warning(f"Reactions refresh failed for {len(chunk)} posts of {channel}: {str(e)}")
+                reactions = None
+            now = time.time()
+            # Views come back in the same order as the requested ids
+            for post_id, views in zip(chunk, response.views):
+                series = self.series.get((channel, post_id))
+                if series is None:
+                    continue
+                if reactions is None:
+                    reaction_count = series.reactions[-1]
+                else:
+                    reaction_count = sum(r.count for r in reactions.get(post_id, []))
+                series.append(now, views.views or 0, views.forwards or 0, reaction_count)
+                series.next_poll_at = now + self._interval(now - series.posted_at)
+                rows.append((channel, post_id, now, series.views[-1], series.forwards[-1], reaction_count))
+        self._append(rows)
+        return len(rows)
+
+    async def refresh_due(self):
+        refreshed = 0
+        for channel, post_ids in self.due().items():
+            try:
+                refreshed += await self.refresh_channel(channel, post_ids)
+            except Exception as e:
+                self.logger.error(f"Engagement refresh failed for {channel}: {str(e)}")
+                self._defer(channel, post_ids, time.time())
+        if refreshed:
+            self.logger.info(f"Refreshed engagement for {refreshed} posts")
+        return refreshed
+
+    async def run(self):
+        while True:
+            await self.refresh_due()
+            await asyncio.sleep(self.tick)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_series(self, channel, post_ids=None):
+        """Series with velocity for a channel's posts, from memory or from disk for older ones"""
+        channel = channel.lower()
+        if post_ids is None:
+            with self._lock:
+                post_ids = [row[0] for row in self._conn.execute(
+                    "SELECT post_id FROM tracked_posts WHERE channel_username = ? ORDER BY post_id DESC",
+                    (channel,)
+                )]
+        results = []
+        for post_id in post_ids:
+            series = self.series.get((channel, post_id)) or self._read_series(channel, post_id)
+            if series is not None:
+                results.append({"channel_username": channel, "post_id": post_id, **series.to_dict()})
+        return results
+
+    def _read_series(self, channel, post_id):
+        with self._lock:
+            tracked = self._conn.execute(
+                "SELECT posted_at FROM tracked_posts WHERE channel_username = ? AND post_id = ?",
+                (channel, post_id)
+            ).fetchone()
+            if tracked is None:
+                return None
+            rows = self._conn.execute(
+                "SELECT ts, views, forwards, reactions FROM snapshots "
+                "WHERE channel_username = ? AND post_id = ? ORDER BY ts",
+                (channel, post_id)
+            ).fetchall()
+        series = Series(tracked[0])
+        for row in rows:
+            series.append(*row)
+        return series
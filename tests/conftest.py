@@ -0,0 +1,25 @@
+import asyncio
+import pytest
+from benchmarks.fake_telegram import FakeTelegramClient, make_channels, make_parser
+
+
+@pytest.fixture
+def fake_client():
+    """Three offline channels of 300 posts each, answering without latency"""
+    return FakeTelegramClient(make_channels(3, 300), latency=0)
+
+
+@pytest.fixture
+def make_fake_parser(fake_client, tmp_path):
+    """Build TelegramParsers against ``fake_client`` with their SQLite files in a temp dir"""
+    parsers = []
+
+    def make(**options):
+        options.setdefault("rate_per_minute", 100000)
+        parser = make_parser(fake_client, workdir=str(tmp_path), **options)
+        parsers.append(parser)
+        return parser
+
+    yield make
+    for parser in parsers:
+        asyncio.run(parser.stop())
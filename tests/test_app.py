@@ -0,0 +1,28 @@
+import asyncio
+import importlib
+import httpx
+
+
+def test_importing_the_app_opens_no_databases(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    app_module = importlib.import_module("app")
+    assert app_module.parser is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_posts_meta_reports_marks_to_send_back_as_min_id(make_fake_parser, monkeypatch):
+    app_module = importlib.import_module("app")
+    monkeypatch.setattr(app_module, "parser", make_fake_parser())
+
+    async def get(**params):
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/api/posts", params=params)
+            response.raise_for_status()
+            return response.json()
+
+    first = asyncio.run(get(channels="fake_channel_0,fake_channel_1", limit=3))
+    assert first["meta"]["high_water_marks"] == {"fake_channel_0": 300, "fake_channel_1": 300}
+    again = asyncio.run(get(channels="fake_channel_0", limit=3, min_id=300))
+    assert again["posts"] == []
+    assert again["meta"]["high_water_marks"] == {"fake_channel_0": 300}
@@ -0,0 +1,31 @@
+import asyncio
+import gzip
+import json
+from benchmarks.fake_telegram import FakeTelegramClient, make_channels, make_parser
+from telegram_parser.backfill import BackfillJob
+from telegram_parser.tracker import EngagementTracker
+
+CHANNEL = "fake_channel_0"
+
+
+def exported_ids(output_dir):
+    ids = []
+    for path in sorted(output_dir.glob("*.jsonl.gz")):
+        with gzip.open(path) as f:
+            ids.extend(json.loads(line)["post_id"] for line in f)
+    return ids
+
+
+def test_backfill_exports_every_post_once_without_tracking_them(tmp_path):
+    parser = make_parser(FakeTelegramClient(make_channels(1, 250), latency=0), workdir=str(tmp_path),
+                         rate_per_minute=100000)
+    parser.engagement_tracker = EngagementTracker(parser, str(tmp_path / "engagement.sqlite"))
+    try:
+        job = BackfillJob(parser, CHANNEL, str(tmp_path / "export"), page_size=100)
+        progress = asyncio.run(job.run())
+        assert progress["done"] and progress["total_posts"] == 250
+        assert sorted(exported_ids(tmp_path / "export")) == list(range(1, 251))
+        assert len(parser.post_store.get_posts(CHANNEL, 1000)) == 250
+        assert parser.engagement_tracker.series == {}
+    finally:
+        asyncio.run(parser.stop())
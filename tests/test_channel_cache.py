@@ -0,0 +1,28 @@
+import asyncio
+import pytest
+from telegram_parser.cache import ChannelUnavailable
+
+
+def test_unknown_username_is_negative_cached(make_fake_parser):
+    parser = make_fake_parser()
+    assert asyncio.run(parser.get_posts(["no_such_channel"])) == []
+    with pytest.raises(ChannelUnavailable):
+        parser.channel_cache.get("no_such_channel", "fake-0")
+
+
+def test_unrelated_value_error_keeps_the_cached_channel(make_fake_parser, monkeypatch):
+    parser = make_fake_parser()
+    parser.response_cache.ttl = 0
+    asyncio.run(parser.get_posts(["fake_channel_0"], limit=5))
+    cached = parser.channel_cache.get("fake_channel_0", "fake-0")
+    assert cached is not None
+
+    async def broken_get_messages(*args, **kwargs):
+        raise ValueError("a bug, not a stale access_hash")
+
+    monkeypatch.setattr(parser, "_get_messages", broken_get_messages)
+    calls = dict(parser.session_pool.primary.client_manager.client.calls)
+    assert asyncio.run(parser.get_posts(["fake_channel_0"], limit=5)) == []
+    # Neither invalidated and resolved again, nor cached as unavailable
+    assert parser.channel_cache.get("fake_channel_0", "fake-0").access_hash == cached.access_hash
+    assert parser.session_pool.primary.client_manager.client.calls["get_entity"] == calls["get_entity"]
@@ -0,0 +1,124 @@
+import random
+from datetime import datetime, timezone
+from types import SimpleNamespace
+import pytest
+from telethon.tl.types import MessageFwdHeader, PeerChannel
+from telegram_parser.dedupe import BANDS, DedupeIndex, _bands, dedupe_posts, fingerprint, hamming
+from telegram_parser.models import Engagement, Post
+
+TEXT = ("Central bank keeps the key rate at 16 percent and signals "
+        "that cuts may start later this year")
+
+
+def post(channel, post_id, text=TEXT, day=1):
+    return Post(channel, "", post_id, datetime(2024, 1, day, tzinfo=timezone.utc), text, [], Engagement())
+
+
+def message(post_id, fwd_from=None):
+    return SimpleNamespace(id=post_id, fwd_from=fwd_from)
+
+
+def flip(value, bits):
+    for bit in bits:
+        value ^= 1 << bit
+    return value
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = DedupeIndex(str(tmp_path / "dedupe.sqlite"))
+    yield index
+    index.close()
+
+
+def test_fingerprints_within_three_bits_share_a_band():
+    rng = random.Random(1)
+    for _ in range(2000):
+        value = rng.getrandbits(64)
+        other = flip(value, rng.sample(range(64), rng.randint(0, BANDS - 1)))
+        assert any(a == b for a, b in zip(_bands(value), _bands(other)))
+
+
+def test_banded_lookup_finds_every_fingerprint_within_max_distance(index):
+    rng = random.Random(2)
+    for i in range(200):
+        value = rng.getrandbits(64)
+        near = flip(value, rng.sample(range(64), rng.randint(1, index.max_distance)))
+        original, repost = post("a", i), post("b", i)
+        index.assign([original], [message(i)], 1, [value])
+        index.assign([repost], [message(i)], 2, [near])
+        assert repost.cluster_id == original.cluster_id == f"a/{i}"
+
+
+def test_crowded_band_still_finds_the_near_duplicate(index):
+    rng = random.Random(4)
+    value = rng.getrandbits(64)
+    # 300 older posts share band 0 with the original but nothing else
+    crowd = [rng.getrandbits(48) << 16 | value & 0xFFFF for _ in range(300)]
+    index.assign([post("crowd", i) for i in range(300)], [message(i) for i in range(300)], 3, crowd)
+    original = post("a", 1)
+    index.assign([original], [message(1)], 1, [value])
+    # Differs from the original in bands 1 to 3, so band 0 is the only shared one
+    repost = post("b", 1)
+    index.assign([repost], [message(1)], 2, [flip(value, [16, 32, 48])])
+    assert repost.cluster_id == "a/1"
+
+
+def test_identical_fingerprints_match_exactly(index):
+    value = random.Random(5).getrandbits(64)
+    original, copy = post("a", 1), post("b", 1)
+    index.assign([original], [message(1)], 1, [value])
+    index.assign([copy], [message(1)], 2, [value])
+    assert copy.cluster_id == "a/1"
+
+
+def test_fingerprints_beyond_max_distance_are_separate_clusters(index):
+    value = random.Random(3).getrandbits(64)
+    # One bit in every band: no band is shared and the distance is 4
+    far = flip(value, [band * 16 for band in range(BANDS)])
+    assert hamming(value, far) == 4
+    original, other = post("a", 1), post("b", 1)
+    index.assign([original], [message(1)], 1, [value])
+    index.assign([other], [message(1)], 2, [far])
+    assert other.cluster_id == "b/1"
+
+
+def test_rewritten_repost_joins_the_original_cluster(index):
+    original = post("a", 10)
+    repost = post("b", 20, text=TEXT.upper() + " https://example.com/?utm_source=b", day=2)
+    index.assign([original], [message(10)], 1)
+    index.assign([repost], [message(20)], 2)
+    assert repost.cluster_id == "a/10"
+    assert dedupe_posts([repost, original]) == [original]
+
+
+def test_forward_joins_its_origin_even_without_text(index):
+    original = post("a", 10)
+    index.assign([original], [message(10)], 1)
+    forward = post("b", 5, text="")
+    header = MessageFwdHeader(date=original.date, from_id=PeerChannel(1), channel_post=10)
+    index.assign([forward], [message(5, header)], 2)
+    assert forward.cluster_id == "a/10"
+
+
+def test_short_texts_are_not_matched_by_content(index):
+    assert fingerprint("Read more") is None
+    first, second = post("a", 1, text="Read more"), post("b", 1, text="Read more")
+    index.assign([first], [message(1)], 1)
+    index.assign([second], [message(1)], 2)
+    assert first.cluster_id != second.cluster_id
+
+
+def test_refetched_post_keeps_its_cluster(index):
+    original, repost = post("a", 1), post("b", 1)
+    index.assign([original], [message(1)], 1)
+    index.assign([repost], [message(1)], 2)
+    again = post("b", 1, text="edited into something else entirely, long enough to be hashed on its own")
+    index.assign([again], [message(1)], 2)
+    assert again.cluster_id == "a/1"
+    assert index.stats() == {"posts": 2, "clusters": 1}
+
+
+def test_max_distance_must_stay_below_the_band_count(tmp_path):
+    with pytest.raises(ValueError):
+        DedupeIndex(str(tmp_path / "dedupe.sqlite"), max_distance=BANDS)
@@ -0,0 +1,75 @@
+import asyncio
+import sqlite3
+from telegram_parser.cache import ChannelCache
+
+CHANNEL = "fake_channel_0"
+
+
+def post_ids(posts):
+    return sorted(post.post_id for post in posts)
+
+
+def make(make_fake_parser):
+    parser = make_fake_parser()
+    # Every call goes to the (fake) network
+    parser.response_cache.ttl = 0
+    return parser
+
+
+def test_plain_reads_do_not_move_a_consumers_mark(make_fake_parser, fake_client):
+    parser = make(make_fake_parser)
+    asyncio.run(parser.get_posts([CHANNEL], limit=100, since="last", consumer="n8n"))
+    assert parser.channel_cache.get_high_water(CHANNEL, "n8n") == 300
+
+    fake_client.channels[CHANNEL].size += 5
+    # A dashboard reading the newest posts in between
+    assert post_ids(asyncio.run(parser.get_posts([CHANNEL], limit=3))) == [303, 304, 305]
+
+    posts = asyncio.run(parser.get_posts([CHANNEL], limit=100, since="last", consumer="n8n"))
+    assert post_ids(posts) == [301, 302, 303, 304, 305]
+    assert parser.channel_cache.get_high_water(CHANNEL, "n8n") == 305
+
+
+def test_consumers_keep_separate_marks(make_fake_parser, fake_client):
+    parser = make(make_fake_parser)
+    asyncio.run(parser.get_posts([CHANNEL], limit=10, since="last", consumer="a"))
+    asyncio.run(parser.get_posts([CHANNEL], limit=10, since="last", consumer="b"))
+
+    fake_client.channels[CHANNEL].size += 2
+    assert post_ids(asyncio.run(parser.get_posts([CHANNEL], limit=10, since="last", consumer="a"))) == [301, 302]
+    assert post_ids(asyncio.run(parser.get_posts([CHANNEL], limit=10, since="last", consumer="b"))) == [301, 302]
+    assert asyncio.run(parser.get_posts([CHANNEL], limit=10, since="last", consumer="a")) == []
+    assert parser.channel_cache.get_high_water(CHANNEL) == 0
+
+
+def test_failed_processing_does_not_advance_the_mark(make_fake_parser, fake_client, monkeypatch):
+    parser = make(make_fake_parser)
+    asyncio.run(parser.get_posts([CHANNEL], limit=10, since="last"))
+    fake_client.channels[CHANNEL].size += 10
+
+    async def failing_run(messages, context):
+        raise RuntimeError("processing failed")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(parser.pipeline, "run", failing_run)
+        assert asyncio.run(parser.get_posts([CHANNEL], limit=10, since="last")) == []
+    assert parser.channel_cache.get_high_water(CHANNEL) == 300
+
+    assert post_ids(asyncio.run(parser.get_posts([CHANNEL], limit=10, since="last"))) == list(range(301, 311))
+
+
+def test_shared_marks_become_the_default_consumers(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE high_water_marks (username TEXT PRIMARY KEY, post_id INTEGER NOT NULL, "
+                 "updated_at REAL NOT NULL)")
+    conn.execute("INSERT INTO high_water_marks VALUES ('somechannel', 42, 0)")
+    conn.commit()
+    conn.close()
+
+    cache = ChannelCache(path)
+    assert cache.get_high_water("SomeChannel") == 42
+    assert cache.get_high_water("somechannel", "n8n") == 0
+    cache.set_high_water("somechannel", 50, "n8n")
+    assert cache.get_high_water("somechannel") == 42
+    cache.close()
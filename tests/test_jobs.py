@@ -0,0 +1,50 @@
+import asyncio
+from telethon.errors import FloodWaitError
+from telegram_parser.jobs import COMPLETED, FAILED, JobManager
+
+CHANNELS = ["fake_channel_0", "fake_channel_1", "fake_channel_2"]
+
+
+async def run_job(manager, channels, **options):
+    job_id, attached = manager.submit(channels, **options)
+    await manager._queue.join()
+    return job_id, attached, manager.get(job_id, limit=1000)
+
+
+def test_failed_channel_fails_the_job_and_resumes_alone(make_fake_parser, tmp_path, monkeypatch):
+    parser = make_fake_parser()
+    fetch = parser._fetch_channel
+    fetched, flooded = [], {"fake_channel_1"}
+
+    async def flood_on_some(client, channel, *args):
+        fetched.append(channel)
+        if channel in flooded:
+            raise FloodWaitError(request=None, capture=900)
+        return await fetch(client, channel, *args)
+
+    monkeypatch.setattr(parser, "_fetch_channel", flood_on_some)
+
+    async def main():
+        manager = JobManager(parser, str(tmp_path / "jobs.sqlite"), workers=1)
+        await manager.start()
+        try:
+            job_id, _, job = await run_job(manager, CHANNELS, limit=5)
+            assert job["status"] == FAILED
+            assert "fake_channel_1" in job["error"]
+            assert [c["done"] for c in job["channels"]] == [True, False, True]
+            assert job["progress"]["posts"] == 10
+
+            # The same request resumes the failed job and fetches only the missing channel
+            fetched.clear()
+            flooded.clear()
+            resumed_id, attached, job = await run_job(manager, CHANNELS, limit=5)
+            assert (resumed_id, attached) == (job_id, True)
+            assert fetched == ["fake_channel_1"]
+            assert job["status"] == COMPLETED and job["error"] is None
+            assert all(c["done"] for c in job["channels"])
+            assert len(job["posts"]) == 15
+        finally:
+            await manager.stop()
+            manager.store.close()
+
+    asyncio.run(main())
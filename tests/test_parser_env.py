@@ -0,0 +1,19 @@
+from telegram_parser.parser import create_parser_from_env
+
+
+def test_factory_applies_rate_concurrency_and_cache_overrides(monkeypatch, tmp_path):
+    for name in ("CACHE_PATH", "POST_STORE_PATH", "DEDUPE_INDEX_PATH"):
+        monkeypatch.setenv(name, str(tmp_path / f"{name.lower()}.sqlite"))
+    monkeypatch.setenv("SESSION_STRINGS", "")
+    monkeypatch.setenv("MAX_REQUESTS_PER_MINUTE", "42")
+    monkeypatch.setenv("MAX_CONCURRENT_CHANNELS", "7")
+    monkeypatch.setenv("ENTITY_CACHE_TTL", "11")
+    monkeypatch.setenv("NEGATIVE_CACHE_TTL", "12")
+    monkeypatch.setenv("RESPONSE_CACHE_TTL", "13")
+
+    parser = create_parser_from_env()
+    assert parser.max_requests_per_minute == 42
+    assert parser.max_concurrent_channels == 7
+    assert parser.channel_cache.entity_ttl == 11
+    assert parser.channel_cache.negative_ttl == 12
+    assert parser.response_cache.ttl == 13
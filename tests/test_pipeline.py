@@ -0,0 +1,52 @@
+import asyncio
+import os
+from concurrent.futures.process import BrokenProcessPool
+from types import SimpleNamespace
+import pytest
+from telegram_parser.dedupe import fingerprint
+from telegram_parser.pipeline import Pipeline
+
+TEXTS = [f"Post number {i} about the central bank keeping the key rate unchanged this month" for i in range(5)]
+
+
+def messages():
+    return [SimpleNamespace(message=text) for text in TEXTS]
+
+
+def test_only_small_pages_are_fingerprinted_on_the_loop(make_fake_parser):
+    parser = make_fake_parser()
+    asyncio.run(parser.get_posts(["fake_channel_0"], limit=10))
+    assert parser.pipeline._pool is None
+
+    posts = asyncio.run(parser.get_posts(["fake_channel_1"], limit=100))
+    assert len(posts) == 100
+    assert parser.pipeline._pool is not None
+    assert all(post.cluster_id for post in posts)
+
+
+def test_start_spawns_the_workers():
+    pipeline = Pipeline(process_workers=2)
+    try:
+        asyncio.run(pipeline.start())
+        assert len(pipeline._pool._processes) == 2
+    finally:
+        pipeline.shutdown()
+
+
+def test_broken_pool_is_replaced_and_the_chunk_runs_inline():
+    pipeline = Pipeline([{"processor": "fingerprint", "chunk_size": 2, "min_batch": 1}], process_workers=1)
+    try:
+        broken = pipeline._process_pool()
+        with pytest.raises(BrokenProcessPool):
+            broken.submit(os._exit, 1).result()
+
+        results = asyncio.run(pipeline.run(messages(), None))
+        assert [fields["fingerprint"] for fields in results] == [fingerprint(text) for text in TEXTS]
+        assert pipeline._pool is not broken
+
+        # The next batch gets a working pool again
+        results = asyncio.run(pipeline.run(messages(), None))
+        assert [fields["fingerprint"] for fields in results] == [fingerprint(text) for text in TEXTS]
+        assert pipeline._pool is not None
+    finally:
+        pipeline.shutdown()
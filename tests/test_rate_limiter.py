@@ -0,0 +1,129 @@
+import asyncio
+import time
+import pytest
+from telethon.errors import FloodWaitError
+from telegram_parser.rate_limiter import AdaptiveRateLimiter, RateLimitExceeded, TokenBucket
+from telegram_parser.rpc import RpcClient
+
+
+def test_flood_wait_halves_the_rate_and_blocks_the_bucket():
+    bucket = TokenBucket("get_messages", 20)
+    bucket.penalize(30)
+    assert bucket.rate == 10
+    assert bucket.tokens == 0
+    assert 29 < bucket.blocked_for() <= 30
+    assert bucket.flood_waits == 1
+
+
+def test_rate_never_drops_below_min_rate():
+    bucket = TokenBucket("get_messages", 4, min_rate=3)
+    bucket.penalize(1)
+    bucket.penalize(1)
+    assert bucket.rate == 3
+
+
+def test_rate_recovers_additively_up_to_max_rate():
+    bucket = TokenBucket("get_messages", 20, recovery_interval=300, increase_step=2, max_rate=25)
+    bucket.penalize(0)
+    assert bucket.rate == 10
+    now = time.monotonic()
+    # Two quiet intervals: two steps up
+    bucket.last_adjusted = now - 2 * 300
+    bucket._refill(now)
+    assert bucket.rate == 14
+    # A long quiet period stops at max_rate
+    bucket.last_adjusted = now - 100 * 300
+    bucket._refill(now)
+    assert bucket.rate == 25
+
+
+def test_later_flood_wait_never_shortens_the_block():
+    bucket = TokenBucket("get_messages", 20)
+    bucket.penalize(60)
+    bucket.penalize(1)
+    assert bucket.blocked_for() > 59
+
+
+def test_long_flood_wait_raises_instead_of_sleeping():
+    bucket = TokenBucket("get_messages", 20)
+    bucket.penalize(600)
+    started = time.monotonic()
+    with pytest.raises(RateLimitExceeded) as info:
+        asyncio.run(bucket.acquire(max_wait=300))
+    assert info.value.seconds > 300
+    assert time.monotonic() - started < 1
+
+
+def test_short_flood_wait_is_waited_out():
+    bucket = TokenBucket("get_messages", 6000)
+    bucket.penalize(0.2)
+    started = time.monotonic()
+    asyncio.run(bucket.acquire(max_wait=300))
+    assert time.monotonic() - started >= 0.2
+
+
+def test_tokens_pace_requests_at_the_rate():
+    # 600/min is one token every 0.1 s once the initial burst is spent
+    bucket = TokenBucket("get_messages", 600, capacity=1)
+
+    async def take(count):
+        for _ in range(count):
+            await bucket.acquire()
+
+    started = time.monotonic()
+    asyncio.run(take(4))
+    assert time.monotonic() - started >= 0.29
+
+
+class FloodingCall:
+    """Raises FloodWaitError of ``seconds`` for the first ``floods`` calls"""
+
+    def __init__(self, seconds, floods=1):
+        self.seconds = seconds
+        self.floods = floods
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.calls <= self.floods:
+            raise FloodWaitError(request=None, capture=self.seconds)
+        return "ok"
+
+
+def test_rpc_client_penalizes_only_the_rpc_class_that_flooded():
+    limiter = AdaptiveRateLimiter(rates={kind: 6000 for kind in AdaptiveRateLimiter.DEFAULT_RATES})
+    rpc = RpcClient(client=None, rate_limiter=limiter)
+    call = FloodingCall(seconds=0)
+    assert asyncio.run(rpc._call("get_messages", call)) == "ok"
+    assert call.calls == 2
+    assert limiter.bucket("get_messages").flood_waits == 1
+    assert limiter.bucket("get_messages").rate == 3000
+    assert limiter.bucket("get_entity").flood_waits == 0
+    assert limiter.bucket("get_entity").rate == 6000
+
+
+def test_rpc_client_reraises_flood_waits_above_max_flood_wait():
+    limiter = AdaptiveRateLimiter(rates={"get_messages": 6000})
+    rpc = RpcClient(client=None, rate_limiter=limiter, max_flood_wait=300)
+    call = FloodingCall(seconds=600)
+    with pytest.raises(FloodWaitError):
+        asyncio.run(rpc._call("get_messages", call))
+    assert call.calls == 1
+    assert limiter.bucket("get_messages").blocked_for() > 590
+
+
+def test_rpc_client_keeps_retrying_short_flood_waits():
+    limiter = AdaptiveRateLimiter(rates={"get_messages": 6000})
+    rpc = RpcClient(client=None, rate_limiter=limiter)
+    call = FloodingCall(seconds=0, floods=3)
+    assert asyncio.run(rpc._call("get_messages", call)) == "ok"
+    assert call.calls == 4
+
+
+def test_rpc_client_gives_up_once_short_waits_add_up_to_max_flood_wait():
+    limiter = AdaptiveRateLimiter(rates={"get_messages": 6000})
+    rpc = RpcClient(client=None, rate_limiter=limiter, max_flood_wait=3)
+    call = FloodingCall(seconds=0, floods=10)
+    with pytest.raises(FloodWaitError):
+        asyncio.run(rpc._call("get_messages", call))
+    assert call.calls == 4
@@ -0,0 +1,112 @@
+import asyncio
+import time
+from telethon.errors import FloodWaitError
+from telegram_parser.scheduler import PollingScheduler
+
+CHANNEL = "fake_channel_0"
+
+
+def fill_history(scheduler, channel, posts_per_hour, now, hours=10, views=100.0):
+    history = scheduler.schedules[channel].history
+    history.clear()
+    count = int(posts_per_hour * hours)
+    for i in range(count):
+        history.append((now - hours * 3600 + i * 3600 / posts_per_hour, views))
+
+
+def intervals(scheduler):
+    return {key: round(schedule.interval, 6) for key, schedule in scheduler.schedules.items()}
+
+
+def test_budget_is_split_by_the_square_root_of_the_posting_rate(make_fake_parser):
+    scheduler = PollingScheduler(make_fake_parser(), ["a", "b"], budget=3, min_interval=1, max_interval=10000)
+    now = time.time()
+    fill_history(scheduler, "a", 4, now)
+    fill_history(scheduler, "b", 1, now)
+    scheduler.rebalance(now)
+    # Weights 2 and 1: two polls a minute for a, one for b
+    assert intervals(scheduler) == {"a": 30, "b": 60}
+
+
+def test_budget_above_min_interval_goes_to_the_other_channels(make_fake_parser):
+    scheduler = PollingScheduler(make_fake_parser(), ["a", "b", "c"], budget=2.5, min_interval=60,
+                                 max_interval=10000)
+    now = time.time()
+    fill_history(scheduler, "a", 64, now)
+    fill_history(scheduler, "b", 1, now)
+    fill_history(scheduler, "c", 1, now)
+    scheduler.rebalance(now)
+    # a would get 2 polls a minute but is capped at 1; b and c share the other 1.5
+    assert intervals(scheduler) == {"a": 60, "b": 80, "c": 80}
+
+
+def test_intervals_stretch_when_max_interval_for_all_exceeds_the_budget(make_fake_parser):
+    channels = [f"quiet_{i}" for i in range(10)]
+    scheduler = PollingScheduler(make_fake_parser(), channels, budget=0.5, min_interval=60, max_interval=600)
+    scheduler.rebalance(time.time())
+    assert set(intervals(scheduler).values()) == {1200}
+    assert sum(60 / s.interval for s in scheduler.schedules.values()) == 0.5
+
+
+def test_poll_moves_only_the_schedulers_mark(make_fake_parser, fake_client):
+    parser = make_fake_parser()
+    received = []
+    scheduler = PollingScheduler(parser, [CHANNEL], sink=received.extend, budget=10)
+    key = CHANNEL.lower()
+
+    asyncio.run(scheduler.poll(key))
+    assert [post.post_id for post in received] == list(range(300, 200, -1))
+    assert parser.channel_cache.get_high_water(CHANNEL, "scheduler") == 300
+
+    fake_client.channels[CHANNEL].size += 5
+    received.clear()
+    asyncio.run(scheduler.poll(key))
+    assert sorted(post.post_id for post in received) == [301, 302, 303, 304, 305]
+    assert parser.channel_cache.get_high_water(CHANNEL, "scheduler") == 305
+    assert parser.channel_cache.get_high_water(CHANNEL) == 0
+
+
+def test_poll_fails_over_to_the_next_account(make_fake_parser, monkeypatch):
+    parser = make_fake_parser(accounts=2)
+    home = parser.session_pool.candidates(CHANNEL)[0].name
+    fetch = parser._fetch_channel
+    used = []
+
+    async def flood_on_home(client, *args):
+        used.append(client.account)
+        if client.account == home:
+            raise FloodWaitError(request=None, capture=30)
+        return await fetch(client, *args)
+
+    monkeypatch.setattr(parser, "_fetch_channel", flood_on_home)
+    scheduler = PollingScheduler(parser, [CHANNEL], budget=10, limit=10)
+    asyncio.run(scheduler.poll(CHANNEL.lower()))
+    assert used[0] == home and used[1] != home
+    schedule = scheduler.schedules[CHANNEL.lower()]
+    assert (schedule.errors, schedule.posts) == (0, 10)
+
+
+def test_stop_cancels_running_polls(make_fake_parser, monkeypatch):
+    parser = make_fake_parser()
+    started, cancelled = asyncio.Event(), []
+
+    async def hanging_fetch(channel, limit, min_id=None):
+        started.set()
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.append(channel)
+            raise
+
+    monkeypatch.setattr(parser, "fetch_channel", hanging_fetch)
+
+    async def main():
+        scheduler = PollingScheduler(parser, [CHANNEL], budget=10)
+        scheduler.start()
+        await asyncio.wait_for(started.wait(), timeout=5)
+        assert len(scheduler._polls) == 1
+        await scheduler.stop()
+        assert cancelled == [CHANNEL]
+        assert not scheduler._polls
+
+    asyncio.run(main())
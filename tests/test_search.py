@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from telegram_parser.models import Engagement, Post
+from telegram_parser.search import fts_query, highlight, parse_query
+from telegram_parser.store import PostStore
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def make_post(channel, post_id, text):
+    return Post(channel, "", post_id, START + timedelta(hours=post_id), text, [], Engagement())
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PostStore(str(tmp_path / "posts.sqlite"))
+    yield store
+    store.close()
+
+
+def pages(store, query, limit, **options):
+    cursor, seen = None, []
+    while True:
+        results, cursor = store.search(query, limit=limit, cursor=cursor, **options)
+        seen.append([(r["post"]["channel_username"], r["post"]["post_id"]) for r in results])
+        if cursor is None:
+            return seen
+
+
+def test_parse_query_terms_phrases_and_exclusions():
+    terms, excluded = parse_query('Bank "key rate" -crypto to ""')
+    assert terms == [(("bank",), True), (("key", "rate"), False), (("to",), False)]
+    assert excluded == [(("crypto",), True)]
+
+
+def test_fts_query_quotes_everything_the_user_typed():
+    terms, excluded = parse_query('AND "OR" NEAR(')
+    assert fts_query(terms, excluded) == 'text : ("and" AND "or" AND "near"*)'
+    assert fts_query([], []) is None
+    assert fts_query(terms, channels=["!!!"]) is None
+
+
+def test_paging_through_equal_scores_returns_every_match_once(store):
+    # Identical texts score exactly the same; only the rowid tie-break orders them
+    store.upsert_posts([make_post("news", i, "rate decision today") for i in range(1, 24)])
+    seen = pages(store, "rate", limit=5)
+    assert [len(page) for page in seen] == [5, 5, 5, 5, 3]
+    flat = [key for page in seen for key in page]
+    assert sorted(flat) == [("news", i) for i in range(1, 24)]
+
+
+def test_better_matches_come_first_across_pages(store):
+    store.upsert_posts([make_post("news", i, "weather report and other filler words here") for i in range(1, 11)])
+    store.upsert_posts([make_post("news", 100, "rate rate rate")])
+    store.upsert_posts([make_post("news", i, "the rate and other filler words here") for i in range(11, 21)])
+    seen = pages(store, "rate", limit=4)
+    assert seen[0][0] == ("news", 100)
+    assert len({key for page in seen for key in page}) == 11
+
+
+def test_cursor_pins_the_ranked_set_while_posts_arrive(store):
+    store.search_depth = 6
+    store.upsert_posts([make_post("news", i, "rate decision") for i in range(1, 11)])
+    first, cursor = store.search("rate", limit=3)
+    # Newer matches arriving between pages do not shift the pages already handed out
+    store.upsert_posts([make_post("news", i, "rate decision") for i in range(11, 15)])
+    second, cursor = store.search("rate", limit=3, cursor=cursor)
+    assert cursor is None
+    ids = [r["post"]["post_id"] for r in first + second]
+    assert sorted(ids) == list(range(5, 11))
+
+
+def test_pages_survive_score_drift_from_new_posts(store):
+    store.upsert_posts([make_post("news", i, "rate " + "filler " * (i % 7)) for i in range(1, 41)])
+    first, cursor = store.search("rate", limit=10)
+    # Unrelated, longer posts change the document count and average length behind every score
+    store.upsert_posts([make_post("other", i, "weather report " * 20) for i in range(1, 701)])
+    ids = [r["post"]["post_id"] for r in first]
+    while cursor is not None:
+        results, cursor = store.search("rate", limit=10, cursor=cursor)
+        ids.extend(r["post"]["post_id"] for r in results)
+    assert sorted(ids) == list(range(1, 41))
+
+
+def test_channel_and_date_filters(store):
+    store.upsert_posts([make_post("news", i, "rate decision") for i in range(1, 5)])
+    store.upsert_posts([make_post("other_channel", i, "rate decision") for i in range(1, 5)])
+    results, _ = store.search("rate", channels=["other_channel"], limit=10)
+    assert {r["post"]["channel_username"] for r in results} == {"other_channel"}
+    results, _ = store.search("rate", channels=["news"], date_from=START + timedelta(hours=2),
+                              date_to=START + timedelta(hours=4), limit=10)
+    assert sorted(r["post"]["post_id"] for r in results) == [2, 3]
+
+
+def test_edited_text_is_reindexed(store):
+    store.upsert_posts([make_post("news", 1, "rate decision")])
+    store.upsert_posts([make_post("news", 1, "weather report")])
+    assert store.search("rate")[0] == []
+    assert len(store.search("weather")[0]) == 1
+
+
+def test_prefixes_match_longer_words_and_are_highlighted():
+    terms, _ = parse_query("банк")
+    snippet = highlight("Новости: банки снизили ставки", terms)
+    assert snippet == "Новости: <b>банки</b> снизили ставки"
+
+
+def test_invalid_cursor_is_a_value_error(store):
+    with pytest.raises(ValueError):
+        store.search("rate", cursor="not-a-cursor")
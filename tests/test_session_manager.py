@@ -0,0 +1,59 @@
+import asyncio
+import pytest
+from telegram_parser.session_manager import AuthorizationError, ClientManager
+
+
+class StubClient:
+    """Connects fine but reports the session as unauthorized until ``authorized`` is set"""
+
+    def __init__(self, authorized=False):
+        self.authorized = authorized
+        self.connected = False
+        self.connects = 0
+
+    async def connect(self):
+        self.connected = True
+        self.connects += 1
+
+    async def disconnect(self):
+        self.connected = False
+
+    def is_connected(self):
+        return self.connected
+
+    async def is_user_authorized(self):
+        return self.authorized
+
+
+def make_manager(clients):
+    manager = ClientManager(api_id=1, api_hash="hash", session_string="expired")
+    manager._create_client = lambda: clients.pop(0)
+    return manager
+
+
+def test_unauthorized_client_is_not_handed_out_later():
+    unauthorized, authorized = StubClient(), StubClient(authorized=True)
+    manager = make_manager([unauthorized, authorized])
+
+    async def scenario():
+        with pytest.raises(AuthorizationError):
+            await manager.get_client()
+        assert not unauthorized.is_connected()
+        assert not manager.is_connected()
+        # The next call connects and authorizes from scratch instead of reusing the failed client
+        return await manager.get_client()
+
+    assert asyncio.run(scenario()) is authorized
+
+
+def test_every_call_fails_while_unauthorized():
+    clients = [StubClient(), StubClient()]
+    manager = make_manager(list(clients))
+
+    async def scenario():
+        for _ in clients:
+            with pytest.raises(AuthorizationError):
+                await manager.get_client()
+
+    asyncio.run(scenario())
+    assert [client.connects for client in clients] == [1, 1]
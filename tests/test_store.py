@@ -0,0 +1,58 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import pytest
+from telegram_parser.models import Engagement, Post
+from telegram_parser.store import PostStore
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+CHANNEL = "fake_channel_0"
+
+
+def stored(store, channel, ids):
+    ids = list(ids)
+    store.upsert_posts([Post(channel, "", i, START + timedelta(hours=i), "text", [], Engagement()) for i in ids])
+    return ids
+
+
+def depth(store, channel):
+    return store._conn.execute(
+        "SELECT depth FROM channel_fetches WHERE channel_username = ?", (channel,)
+    ).fetchone()[0]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PostStore(str(tmp_path / "posts.sqlite"))
+    yield store
+    store.close()
+
+
+def test_overlapping_fetches_extend_the_depth(store):
+    store.record_fetch("news", stored(store, "news", range(201, 301)))
+    store.record_fetch("news", stored(store, "news", range(291, 311)))
+    assert depth(store, "news") == 110
+    store.record_fetch("news", stored(store, "news", range(311, 316)), after_id=310)
+    assert depth(store, "news") == 115
+    assert store.is_fresh("news", 60, 115)
+
+
+def test_a_gap_starts_the_depth_over(store):
+    store.record_fetch("news", stored(store, "news", range(201, 301)))
+    # Posts 301 to 340 were never fetched
+    store.record_fetch("news", stored(store, "news", range(341, 351)))
+    assert depth(store, "news") == 10
+    assert not store.is_fresh("news", 60, 50)
+
+    store.record_fetch("news", [], after_id=400)
+    assert depth(store, "news") == 0
+
+
+def test_store_never_answers_across_a_gap(make_fake_parser, fake_client):
+    parser = make_fake_parser()
+    parser.response_cache.ttl = 0
+    asyncio.run(parser.get_posts([CHANNEL], limit=100))
+    fake_client.channels[CHANNEL].size += 50
+    asyncio.run(parser.get_posts([CHANNEL], limit=10))
+
+    posts = asyncio.run(parser.get_posts([CHANNEL], limit=50, max_staleness=3600))
+    assert sorted(post.post_id for post in posts) == list(range(301, 351))
@@ -0,0 +1,48 @@
+import asyncio
+import time
+from telethon.tl.functions.messages import GetMessagesViewsRequest
+from benchmarks.fake_telegram import FakeTelegramClient
+from telegram_parser.tracker import EngagementTracker
+
+CHANNEL = "fake_channel_0"
+
+
+def tracked(make_fake_parser, tmp_path):
+    parser = make_fake_parser()
+    parser.engagement_tracker = EngagementTracker(parser, str(tmp_path / "engagement.sqlite"))
+    asyncio.run(parser.get_posts([CHANNEL], limit=10))
+    tracker = parser.engagement_tracker
+    assert len(tracker.series) == 10
+    for series in tracker.series.values():
+        series.next_poll_at = 0
+    return tracker
+
+
+def test_failed_reaction_lookup_carries_the_last_count_forward(make_fake_parser, tmp_path, monkeypatch):
+    tracker = tracked(make_fake_parser, tmp_path)
+
+    async def failing_fetch_reactions(client, peer, message_ids, ignore_errors=True):
+        raise ConnectionError("reactions unavailable")
+
+    monkeypatch.setattr(tracker.parser.engagement_processor, "fetch_reactions", failing_fetch_reactions)
+    assert asyncio.run(tracker.refresh_due()) == 10
+    for series in tracker.series.values():
+        assert len(series.reactions) == 2
+        assert series.reactions[1] == series.reactions[0]
+    assert any(series.reactions[0] for series in tracker.series.values())
+
+
+def test_failed_views_request_defers_the_posts(make_fake_parser, tmp_path, monkeypatch):
+    tracker = tracked(make_fake_parser, tmp_path)
+    answer = FakeTelegramClient.__call__
+
+    async def failing_views(self, request, *args, **kwargs):
+        if isinstance(request, GetMessagesViewsRequest):
+            raise ConnectionError("views unavailable")
+        return await answer(self, request, *args, **kwargs)
+
+    monkeypatch.setattr(FakeTelegramClient, "__call__", failing_views)
+    assert asyncio.run(tracker.refresh_due()) == 0
+    assert tracker.due() == {}
+    assert all(series.next_poll_at > time.time() for series in tracker.series.values())
+    assert all(len(series.timestamps) == 1 for series in tracker.series.values())